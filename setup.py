@@ -21,6 +21,7 @@ setup(
         'oemof',
         'shapely',
         'pandas >=1, <1.1',
+        'pyarrow',
         'geopandas',
         'GeoAlchemy2',
         'matplotlib',
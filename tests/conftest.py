@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+# the user data dir (~/.windnode_abw) is created on import of the config
+# module, use temporary home dir to not touch the user's data
+os.environ['HOME'] = tempfile.mkdtemp(prefix='windnode_abw_tests_')
+
+import pytest
+
+from windnode_abw.tools import config
+
+config.create_data_dirtree()
+config.load_config('config_data.cfg')
+config.load_config('config_misc.cfg')
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    """Empty user data dir (~/.windnode_abw) in temporary home dir"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    config.create_data_dirtree()
+    return config.get_data_root_dir()
@@ -0,0 +1,161 @@
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windnode_abw.model.region.aggregation import TypicalPeriods, \
+    create_typical_periods_model, weight_dsm_costs, k_medoids
+
+
+@pytest.fixture
+def solph():
+    solph = pytest.importorskip('oemof.solph')
+    if shutil.which('cbc') is None:
+        pytest.skip('Solver cbc not available')
+    return solph
+
+
+@pytest.mark.parametrize('invest', [False, True])
+def test_storage_cyclic_in_typical_periods(solph, invest):
+    # 4 days represented by typical days 0 (surplus) and 2 (deficit)
+    full_index = pd.date_range('2015-01-01', periods=4 * 24, freq='60min')
+    typical_periods = TypicalPeriods(full_index, period_length=24,
+                                     period_medoids=np.array([0, 0, 2, 2]))
+    feedin = np.concatenate([np.tile([3, 0], 12), np.zeros(24)])
+
+    esys = solph.EnergySystem(timeindex=typical_periods.datetime_index)
+    bus = solph.Bus(label='b_el')
+    if invest:
+        storage = solph.components.GenericStorage(
+            label='flex_bat',
+            inputs={bus: solph.Flow()},
+            outputs={bus: solph.Flow()},
+            investment=solph.Investment(ep_costs=0.1))
+    else:
+        storage = solph.components.GenericStorage(
+            label='flex_bat',
+            inputs={bus: solph.Flow()},
+            outputs={bus: solph.Flow()},
+            nominal_storage_capacity=100)
+    esys.add(
+        bus,
+        solph.Source(label='gen_el_wind',
+                     outputs={bus: solph.Flow(nominal_value=1,
+                                              actual_value=feedin,
+                                              fixed=True)}),
+        solph.Source(label='shortage_el',
+                     outputs={bus: solph.Flow(variable_costs=100)}),
+        solph.Sink(label='excess_el',
+                   inputs={bus: solph.Flow(variable_costs=1)}),
+        solph.Sink(label='dem_el',
+                   inputs={bus: solph.Flow(nominal_value=1,
+                                           actual_value=[1] * 48,
+                                           fixed=True)}),
+        storage
+    )
+
+    om = create_typical_periods_model(esys, typical_periods)
+    om.solve(solver='cbc')
+    assert om.solver_results.Solver.Status.key == 'ok'
+    assert om.solver_results.Solver.Termination_condition.key == 'optimal'
+
+    block = om.GenericInvestmentStorageBlock if invest \
+        else om.GenericStorageBlock
+    level = np.array([block.capacity[storage, t].value
+                      for t in om.TIMESTEPS])
+    inflow = np.array([om.flow[bus, storage, t].value for t in om.TIMESTEPS])
+    outflow = np.array([om.flow[storage, bus, t].value
+                        for t in om.TIMESTEPS])
+    shortage = np.array([om.flow[esys.groups['shortage_el'], bus, t].value
+                         for t in om.TIMESTEPS])
+
+    # storage is used in period with surplus
+    assert inflow[:24].sum() > 0
+    for period in [slice(0, 24), slice(24, 48)]:
+        # level of first timestep refers to last timestep of same period
+        assert level[period][0] == pytest.approx(
+            level[period][-1] + inflow[period][0] - outflow[period][0])
+        # no energy is shifted between periods
+        assert inflow[period].sum() == pytest.approx(outflow[period].sum())
+    # deficit period is supplied by shortage only
+    assert shortage[24:].sum() == pytest.approx(24)
+
+
+def test_weight_dsm_costs_unknown_block():
+    block = SimpleNamespace(cost=0)
+    om = SimpleNamespace(SinkDSMIntervalBlock=block)
+    weight_dsm_costs(om)
+    assert block.cost == 0
+
+
+def test_k_medoids_clusters():
+    # 3 well separated groups of points on a line
+    points = np.array([0., 20., 10.1, 0.1, 10., 0.2, 10.3])
+    distances = np.abs(points[:, np.newaxis] - points)
+    medoids, clusters = k_medoids(distances, k=3)
+
+    assert sorted(points[medoids]) == [0.1, 10.1, 20.]
+    # each medoid is in its own cluster
+    assert (clusters[medoids] == np.arange(3)).all()
+    assert sorted(sorted(np.flatnonzero(clusters == cluster))
+                  for cluster in range(3)) == [[0, 3, 5], [1], [2, 4, 6]]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_k_medoids_converged(seed):
+    rng = np.random.default_rng(seed)
+    points = rng.random((30, 3))
+    distances = np.sqrt(
+        ((points[:, np.newaxis, :] - points[np.newaxis, :, :]) ** 2).sum(
+            axis=2))
+    medoids, clusters = k_medoids(distances, k=4)
+
+    assert len(set(medoids)) == 4
+    # objects are assigned to nearest medoid
+    assert (distances[np.arange(30), medoids[clusters]] ==
+            distances[:, medoids].min(axis=1)).all()
+    # medoids minimize distances within their cluster
+    for cluster, medoid in enumerate(medoids):
+        members = np.flatnonzero(clusters == cluster)
+        assert distances[medoid, members].sum() == pytest.approx(
+            distances[np.ix_(members, members)].sum(axis=1).min())
+    # deterministic
+    medoids_2, clusters_2 = k_medoids(distances, k=4)
+    assert (medoids_2 == medoids).all() and (clusters_2 == clusters).all()
+
+
+def test_k_medoids_k_exceeds_objects():
+    distances = np.array([[0., 1.], [1., 0.]])
+    medoids, clusters = k_medoids(distances, k=3)
+    assert list(medoids) == [0, 1] and list(clusters) == [0, 1]
+
+
+def test_disaggregate():
+    # 4 full days and 5 h of incomplete day represented by days 0 and 2
+    full_index = pd.date_range('2015-01-01', periods=4 * 24 + 5, freq='60min')
+    period_medoids = np.array([0, 2, 2, 0, 2])
+    typical_periods = TypicalPeriods(full_index, period_length=24,
+                                     period_medoids=period_medoids)
+
+    assert list(typical_periods.periods) == [0, 2]
+    assert typical_periods.datetime_index.equals(
+        full_index[:24].append(full_index[48:72]))
+    assert typical_periods.weights.sum() == len(full_index)
+    assert list(typical_periods.weights[[0, 5, 24, 29]]) == [2, 2, 3, 2]
+    assert sum(typical_periods.objective_weighting) == len(full_index)
+
+    data = pd.DataFrame({'flow': np.arange(48.),
+                         'level': np.arange(48.) * 2},
+                        index=typical_periods.datetime_index)
+    data_full = typical_periods.disaggregate(data)
+
+    assert data_full.index.equals(full_index)
+    for step, timestamp in enumerate(full_index):
+        typical_step = full_index[
+            period_medoids[step // 24] * 24 + step % 24]
+        assert (data_full.loc[timestamp] == data.loc[typical_step]).all()
+
+    with pytest.raises(ValueError):
+        typical_periods.disaggregate(data.iloc[:24])
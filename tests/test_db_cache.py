@@ -0,0 +1,103 @@
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, Column, Integer, Float
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from windnode_abw.tools.data_io import read_db_table, db_cache_path, \
+    clear_db_cache
+
+Base = declarative_base()
+
+
+class Demography(Base):
+    __tablename__ = 'wn_abw_demography'
+    id = Column(Integer, primary_key=True)
+    ags_id = Column(Integer)
+    population = Column(Float)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    # use core statements as ORM operations configure the mappers of all
+    # DB models (incl. windnode_abw.config.db_models)
+    engine.execute(Demography.__table__.insert(),
+                   [{'ags_id': 15001000, 'population': 1.},
+                    {'ags_id': 15002000, 'population': 2.}])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def read(session, fingerprint, ags_min=0):
+    query = session.query(Demography.ags_id, Demography.population) \
+        .filter(Demography.ags_id >= ags_min) \
+        .order_by(Demography.ags_id)
+    return read_db_table('demography', query, session,
+                         fingerprint=fingerprint, index_col='ags_id')
+
+
+def update_population(session, population):
+    session.bind.execute(
+        Demography.__table__.update().values(population=population))
+
+
+def test_no_cache(data_root, session):
+    data = read(session, fingerprint=None)
+    assert list(data['population']) == [1., 2.]
+    assert os.listdir(db_cache_path()) == []
+
+
+def test_round_trip(data_root, session):
+    fingerprint = {'wn_abw_demography': '2_6172'}
+    data = read(session, fingerprint)
+    assert len(os.listdir(db_cache_path())) == 1
+
+    # DB content is not read again as long as fingerprint is unchanged
+    update_population(session, 3.)
+    cached = read(session, fingerprint)
+    pd.testing.assert_frame_equal(cached, data)
+    assert list(cached['population']) == [1., 2.]
+
+
+def test_invalidation(data_root, session):
+    fingerprint = {'wn_abw_demography': '2_6172',
+                   'wn_abw_mun': '2_6172'}
+    read(session, fingerprint)
+    update_population(session, 3.)
+
+    # fingerprint of table not involved in query
+    fingerprint['wn_abw_mun'] = '2_-1208'
+    assert list(read(session, fingerprint)['population']) == [1., 2.]
+
+    # fingerprint of table involved in query, outdated entry is removed
+    files = os.listdir(db_cache_path())
+    fingerprint['wn_abw_demography'] = '2_9345'
+    assert list(read(session, fingerprint)['population']) == [3., 3.]
+    assert len(os.listdir(db_cache_path())) == 1
+    assert os.listdir(db_cache_path()) != files
+
+    # query parameters
+    update_population(session, 4.)
+    assert list(read(session, fingerprint, ags_min=15002000)
+                ['population']) == [4.]
+    assert len(os.listdir(db_cache_path())) == 1
+
+
+def test_no_fingerprint_of_table(data_root, session):
+    data = read(session, fingerprint={'wn_abw_mun': '2_6172'})
+    assert list(data['population']) == [1., 2.]
+    assert os.listdir(db_cache_path()) == []
+
+
+def test_clear_db_cache(data_root, session):
+    fingerprint = {'wn_abw_demography': '2_6172'}
+    read(session, fingerprint)
+    clear_db_cache(['muns'])
+    assert len(os.listdir(db_cache_path())) == 1
+    clear_db_cache(['demography'])
+    assert os.listdir(db_cache_path()) == []
@@ -0,0 +1,359 @@
+import os
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pytest
+from shapely.geometry import Point, LineString, MultiLineString, \
+    MultiPolygon, box
+
+from windnode_abw.tools import data_io
+from windnode_abw.tools.data_io import import_db_data, FileDataSource, \
+    read_query_from_files
+from windnode_abw.config.db_models import WnAbwMun, WnAbwMundata
+
+# year of timeseries in DB differs from model year
+TS_INDEX = pd.date_range('2017-01-01 00:00:00', '2017-12-31 23:00:00',
+                         freq='60min')
+MUNS = [15001000, 15002000]
+
+
+def write_table(path, name, data, geom=None):
+    """Write table like export_db_to_files(), geom: {column: SRID}"""
+    file = os.path.join(path, f'{name}.parquet')
+    if geom:
+        for col, srid in geom.items():
+            data[col] = gpd.GeoSeries(data[col], crs=f'EPSG:{srid}')
+        gpd.GeoDataFrame(data, geometry=list(geom)[0]).to_parquet(file)
+    else:
+        data.to_parquet(file)
+
+
+def timeseries(columns, tz=None, seed=0):
+    """Timeseries table (mun x timestep, shuffled rows) and expected values
+    in Region layout (technology x mun)"""
+    rng = np.random.default_rng(seed)
+    values = {col: pd.DataFrame(rng.random((len(TS_INDEX), len(MUNS))),
+                                columns=MUNS)
+              for col in columns}
+    table = pd.concat(
+        [pd.DataFrame({'timestamp': TS_INDEX.tz_localize(tz),
+                       'ags_id': ags,
+                       **{col: values[col][ags].to_numpy()
+                          for col in columns}})
+         for ags in MUNS], ignore_index=True)
+    table = table.sample(frac=1, random_state=seed).reset_index(drop=True)
+    expected = pd.concat(values, axis=1)
+    expected.columns.names = [None, 'ags']
+    return table, expected
+
+
+@pytest.fixture(scope='module')
+def db_export(tmp_path_factory):
+    """Minimal DB export with all tables used by import_db_data(), returns
+    path and expected timeseries"""
+    path = str(tmp_path_factory.mktemp('db_export'))
+    ts = {}
+
+    # municipalities, mun 1 is supplied by 2 substations
+    write_table(path, 'wn_abw_mun', pd.DataFrame({
+        'ags': MUNS,
+        'gen': ['Mun 1', 'Mun 2'],
+        'geom': [MultiPolygon([box(0, 0, 1000, 1000)]),
+                 MultiPolygon([box(1000, 0, 2000, 1000)])]
+    }), geom={'geom': 3035})
+    write_table(path, 'wn_abw_mundata', pd.DataFrame({
+        'ags_id': MUNS[::-1],
+        **{col.name: [2., 1.]
+           for col in WnAbwMundata.__table__.columns
+           if col.name != 'ags_id'}
+    }))
+    write_table(path, 'wn_abw_rel_subst_id_ags_id', pd.DataFrame({
+        'id': [1, 2, 3],
+        'subst_id': [10, 11, 12],
+        'ags_id': [MUNS[0], MUNS[0], MUNS[1]]
+    }))
+    write_table(path, 'wn_abw_demography', pd.DataFrame({
+        'ags_id': MUNS * 2,
+        'year': [2030, 2030, 2017, 2017],
+        'population': [4, 3, 2, 1],
+        'employees': [40, 30, 20, 10]
+    }))
+
+    # timeseries
+    for name, table, columns, tz in [
+        ('demand_ts_init', 'wn_abw_demandts',
+         ['el_hh', 'el_rca', 'el_ind', 'th_hh_efh', 'th_hh_mfh', 'th_rca'],
+         'UTC'),
+        ('feedin_ts_init', 'wn_abw_feedints',
+         ['wind_sq', 'wind_fs', 'pv_ground', 'pv_roof', 'hydro', 'bio',
+          'conventional', 'solar_heat'],
+         'UTC'),
+        ('dsm_ts', 'wn_abw_dsmts',
+         ['Lastprofil', 'Flex_Minus', 'Flex_Minus_Max', 'Flex_Plus',
+          'Flex_Plus_Max'],
+         None),
+        ('temp_ts_init', 'wn_abw_tempts', ['air_temp', 'soil_temp'], None)
+    ]:
+        data, ts[name] = timeseries(columns, tz=tz, seed=len(ts))
+        write_table(path, table, data)
+
+    # grid
+    write_table(path, 'wn_abw_grid_hv_bus', pd.DataFrame({
+        'bus_id': [2, 1],
+        'v_nom': [110., 380.],
+        'hvmv_subst_id': [10, 11],
+        'region_bus': [True, False],
+        'ags_id': MUNS,
+        'geom': [Point(12.0, 51.8), Point(12.2, 51.9)]
+    }), geom={'geom': 4326})
+    write_table(path, 'wn_abw_grid_hv_line', pd.DataFrame({
+        'line_id': [2, 1],
+        'bus0': [1, 2],
+        'bus1': [2, 1],
+        'x': [1., 2.],
+        'r': [.1, .2],
+        'g': [0., 0.],
+        'b': [.01, .02],
+        's_nom': [260., 520.],
+        'length': [10., 20.],
+        'cables': [3, 6],
+        'geom': [MultiLineString([LineString([(12.0, 51.8),
+                                              (12.2, 51.9)])])] * 2
+    }), geom={'geom': 4326})
+    write_table(path, 'wn_abw_grid_hv_transformer', pd.DataFrame({
+        'trafo_id': [1],
+        'bus0': [1],
+        'bus1': [2],
+        'x': [1.],
+        'r': [.1],
+        'g': [0.],
+        'b': [0.],
+        's_nom': [300.],
+        'tap_ratio': [1.],
+        'phase_shift': [0.],
+        'ags_id': [MUNS[0]],
+        'geom_point': [Point(12.0, 51.8)]
+    }), geom={'geom_point': 4326})
+    # substation 13 has no grid district -> not imported (inner join)
+    write_table(path, 'wn_abw_grid_hvmv_substation', pd.DataFrame({
+        'subst_id': [12, 11, 10, 13],
+        'otg_id': [2, 1, 1, 2],
+        'voltage': ['110000', '110000;380000', '110000', '110000'],
+        'geom': [Point(500, 500), Point(600, 600), Point(700, 700),
+                 Point(800, 800)]
+    }), geom={'geom': 3035})
+    write_table(path, 'wn_abw_grid_mv_griddistrict', pd.DataFrame({
+        'subst_id': [10, 11, 12],
+        'geom': [MultiPolygon([box(0, 0, 1000, 500)]),
+                 MultiPolygon([box(0, 500, 1000, 1000)]),
+                 MultiPolygon([box(1000, 0, 2000, 1000)])]
+    }), geom={'geom': 3035})
+
+    # generators and assumptions
+    write_table(path, 'wn_abw_powerplant', pd.DataFrame({
+        'id': [5, 6],
+        'ags_id': MUNS,
+        'capacity': [2., 3.],
+        'chp': ['no', 'yes'],
+        'com_month': [1., 2.],
+        'com_year': [2000., 2010.],
+        'energy_source_level_1': ['Renewable energy'] * 2,
+        'energy_source_level_2': ['Wind', 'Bioenergy'],
+        'energy_source_level_3': ['Onshore', 'Biogas'],
+        'technology': ['Onshore', None],
+        'thermal_capacity': [0., 1.],
+        'capacity_in': [0., 0.],
+        'geometry': [Point(12.0, 51.8), Point(12.2, 51.9)]
+    }), geom={'geometry': 4326})
+    write_table(path, 'wn_abw_heating_structure', pd.DataFrame({
+        'ags_id': MUNS,
+        'year': [2017, 2017],
+        'energy_source': ['gas', 'oil'],
+        'tech_share_hh_efh': [.1, .2],
+        'tech_share_hh_mfh': [.3, .4],
+        'tech_share_rca': [.5, .6]
+    }))
+    write_table(path, 'wn_abw_tech_assumptions', pd.DataFrame({
+        'technology': ['gen_el_wind', 'gen_el_pv'],
+        'year': [2017, 2017],
+        'technology_name': ['Wind', 'PV'],
+        'capex': [1.5, 1.],
+        'opex_fix': [.05, .02],
+        'opex_var': [.001, 0.],
+        'lifespan': [20, 25],
+        'emissions_fix': [1., 2.],
+        'emissions_var': [0., 0.],
+        'sys_eff': [100., 95.],
+        'wacc': [5., 5.]
+    }))
+    for table in ['wn_abw_potential_areas_pv', 'wn_abw_potential_areas_wec']:
+        write_table(path, table, pd.DataFrame({
+            'ags_id': MUNS,
+            'scenario': ['scn_a', 'scn_b'],
+            'area_ha': [10, 20],
+            'geom': [MultiPolygon([box(0, 0, 100, 100)]),
+                     MultiPolygon([box(1000, 0, 1200, 100)])]
+        }), geom={'geom': 3035})
+    write_table(path, 'wn_abw_potential_areas_pv_roof', pd.DataFrame({
+        'ags_id': MUNS,
+        'area_resid_ha': [1., 2.],
+        'area_ind_ha': [3., 4.]
+    }))
+
+    return path, ts
+
+
+@pytest.fixture
+def cfg(db_export):
+    return {'data_source': 'files',
+            'data_source_path': db_export[0],
+            'date_from': '2015-01-01 00:00:00',
+            'date_to': '2015-12-31 23:00:00',
+            'freq': '60min'}
+
+
+@pytest.fixture
+def data(cfg):
+    return import_db_data(cfg)
+
+
+def test_muns(data):
+    muns = data['muns']
+    assert list(muns.index) == MUNS
+    assert list(muns['gen']) == ['Mun 1', 'Mun 2']
+    assert list(muns['subst_id']) == [[10, 11], [12]]
+    # joined on ags, mundata is stored in reverse order
+    assert list(muns['area']) == [1., 2.]
+    assert list(muns['dem_th_energy_rca']) == [1., 2.]
+    assert muns['geom'][MUNS[1]].equals(
+        MultiPolygon([box(1000, 0, 2000, 1000)]))
+
+
+def test_demography(data):
+    demography = data['demography']
+    assert list(demography.index) == [(2017, MUNS[0]), (2017, MUNS[1]),
+                                      (2030, MUNS[0]), (2030, MUNS[1])]
+    assert list(demography['population']) == [2, 1, 4, 3]
+    assert list(demography['employees']) == [20, 10, 40, 30]
+
+
+@pytest.mark.parametrize('name', ['demand_ts_init', 'feedin_ts_init',
+                                  'dsm_ts', 'temp_ts_init'])
+def test_timeseries(data, db_export, name):
+    expected = db_export[1][name]
+    expected.index = pd.date_range('2015-01-01 00:00:00',
+                                   '2015-12-31 23:00:00', freq='60min')
+    pd.testing.assert_frame_equal(data[name], expected, check_like=True)
+
+
+def test_timeseries_pruned(cfg, db_export):
+    cfg.update({'date_from': '2015-02-01 00:00:00',
+                'date_to': '2015-02-07 23:00:00',
+                'db_timerange_only': True,
+                'scn_data': {
+                    'general': {'year': 2035},
+                    'flexopt': {'dsm': {'params': {'mode': 'flex_max'}}}}})
+    data = import_db_data(cfg)
+    index = pd.date_range(cfg['date_from'], cfg['date_to'], freq='60min')
+    offset = slice(31 * 24, 38 * 24)
+
+    feedin = db_export[1]['feedin_ts_init'].iloc[offset]
+    assert set(data['feedin_ts_init'].columns.levels[0]) == \
+        set(feedin.columns.levels[0]) - {'wind_sq'}
+    assert (data['feedin_ts_init'].index == index).all()
+    np.testing.assert_array_equal(data['feedin_ts_init']['wind_fs'],
+                                  feedin['wind_fs'])
+
+    dsm = db_export[1]['dsm_ts'].iloc[offset]
+    assert set(data['dsm_ts'].columns.levels[0]) == \
+        {'Lastprofil', 'Flex_Minus_Max', 'Flex_Plus_Max'}
+    np.testing.assert_array_equal(data['dsm_ts']['Flex_Plus_Max'],
+                                  dsm['Flex_Plus_Max'])
+    np.testing.assert_array_equal(data['temp_ts_init']['air_temp'],
+                                  db_export[1]['temp_ts_init']['air_temp']
+                                  .iloc[offset])
+
+
+def test_grid(data):
+    buses = data['buses']
+    assert list(buses.index) == [1, 2]
+    assert list(buses['ags']) == MUNS[::-1]
+    assert list(buses['region_bus']) == [False, True]
+    # transformed to EPSG:3035
+    expected = gpd.GeoSeries([Point(12.2, 51.9)],
+                             crs='EPSG:4326').to_crs(epsg=3035)[0]
+    assert buses['geom'][1].distance(expected) < 1e-3
+
+    lines = data['lines']
+    assert list(lines['line_id']) == [1, 2]
+    assert list(lines['s_nom']) == [520., 260.]
+    assert lines['geom'][0].geom_type == 'MultiLineString'
+
+    trafos = data['trafos']
+    assert list(trafos.index) == [1]
+    assert list(trafos['ags']) == [MUNS[0]]
+
+    subst = data['subst']
+    assert list(subst.index) == [10, 11, 12]
+    assert list(subst['bus_id']) == [1, 1, 2]
+    assert list(subst['voltage']) == ['110000', '110000;380000', '110000']
+    assert subst['geom'][12].equals(Point(500, 500))
+    assert subst['geom_mvgd'][12].equals(
+        MultiPolygon([box(1000, 0, 2000, 1000)]))
+
+
+def test_generators_and_assumptions(data):
+    generators = data['generators']
+    assert list(generators.index) == [5, 6]
+    assert list(generators['technology']) == ['Onshore', None]
+    assert generators['geom'][5].geom_type == 'Point'
+
+    heating_structure = data['heating_structure']
+    assert heating_structure.index.names == ['ags_id', 'energy_source',
+                                             'year']
+    assert heating_structure.loc[(MUNS[1], 'oil', 2017), 'hh_mfh'] == .4
+
+    # unit conversion in query
+    tech_assumptions = data['tech_assumptions']
+    assert tech_assumptions.loc[('gen_el_wind', 2017), 'capex'] == 1500.
+    assert tech_assumptions.loc[('gen_el_wind', 2017), 'opex_var'] == 1.
+    assert tech_assumptions.loc[('gen_el_pv', 2017), 'sys_eff'] == .95
+    assert tech_assumptions.loc[('gen_el_pv', 2017), 'wacc'] == .05
+
+    for name in ['pot_areas_pv', 'pot_areas_wec']:
+        assert list(data[name].index) == [(MUNS[0], 'scn_a'),
+                                          (MUNS[1], 'scn_b')]
+        assert list(data[name]['area_ha']) == [10, 20]
+    assert list(data['pot_areas_pv_roof']['area_ind_ha']) == [3., 4.]
+
+
+def test_unsupported_query(db_export):
+    source = FileDataSource(db_export[0])
+    query = source.session().query(WnAbwMun.ags).filter(
+        WnAbwMun.name.like('Mun%'))
+    with pytest.raises(NotImplementedError):
+        read_query_from_files(query, db_export[0])
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_data_source_closed(cfg, monkeypatch, fail):
+    closed = []
+
+    class DataSource(FileDataSource):
+        def read(self, name, query, session, copy=False, **kwargs):
+            if fail and name == 'buses':
+                raise ValueError('Import failed')
+            return super().read(name, query, session, copy=copy, **kwargs)
+
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(data_io, 'create_data_source',
+                        lambda cfg: DataSource(cfg['data_source_path']))
+    if fail:
+        with pytest.raises(ValueError):
+            import_db_data(cfg)
+    else:
+        import_db_data(cfg)
+    assert closed == [True]
@@ -0,0 +1,226 @@
+import gc
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windnode_abw.analysis import tools
+from windnode_abw.analysis.tools import extract_flows_timexagsxtech, \
+    flows_timexagsxtech, _ags_index2int, FLOW_EXTRACTOR, \
+    node_label_catalog, clear_node_label_catalogs
+
+
+def extract_flows_wide_to_long(results_raw, node_pattern, bus_pattern,
+                               stubname, level_flow_in=0, level_flow_out=1,
+                               unstack_col="technology"):
+    """Former implementation of extract_flows_timexagsxtech() using
+    wide-to-long conversion (reference)"""
+    flows_extract = results_raw.loc[:,
+                    results_raw.columns.get_level_values(level_flow_in).str.match("_".join([
+                        stubname, node_pattern]))
+                    & results_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)]
+
+    flows_extract = flows_extract.sum(level=level_flow_in, axis=1)
+    flows_extract.index.name = "timestamp"
+    flows_extract = flows_extract.reset_index()
+    flows_extracted_long = pd.wide_to_long(flows_extract, stubnames=stubname, i="timestamp", j="ags_tech", sep="_",
+                                           suffix=node_pattern)
+
+    idx_new = [list(flows_extracted_long.index.get_level_values(0))]
+    idx_split = flows_extracted_long.index.get_level_values(1).str.extract(node_pattern)
+    [idx_new.append(c[1].tolist()) for c in idx_split.iteritems()]
+    flows_extracted_long.index = pd.MultiIndex.from_arrays(
+        idx_new,
+        names=["timestamp"] + list(idx_split.columns))
+    flows_extracted_long.index = _ags_index2int(flows_extracted_long.index)
+
+    flows_formatted = flows_extracted_long.sum(level=list(range(len(idx_new))))
+    if unstack_col:
+        flows_formatted = flows_formatted[stubname].unstack(unstack_col, fill_value=0)
+
+    return flows_formatted
+
+
+@pytest.fixture
+def flows():
+    """Flows of 2 muns with multiple buses per mun"""
+    labels = []
+    for ags in [15001000, 15002000]:
+        for bus in [f'b_el_{ags}_b0', f'b_el_{ags}_b1']:
+            labels += [(f'gen_el_{ags}_b{bus[-1]}_pv_ground', bus),
+                       (f'gen_el_{ags}_b{bus[-1]}_wind', bus),
+                       (bus, f'dem_el_{ags}_b{bus[-1]}_hh'),
+                       (bus, f'dem_el_{ags}_b{bus[-1]}_rca'),
+                       (f'flex_bat_large_{ags}_b{bus[-1]}', bus),
+                       (bus, f'flex_bat_large_{ags}_b{bus[-1]}')]
+        for level in ['dec', 'cen']:
+            for sector in ['_hh_efh', '_rca'] if level == 'dec' else ['']:
+                bus = f'b_th_{level}_{ags}{sector}'
+                labels += [(f'stor_th_{level}_{ags}{sector}', bus),
+                           (bus, f'stor_th_{level}_{ags}{sector}'),
+                           (f'stor_th_{level}_pth_{ags}{sector}', bus)]
+        # nodes not matching the entire node pattern (suffix)
+        bus = f'b_th_dec_{ags}_hh_efh'
+        labels += [(f'stor_th_dec_{ags}_hh_efh_new', bus),
+                   (bus, f'stor_th_dec_{ags}_hh_efh_new')]
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.random((6, len(labels))),
+        index=pd.date_range('2015-01-01', periods=6, freq='60min'),
+        columns=pd.MultiIndex.from_tuples(labels))
+
+
+@pytest.mark.parametrize('name', ['Stromerzeugung',
+                                  'Wärmespeicher discharge',
+                                  'Wärmespeicher charge',
+                                  'Batteriespeicher discharge',
+                                  'Batteriespeicher charge',
+                                  'Stromnachfrage'])
+def test_equals_wide_to_long(flows, name):
+    patterns = FLOW_EXTRACTOR[name]
+    extracted = extract_flows_timexagsxtech(flows, **patterns)
+    assert not extracted.empty
+    # order of preserved columns of wide-to-long conversion is arbitrary
+    pd.testing.assert_frame_equal(
+        extracted,
+        extract_flows_wide_to_long(flows, **patterns)[extracted.columns])
+
+
+def test_nodes_other(flows):
+    patterns = FLOW_EXTRACTOR['Wärmespeicher discharge']
+    extracted = extract_flows_timexagsxtech(flows, **patterns)
+    expected = extract_flows_wide_to_long(flows, **patterns)
+
+    # nodes not matching the entire pattern are kept as columns (summed per
+    # key in wide-to-long conversion)
+    nodes_other = ['stor_th_dec_15001000_hh_efh_new',
+                   'stor_th_dec_15002000_hh_efh_new']
+    assert list(extracted.columns) == nodes_other + ['stor_th']
+    pd.testing.assert_frame_equal(extracted[nodes_other],
+                                  expected[nodes_other])
+    pd.testing.assert_series_equal(extracted['stor_th'], expected['stor_th'])
+
+
+@pytest.mark.parametrize('unstack_col', ['technology', None])
+def test_no_match(flows, unstack_col):
+    extracted = extract_flows_timexagsxtech(
+        flows,
+        node_pattern='(?P<ags>\\d+)_(?P<technology>\\w+)',
+        bus_pattern='b_el_\\w+',
+        stubname='chp',
+        unstack_col=unstack_col)
+
+    assert extracted.empty
+    if unstack_col:
+        assert extracted.index.names == ['timestamp', 'ags']
+        assert extracted.columns.name == 'technology'
+    else:
+        assert extracted.index.names == ['timestamp', 'ags', 'technology']
+        assert list(extracted.columns) == ['chp']
+
+
+@pytest.fixture
+def model_flows():
+    """Flows of all node types of 2 muns with 1 bus each, grid incl.
+    external bus 10001 (connected to bus 1) and region stub"""
+    labels = []
+    for ags, bus in [(15001000, 1), (15002000, 2)]:
+        b_el = f'b_el_{bus}'
+        labels += [(f'gen_el_{ags}_b{bus}_wind', b_el),
+                   (f'gen_el_{ags}_b{bus}_pv_ground', b_el),
+                   (b_el, f'dem_el_{ags}_b{bus}_hh'),
+                   (b_el, f'dem_el_{ags}_b{bus}_rca'),
+                   (b_el, f'flex_dsm_{ags}_b{bus}')]
+        for level in ['large', 'small']:
+            labels += [(f'flex_bat_{level}_{ags}_b{bus}', b_el),
+                       (b_el, f'flex_bat_{level}_{ags}_b{bus}')]
+        # decentralized heat
+        b_th = f'b_th_dec_{ags}_hh_efh'
+        b_th_pth = f'b_th_dec_pth_{ags}_hh_efh'
+        labels += [(f'gen_th_dec_{ags}_hh_efh_natural_gas', b_th),
+                   (b_th, f'dem_th_dec_{ags}_hh_efh'),
+                   (b_el, f'flex_dec_pth_ASHP_nostor_{ags}_hh_efh'),
+                   (f'flex_dec_pth_ASHP_nostor_{ags}_hh_efh', b_th),
+                   (b_el, f'flex_dec_pth_ASHP_stor_{ags}_hh_efh'),
+                   (f'flex_dec_pth_ASHP_stor_{ags}_hh_efh', b_th_pth),
+                   (f'stor_th_dec_pth_{ags}_hh_efh', b_th_pth),
+                   (b_th_pth, f'stor_th_dec_pth_{ags}_hh_efh')]
+        # central heat
+        b_th_in, b_th_out = f'b_th_cen_in_{ags}', f'b_th_cen_out_{ags}'
+        labels += [(f'gen_th_cen_{ags}_gas_boiler', b_th_in),
+                   (b_el, f'flex_cen_pth_{ags}'),
+                   (f'flex_cen_pth_{ags}', b_th_in),
+                   (f'stor_th_cen_{ags}', b_th_in),
+                   (b_th_in, f'stor_th_cen_{ags}'),
+                   (b_th_out, f'dem_th_cen_{ags}_hh')]
+    labels += [('b_gas', 'gen_th_cen_15001000_gud'),
+               ('gen_th_cen_15001000_gud', 'b_th_cen_in_15001000'),
+               ('gen_th_cen_15001000_gud', 'b_el_1')]
+    # grid
+    for line, (bus0, bus1) in [('line_1_b1_b2', (1, 2)),
+                               ('line_2_b10001_b1', (10001, 1)),
+                               ('line_b10001_b_el_imex', (10001, 'imex'))]:
+        labels += [(f'b_el_{bus0}', line), (f'b_el_{bus1}', line),
+                   (line, f'b_el_{bus0}'), (line, f'b_el_{bus1}')]
+    labels += [('b_el_10001', 'excess_el_hv_b10001'),
+               ('shortage_el_hv_b10001', 'b_el_10001')]
+
+    rng = np.random.default_rng(0)
+    flows = pd.DataFrame(
+        rng.random((4, len(labels))),
+        index=pd.date_range('2015-01-01', periods=4,
+                            freq='60min').astype(str),
+        columns=pd.MultiIndex.from_tuples(labels))
+    region = SimpleNamespace(
+        muns=pd.DataFrame(index=pd.Index([15001000, 15002000])),
+        buses=pd.DataFrame({'ags': [15001000, 15002000, np.nan]},
+                           index=[1, 2, 10001]),
+        lines=pd.DataFrame({'bus0': [1, 10001], 'bus1': [2, 1]}))
+    return flows, region
+
+
+def test_flows_timexagsxtech(model_flows):
+    flows, region = model_flows
+    flows_txaxt = flows_timexagsxtech(flows, region)
+
+    # storage flows are joined, stubname is removed from columns
+    for name, stubname, node in [
+            ('Batteriespeicher', 'flex_bat', 'flex_bat_small_15002000_b2'),
+            ('Wärmespeicher', 'stor_th', 'stor_th_cen_15002000')]:
+        stor = flows_txaxt[name]
+        assert list(stor.columns) == ['discharge', 'charge']
+        level = 'small' if name == 'Batteriespeicher' else 'cen'
+        stor = stor.xs((level, 15002000), level=['level', 'ags'])
+        assert list(stor['discharge']) == list(
+            flows.loc[:, flows.columns.get_level_values(0) == node].iloc[
+                :, 0])
+        assert list(stor['charge']) == list(
+            flows.loc[:, flows.columns.get_level_values(1) == node].iloc[
+                :, 0])
+
+    gen = flows_txaxt['Stromerzeugung'].xs(15001000, level='ags')
+    assert list(gen['wind']) == list(
+        flows[('gen_el_15001000_b1_wind', 'b_el_1')])
+    assert list(gen['import']) == list(
+        flows[('shortage_el_hv_b10001', 'b_el_10001')])
+    assert list(flows_txaxt['GuD Dessau'].columns) == ['in_gas', 'out_el',
+                                                       'out_th']
+
+
+def test_node_label_catalog(flows):
+    columns = flows.columns
+    catalog = node_label_catalog(columns)
+    assert node_label_catalog(columns) is catalog
+    assert list(catalog.match('gen_el_', level=0)) == list(
+        columns.get_level_values(0).str.match('gen_el_'))
+    # equal but different index object
+    assert node_label_catalog(columns.copy()) is not catalog
+
+    # catalogs are not kept alive by the cache
+    clear_node_label_catalogs()
+    assert tools._node_label_catalogs == {}
+    node_label_catalog(columns.copy())
+    gc.collect()
+    assert tools._node_label_catalogs == {}
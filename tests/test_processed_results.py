@@ -0,0 +1,103 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windnode_abw.tools.data_io import write_results, results_fingerprint, \
+    export_processed_results, load_processed_results, LazyResults
+
+RUN_ID = '200805_024335'
+FLOWS = pd.DataFrame(
+    np.arange(6.).reshape(3, 2),
+    index=pd.date_range('2015-01-01', periods=3, freq='60min'),
+    columns=pd.MultiIndex.from_tuples([('gen_el_15001000_b0_wind',
+                                        'b_el_15001000_b0'),
+                                       ('b_el_15001000_b0',
+                                        'dem_el_15001000_b0_hh')]))
+
+
+def write_raw_results(data_root, scn_id, flows=FLOWS):
+    path = os.path.join(data_root, 'results', RUN_ID, scn_id)
+    os.makedirs(path, exist_ok=True)
+    write_results(flows, path, 'flows')
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({'config': {'scenario': scn_id,
+                              'results_format': 'parquet'}}, file)
+
+
+@pytest.fixture
+def results(data_root):
+    """Processed results of scenario 'sq' (exported) and raw results"""
+    write_raw_results(data_root, 'sq')
+    gen = pd.DataFrame({'wind': [1., 2.], 'pv_ground': [3., 4.]},
+                       index=pd.Index([15001000, 15002000], name='ags'))
+    results = {
+        'results_raw': {'flows': FLOWS},
+        'highlevel_results': pd.Series({'Gesamtkosten': 1.5,
+                                        'Autarkie': 0.3},
+                                       name='highlevel'),
+        'results_axlxt': {
+            'Stromerzeugung nach Gemeinde': gen,
+            'Stromerzeugung': gen.sum().rename('sum')},
+        # mixed types -> pickle
+        'parameters_wide': pd.Series([1., 'Variante 1', None],
+                                     index=['a', 'b', 'c']).to_frame()
+    }
+    export_processed_results(RUN_ID, 'sq', results,
+                             region=SimpleNamespace(cfg={'scn_data': {}}),
+                             fingerprint=results_fingerprint(RUN_ID, 'sq'))
+    return results
+
+
+def test_round_trip(results):
+    region_ref, loaded = load_processed_results(RUN_ID, 'sq')
+
+    assert region_ref == {'cfg': {'scn_data': {}}}
+    assert isinstance(loaded['results_raw'], LazyResults)
+    pd.testing.assert_frame_equal(loaded['results_raw']['flows'],
+                                  FLOWS.set_index(FLOWS.index.astype(str)))
+    pd.testing.assert_series_equal(loaded['highlevel_results'],
+                                   results['highlevel_results'])
+    assert list(loaded['results_axlxt']) == list(results['results_axlxt'])
+    for name, data in results['results_axlxt'].items():
+        if isinstance(data, pd.Series):
+            pd.testing.assert_series_equal(loaded['results_axlxt'][name],
+                                           data)
+        else:
+            pd.testing.assert_frame_equal(loaded['results_axlxt'][name],
+                                          data)
+    pd.testing.assert_frame_equal(loaded['parameters_wide'],
+                                  results['parameters_wide'])
+
+
+def test_select(results):
+    _, loaded = load_processed_results(RUN_ID, 'sq',
+                                       groups=['results_axlxt'],
+                                       tables=['Stromerzeugung'])
+    assert list(loaded) == ['results_axlxt']
+    assert list(loaded['results_axlxt']) == ['Stromerzeugung']
+
+
+def test_fingerprint(data_root, results):
+    fingerprint = results_fingerprint(RUN_ID, 'sq')
+    assert fingerprint is not None
+    assert results_fingerprint(RUN_ID, 'sq', version='1') != fingerprint
+    assert results_fingerprint(RUN_ID, 'NEP2035') is None
+    assert load_processed_results(
+        RUN_ID, 'sq', fingerprint=fingerprint)[1] is not None
+
+    # raw results changed by new run of scenario
+    write_raw_results(data_root, 'sq', flows=FLOWS.iloc[:2])
+    assert results_fingerprint(RUN_ID, 'sq') != fingerprint
+    assert load_processed_results(
+        RUN_ID, 'sq',
+        fingerprint=results_fingerprint(RUN_ID, 'sq')) == (None, None)
+    # not checked
+    assert load_processed_results(RUN_ID, 'sq')[1] is not None
+
+
+def test_not_found(data_root):
+    assert load_processed_results(RUN_ID, 'sq') == (None, None)
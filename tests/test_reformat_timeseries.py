@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windnode_abw.tools.data_io import reformat_timeseries
+
+
+def reformat_timeseries_pivot(ts):
+    """Former implementation of reformat_timeseries() using pivot
+    (reference)"""
+    return ts.pivot(index=ts.index, columns='ags') \
+        .apply(lambda _: pd.Series(_.dropna().values)) \
+        .fillna(0)
+
+
+@pytest.fixture
+def ts():
+    """Timeseries of 3 muns as returned by query, ordered by timestamp with
+    arbitrary order of muns per timestep"""
+    rng = np.random.default_rng(0)
+    muns = [15001000, 15003000, 15002000]
+    timesteps = 5
+    ags = np.concatenate([rng.permutation(muns) for _ in range(timesteps)])
+    return pd.DataFrame({'ags': ags,
+                         'pv_ground': rng.random(len(ags)),
+                         'wind_sq': rng.random(len(ags)),
+                         'hydro': rng.random(len(ags))})
+
+
+def test_equals_pivot(ts):
+    reformatted = reformat_timeseries(ts)
+    assert reformatted.shape == (5, 9)
+    pd.testing.assert_frame_equal(reformatted, reformat_timeseries_pivot(ts))
+
+
+def test_sort_by_timestamp(ts):
+    ts['timestamp'] = pd.date_range(
+        '2015-01-01', periods=5, freq='60min').repeat(3)
+    reformatted = reformat_timeseries(ts.sample(frac=1, random_state=0))
+    pd.testing.assert_frame_equal(
+        reformatted, reformat_timeseries_pivot(ts.drop(columns='timestamp')))
+
+
+def test_missing_values(ts):
+    ts.loc[3, 'wind_sq'] = np.nan
+    reformatted = reformat_timeseries(ts)
+    assert reformatted.loc[1, ('wind_sq', ts.loc[3, 'ags'])] == 0
+    assert not reformatted.isna().any().any()
+
+
+def test_unequal_number_of_timesteps(ts):
+    with pytest.raises(ValueError, match='incomplete'):
+        reformat_timeseries(ts.drop(index=7))
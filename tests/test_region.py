@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+
+from windnode_abw.model import Region, LazyRegion
+
+
+class RegionStub:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.muns = ['mun']
+
+
+@pytest.fixture
+def imports(monkeypatch):
+    """Record imports of regions"""
+    imports = []
+
+    def import_data(cfg=None, data=None):
+        imports.append(cfg)
+        return RegionStub(cfg)
+
+    monkeypatch.setattr(Region, 'import_data', import_data)
+    return imports
+
+
+def test_lazy_region(imports):
+    cfg = {'scenario': 'ISE2050'}
+    region = LazyRegion(cfg)
+
+    # config and pickling do not require import
+    assert region.cfg is cfg
+    region = pickle.loads(pickle.dumps(region))
+    assert region.cfg == cfg
+    assert not region.imported
+    assert imports == []
+
+    # data is imported on first access only
+    assert region.muns == ['mun']
+    assert region.muns == ['mun']
+    assert region.imported
+    assert imports == [cfg]
+
+    region.cfg = {'scenario': 'NEP2035'}
+    assert region.region.cfg == {'scenario': 'NEP2035'}
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from windnode_abw.tools.data_io import export_result_cube, load_result_cube
+
+RUN_ID = '200805_024335'
+SCENARIOS = ['sq', 'NEP2035', 'ISE2050']
+
+
+def processed_results(n):
+    """Processed results of n-th scenario"""
+    gen = pd.DataFrame({'wind': [1. + n, 2.], 'pv_ground': [3., 4. * n]},
+                       index=pd.Index([15001000, 15002000], name='ags'))
+    results = {
+        'highlevel_results': pd.Series({'Gesamtkosten': 1.5 * n,
+                                        'Autarkie': 0.3}),
+        'results_t': pd.DataFrame(
+            {'LCOE': [10. + n, 11.]},
+            index=pd.Index(['wind', 'pv_ground'], name='technology')),
+        'results_axlxt': {
+            'Stromerzeugung nach Gemeinde': gen,
+            # mixed types -> pickle
+            'Parameter': pd.Series([n, 'Variante'], index=['a', 'b'])
+        }
+    }
+    # table not available in all scenarios
+    if n > 0:
+        results['results_axlxt']['Speicher'] = gen * 2
+    return results
+
+
+@pytest.fixture
+def cube(data_root):
+    results_scns = {scn: processed_results(n)
+                    for n, scn in enumerate(SCENARIOS)}
+    export_result_cube(RUN_ID, results_scns,
+                       fingerprints={scn: str(n)
+                                     for n, scn in enumerate(SCENARIOS)})
+    return results_scns
+
+
+def test_result_cube(cube):
+    result_cube = load_result_cube(RUN_ID)
+
+    assert result_cube.scenarios == SCENARIOS
+    assert result_cube.tables('results_axlxt') == [
+        'Stromerzeugung nach Gemeinde', 'Parameter', 'Speicher']
+    pd.testing.assert_frame_equal(
+        result_cube['results_axlxt', 'Stromerzeugung nach Gemeinde'],
+        pd.concat({scn: results['results_axlxt']
+                   ['Stromerzeugung nach Gemeinde']
+                   for scn, results in cube.items()}, names=['scenario']))
+    assert result_cube['results_axlxt', 'Speicher'].index.get_level_values(
+        'scenario').unique().tolist() == SCENARIOS[1:]
+    pd.testing.assert_series_equal(
+        result_cube['highlevel_results'],
+        pd.concat({scn: results['highlevel_results']
+                   for scn, results in cube.items()}, names=['scenario']))
+
+
+@pytest.mark.parametrize('loaded', [False, True])
+@pytest.mark.parametrize('key', [('highlevel_results', None),
+                                 ('results_t', None),
+                                 ('results_axlxt',
+                                  'Stromerzeugung nach Gemeinde'),
+                                 ('results_axlxt', 'Parameter'),
+                                 ('results_axlxt', 'Speicher')])
+def test_select(cube, key, loaded):
+    result_cube = load_result_cube(RUN_ID)
+    expected = result_cube[key]
+    if not loaded:
+        result_cube = load_result_cube(RUN_ID)
+
+    scenarios = ['ISE2050', 'sq']
+    selected = result_cube.select(*key, scenarios=scenarios)
+    # order of scenarios in cube is preserved
+    expected = expected[
+        expected.index.get_level_values('scenario').isin(scenarios)]
+    assert selected.index.get_level_values('scenario').unique().tolist() == \
+        [scn for scn in SCENARIOS if scn in scenarios
+         and scn in expected.index.get_level_values('scenario')]
+    if isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(selected, expected)
+    else:
+        pd.testing.assert_frame_equal(selected, expected)
+
+    assert result_cube.select(*key, scenarios=['NEP2050']).empty
+
+
+def test_select_unknown_table(cube):
+    result_cube = load_result_cube(RUN_ID)
+    with pytest.raises(KeyError):
+        result_cube.select('results_axlxt', 'Stromnachfrage')
+    with pytest.raises(KeyError):
+        result_cube.select('results_axlxt')
+
+
+def test_fingerprints(cube):
+    fingerprints = {scn: str(n) for n, scn in enumerate(SCENARIOS)}
+    assert load_result_cube(RUN_ID, fingerprints=fingerprints) is not None
+    fingerprints['sq'] = 'new'
+    assert load_result_cube(RUN_ID, fingerprints=fingerprints) is None
+
+
+def test_not_found(data_root):
+    assert load_result_cube(RUN_ID) is None
@@ -0,0 +1,136 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windnode_abw.tools.data_io import write_results, read_results_parquet, \
+    LazyResults
+
+FLOWS = pd.DataFrame(
+    np.arange(12.).reshape(4, 3),
+    index=pd.date_range('2015-01-01', periods=4, freq='60min'),
+    columns=pd.MultiIndex.from_tuples([('gen_el_15001000_b0_wind',
+                                        'b_el_15001000_b0'),
+                                       ('b_el_15001000_b0',
+                                        'dem_el_15001000_b0_hh'),
+                                       ('b_el_15001000_b0',
+                                        'flex_bat_large_15001000_b0')]))
+PARAMS_FLOWS = pd.DataFrame(
+    {('gen_el_15001000_b0_wind', 'b_el_15001000_b0'):
+        [10., '[0.1, 0.2]', True, None],
+     ('b_el_15001000_b0', 'dem_el_15001000_b0_hh'):
+        [2.5, 3., 4., 5.],
+     ('b_el_15001000_b0', 'flex_bat_large_15001000_b0'):
+        [None] * 4},
+    index=['nominal_value', 'actual_value', 'fixed', 'variable_costs'])
+PARAMS_STAT = pd.Series(
+    [1.5, 'large', None, 3],
+    index=pd.MultiIndex.from_tuples([
+        ('flex_bat_large_15001000_b0', 'nominal_storage_capacity'),
+        ('flex_bat_large_15001000_b0', 'storage_type'),
+        ('flex_bat_large_15001000_b0', 'initial_storage_level'),
+        ('flex_bat_large_15001000_b0', 'inflow_conversion_factor')]))
+INVEST = pd.Series(
+    [1.5, None, 3],
+    index=pd.MultiIndex.from_tuples([('flex_bat_large_15001000_b0', 'invest'),
+                                     ('flex_bat_small_15001000', 'invest'),
+                                     ('gen_el_15001000_b0_pv_ground',
+                                      'invest')]),
+    name='invest')
+
+
+def read_results_csv(file, series=False):
+    """Read results like load_results() (CSV format)"""
+    if series:
+        return pd.read_csv(file, index_col=[0, 1], header=0, squeeze=True)
+    return pd.read_csv(file, index_col=0, header=[0, 1])
+
+
+@pytest.mark.parametrize('data', [FLOWS, PARAMS_FLOWS, PARAMS_STAT, INVEST],
+                         ids=['flows', 'params_flows', 'params_stat',
+                              'invest'])
+def test_round_trip_equals_csv(tmp_path, data):
+    write_results(data, str(tmp_path), 'results', results_format='csv')
+    write_results(data, str(tmp_path), 'results')
+
+    expected = read_results_csv(os.path.join(tmp_path, 'results.csv'),
+                                series=isinstance(data, pd.Series))
+    results = read_results_parquet(os.path.join(tmp_path, 'results.parquet'))
+
+    if isinstance(data, pd.Series):
+        # name of unnamed Series is set to '0' by CSV header
+        pd.testing.assert_series_equal(results, expected,
+                                       check_names=data.name is not None)
+    else:
+        pd.testing.assert_frame_equal(results, expected)
+    # missing values are NaN (not None), values of mixed-type columns str
+    assert [type(_) for _ in results.to_numpy().ravel()] == \
+        [type(_) for _ in expected.to_numpy().ravel()]
+
+
+def test_float32(tmp_path):
+    write_results(FLOWS, str(tmp_path), 'flows', float32=True)
+    flows = read_results_parquet(os.path.join(tmp_path, 'flows.parquet'))
+    assert (flows.dtypes == np.float32).all()
+    pd.testing.assert_frame_equal(flows,
+                                  FLOWS.set_index(FLOWS.index.astype(str)),
+                                  check_dtype=False)
+
+
+def test_read_columns(tmp_path):
+    write_results(FLOWS, str(tmp_path), 'flows')
+    columns = [FLOWS.columns[2], FLOWS.columns[0]]
+    flows = read_results_parquet(os.path.join(tmp_path, 'flows.parquet'),
+                                 columns=columns)
+    # order of columns in file is preserved
+    assert list(flows.columns) == [FLOWS.columns[0], FLOWS.columns[2]]
+    pd.testing.assert_frame_equal(
+        flows,
+        FLOWS.set_index(FLOWS.index.astype(str))[flows.columns])
+
+
+@pytest.fixture(params=['parquet', 'csv'])
+def lazy_results(request, data_root):
+    """Lazy handle of results in parquet and legacy CSV format"""
+    results_format = request.param
+    path = os.path.join(data_root, 'results', '200805_024335', 'sq')
+    os.makedirs(path)
+    for name, data in [('flows', FLOWS), ('params_flows', PARAMS_FLOWS),
+                       ('params_stat', PARAMS_STAT), ('invest', INVEST)]:
+        write_results(data, path, name, results_format=results_format)
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({'config': {'results_format': results_format}}, file)
+    return LazyResults('200805_024335', 'sq')
+
+
+def test_lazy_results(lazy_results):
+    # files not found are omitted
+    assert sorted(lazy_results) == ['flows', 'invest', 'meta', 'params_flows',
+                                    'params_stat']
+    assert list(lazy_results.columns('flows')) == list(FLOWS.columns)
+    assert list(lazy_results.columns('invest')) == list(INVEST.index)
+
+
+@pytest.mark.parametrize('loaded', [False, True])
+def test_lazy_results_select(lazy_results, loaded):
+    flows = lazy_results['flows'].copy()
+    invest = lazy_results['invest'].copy()
+    if not loaded:
+        lazy_results = LazyResults('200805_024335', 'sq')
+
+    pd.testing.assert_frame_equal(
+        lazy_results.select('flows', pattern_from='b_el_15001000'),
+        flows.iloc[:, [1, 2]])
+    pd.testing.assert_frame_equal(
+        lazy_results.select('flows', pattern_from='b_el',
+                            pattern_to='flex_bat'),
+        flows.iloc[:, [2]])
+    # patterns are matched from the beginning of node names
+    assert lazy_results.select('flows', pattern_to='15001000').empty
+    pd.testing.assert_frame_equal(lazy_results.select('flows'), flows)
+
+    pd.testing.assert_series_equal(
+        lazy_results.select('invest', pattern_from='flex_bat'),
+        invest.iloc[:2])
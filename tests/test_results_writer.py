@@ -0,0 +1,115 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from windnode_abw.analysis.tools import model_results_to_dataframes, \
+    iter_model_flows
+from windnode_abw.tools.data_io import ResultsWriter, write_results, \
+    read_results_parquet
+
+
+@pytest.fixture(scope='module')
+def om():
+    """Solved model: 2 buses with generation, demand, storage and link"""
+    solph = pytest.importorskip('oemof.solph')
+    if shutil.which('cbc') is None:
+        pytest.skip('Solver cbc not available')
+
+    esys = solph.EnergySystem(
+        timeindex=pd.date_range('2015-01-01', periods=12, freq='60min'))
+    for n in range(2):
+        bus = solph.Bus(label=f'b_el_{n}')
+        esys.add(
+            bus,
+            solph.Source(label=f'gen_el_{n}_wind',
+                         outputs={bus: solph.Flow(
+                             nominal_value=10,
+                             actual_value=[(t * (n + 1)) % 7 / 7
+                                           for t in range(12)],
+                             fixed=True)}),
+            solph.Source(label=f'shortage_el_{n}',
+                         outputs={bus: solph.Flow(variable_costs=100)}),
+            solph.Sink(label=f'excess_el_{n}',
+                       inputs={bus: solph.Flow(variable_costs=1)}),
+            solph.Sink(label=f'dem_el_{n}',
+                       inputs={bus: solph.Flow(nominal_value=4,
+                                               actual_value=[1] * 12,
+                                               fixed=True)}),
+            solph.components.GenericStorage(
+                label=f'flex_bat_{n}',
+                inputs={bus: solph.Flow()},
+                outputs={bus: solph.Flow()},
+                nominal_storage_capacity=5)
+        )
+    buses = [node for node in esys.nodes if isinstance(node, solph.Bus)]
+    esys.add(solph.custom.Link(
+        label='line_b0_b1',
+        inputs={buses[0]: solph.Flow(nominal_value=2),
+                buses[1]: solph.Flow(nominal_value=2)},
+        outputs={buses[0]: solph.Flow(), buses[1]: solph.Flow()},
+        conversion_factors={(buses[0], buses[1]): 0.95,
+                            (buses[1], buses[0]): 0.95}))
+
+    om = solph.Model(esys)
+    om.solve(solver='cbc')
+    return om
+
+
+@pytest.mark.parametrize('float32', [False, True])
+def test_streamed_equals_written_at_once(om, tmp_path, float32):
+    write_results(model_results_to_dataframes(om)['flows'],
+                  str(tmp_path), 'flows_ref', float32=float32)
+
+    # multiple column and row groups
+    writer = ResultsWriter(str(tmp_path), 'flows', float32=float32,
+                           row_group_size=5)
+    for flows in iter_model_flows(om, group_size=4):
+        writer.write(flows)
+    writer.close()
+
+    streamed = read_results_parquet(os.path.join(tmp_path, 'flows.parquet'))
+    expected = read_results_parquet(os.path.join(tmp_path,
+                                                 'flows_ref.parquet'))
+    assert len(expected.columns) > 4
+    assert pq.ParquetFile(
+        os.path.join(tmp_path, 'flows.parquet')).num_row_groups == 3
+    # columns of streamed results are sorted by node pair
+    pd.testing.assert_frame_equal(streamed, expected.sort_index(axis=1))
+    # temporary files are removed
+    assert sorted(os.listdir(tmp_path)) == ['flows.parquet',
+                                            'flows_ref.parquet']
+
+
+def test_no_column_groups(tmp_path):
+    ResultsWriter(str(tmp_path), 'flows').close()
+    write_results(pd.DataFrame(), str(tmp_path), 'flows_ref')
+
+    assert pq.read_schema(os.path.join(tmp_path, 'flows.parquet')).equals(
+        pq.read_schema(os.path.join(tmp_path, 'flows_ref.parquet')),
+        check_metadata=True)
+    flows = read_results_parquet(os.path.join(tmp_path, 'flows.parquet'))
+    assert flows.empty
+
+
+def test_empty_index(tmp_path):
+    flows = pd.DataFrame({('gen_el_0_wind', 'b_el_0'): pd.Series(
+        [], dtype=float, index=pd.DatetimeIndex([]))})
+    writer = ResultsWriter(str(tmp_path), 'flows')
+    writer.write(flows)
+    writer.close()
+
+    flows = read_results_parquet(os.path.join(tmp_path, 'flows.parquet'))
+    assert flows.empty
+    assert list(flows.columns) == [('gen_el_0_wind', 'b_el_0')]
+
+
+def test_index_mismatch(tmp_path):
+    writer = ResultsWriter(str(tmp_path), 'flows')
+    writer.write(pd.DataFrame({('a', 'b'): [1., 2.]}))
+    writer.write(pd.DataFrame({('c', 'd'): [1.]}))
+    with pytest.raises(ValueError):
+        writer.close()
+    assert os.listdir(tmp_path) == []
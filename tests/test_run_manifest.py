@@ -0,0 +1,39 @@
+import json
+import os
+
+from windnode_abw.tools.data_io import update_run_manifest, \
+    load_run_manifest, load_run_config
+
+RUN_ID = '200805_024335'
+
+
+def test_run_manifest(data_root):
+    cfg = {'date_from': '2015-01-01 00:00:00', 'results_format': 'parquet'}
+    update_run_manifest(RUN_ID, ['sq', 'ISE2050'], 'pending', cfg=cfg)
+    update_run_manifest(RUN_ID, ['sq'], 'done',
+                        cfg={'results_format': 'csv'})
+
+    manifest = load_run_manifest(RUN_ID)
+    assert {scn: data['status']
+            for scn, data in manifest['scenarios'].items()} == {
+        'sq': 'done', 'ISE2050': 'pending'}
+    # config is stored at creation of manifest only
+    assert load_run_config(RUN_ID) == cfg
+
+
+def test_run_config_from_meta(data_root):
+    # run created before manifest was introduced
+    path = os.path.join(data_root, 'results', RUN_ID, 'sq')
+    os.makedirs(path)
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({'config': {'results_format': 'csv',
+                              'scenario': 'sq',
+                              'scn_data': {'general': {'id': 'sq'}}}}, file)
+
+    assert load_run_manifest(RUN_ID) is None
+    assert load_run_config(RUN_ID) == {'results_format': 'csv'}
+
+
+def test_run_config_not_found(data_root):
+    os.makedirs(os.path.join(data_root, 'results', RUN_ID, 'sq'))
+    assert load_run_config(RUN_ID) is None
@@ -0,0 +1,125 @@
+import json
+import os
+import time
+
+import pytest
+
+from windnode_abw.tools import scheduler
+from windnode_abw.tools.scheduler import run_scheduled, \
+    estimate_scenario_resources
+
+CFG = {'date_from': '2015-01-01 00:00:00',
+       'date_to': '2015-01-01 23:00:00',
+       'freq': '60min'}
+
+
+def run(cfg):
+    """Trivial scenario run: wait, return time of start and end"""
+    start = time.time()
+    time.sleep(cfg['duration'])
+    return start, time.time()
+
+
+def schedule(scenarios, proc_count=3, memory_budget=100):
+    """Run scenarios given as (name, memory, time), return their time
+    intervals by name and the names in order of completion"""
+    cfgs = [{'scenario': name, 'duration': 0.2 * duration}
+            for name, _, duration in scenarios]
+    estimates = [{'memory': memory, 'time': duration}
+                 for _, memory, duration in scenarios]
+    finished = []
+    results = run_scheduled(run, cfgs, estimates,
+                            proc_count=proc_count,
+                            memory_budget=memory_budget,
+                            callback=lambda cfg, _: finished.append(
+                                cfg['scenario']))
+    return dict(zip([name for name, _, _ in scenarios], results)), finished
+
+
+def overlap(interval1, interval2):
+    return interval1[0] < interval2[1] and interval2[0] < interval1[1]
+
+
+def test_lpt_order():
+    _, finished = schedule([('short', 10, 1), ('long', 10, 3),
+                            ('medium', 10, 2)], proc_count=1)
+    assert finished == ['long', 'medium', 'short']
+
+
+def test_memory_budget():
+    intervals, _ = schedule([('a', 40, 3), ('b', 40, 3), ('c', 40, 1),
+                             ('d', 20, 2)])
+    # a, b and d fit the budget
+    assert overlap(intervals['a'], intervals['b'])
+    assert overlap(intervals['a'], intervals['d'])
+    # c is started as memory of a or b is released
+    assert intervals['c'][0] >= min(intervals['a'][1], intervals['b'][1])
+
+
+def test_hold_capacity():
+    intervals, _ = schedule([('a', 60, 3), ('b', 60, 2), ('c', 30, 1)])
+    # c would fit next to a but must not be started before b
+    assert not overlap(intervals['a'], intervals['b'])
+    assert intervals['c'][0] >= intervals['a'][1]
+
+
+def test_run_alone():
+    intervals, _ = schedule([('small1', 10, 3), ('large', 200, 2),
+                             ('small2', 10, 1)])
+    for name in ['small1', 'small2']:
+        assert not overlap(intervals['large'], intervals[name])
+    assert intervals['large'][0] >= intervals['small1'][1]
+
+
+@pytest.fixture
+def scn_data(monkeypatch):
+    scn_data = {'general': {'id': 'sq'},
+                'flexopt': {'flex_bat_large': {'enabled': {'enabled': 0}},
+                            'dsm': {'params': {'hh_share': 0}}},
+                'storage': {}}
+    monkeypatch.setattr(scheduler, 'load_scenario_cfg',
+                        lambda scenario: scn_data)
+    return scn_data
+
+
+def test_estimate_model_size(data_root, scn_data):
+    cfg = dict(CFG, scenario='sq')
+    estimate = estimate_scenario_resources(cfg, n_muns=20)
+    assert estimate['source'] == 'model_size'
+    assert estimate['memory'] == pytest.approx(
+        scheduler.MEMORY_BASE + scheduler.MEMORY_PER_UNIT * 20 * 24)
+    assert estimate['time'] == pytest.approx(
+        scheduler.TIME_PER_UNIT * 20 * 24)
+
+    # flexibility options increase complexity
+    scn_data['flexopt']['flex_bat_large']['enabled']['enabled'] = 1
+    scn_data['flexopt']['dsm']['params']['hh_share'] = 0.5
+    assert estimate_scenario_resources(cfg, n_muns=20)['time'] == \
+        pytest.approx(estimate['time'] * 2.1)
+
+    # typical periods
+    cfg['date_to'] = '2015-12-31 23:00:00'
+    cfg['ts_aggregation'] = {'periods': 4, 'period_length': 24}
+    assert estimate_scenario_resources(cfg, n_muns=20)['time'] == \
+        pytest.approx(estimate['time'] * 2.1 * 5)
+
+
+def test_estimate_report(data_root, scn_data):
+    path = os.path.join(data_root, 'results', '200805_024335', 'sq')
+    os.makedirs(path)
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({'config': CFG,
+                   'memory_peak_incl_solver': '1234 MB'}, file)
+    with open(os.path.join(path, 'profile.json'), 'w') as file:
+        json.dump({'stages': [{'stage': 'build', 'wall_time': 10.},
+                              {'stage': 'build/region', 'wall_time': 5.},
+                              {'stage': 'solve', 'wall_time': 20.}]}, file)
+
+    assert estimate_scenario_resources(dict(CFG, scenario='sq'),
+                                       n_muns=20) == \
+        {'memory': 1234, 'time': 30., 'source': 'report'}
+
+    # other timerange
+    cfg = dict(CFG, scenario='sq', freq='15min')
+    assert estimate_scenario_resources(cfg, n_muns=20)['source'] == \
+        'model_size'
@@ -1,4 +1,7 @@
 import os
+import hashlib
+import multiprocessing as mp
+from glob import glob
 import pandas as pd
 
 import logging
@@ -9,21 +12,52 @@ from windnode_abw.tools import config
 config.load_config('config_data.cfg')
 config.load_config('config_misc.cfg')
 
+from windnode_abw.tools.logger import profile_stage
 from windnode_abw.tools.data_io import load_results, export_processed_results,\
-    load_processed_results
-from windnode_abw.model import Region
+    load_processed_results, load_results_meta, results_fingerprint,\
+    export_result_cube, load_result_cube, RESULT_CUBE_GROUPS
+from windnode_abw.model import Region, LazyRegion
 
 from windnode_abw.analysis.tools import aggregate_flows, aggregate_parameters,\
     flows_timexagsxtech, results_agsxlevelxtech, create_highlevel_results,\
-    results_tech, additional_results_txaxt
+    results_tech, additional_results_txaxt, clear_node_label_catalogs
+
+
+def _analysis_version():
+    """Get version stamp of analysis: hash of the analysis source files"""
+    sha = hashlib.sha1()
+    for file in sorted(glob(os.path.join(os.path.dirname(__file__), '*.py'))):
+        with open(file, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+# processed results are invalidated if analysis changes
+ANALYSIS_VERSION = _analysis_version()
 
 
 def analysis(run_timestamp, scenarios='ALL',
-             force_new_results=False, dump_results=True):
+             force_new_results=False, dump_results=True,
+             regions=None, results_raw=None, processes=1, raise_errors=True):
     """Start analysis for single or multiple scenarios
 
-    If pickle of processed results is available, it is loaded except
-    `force_new_results` is True.
+    If processed results are available and up to date (raw results, config
+    and analysis unchanged, see
+    :func:`~.tools.data_io.results_fingerprint`), they are loaded except
+    `force_new_results` is True. The region is imported lazily using the
+    config stored with the processed results then (on first access of its
+    data, see :class:`~.model.LazyRegion`).
+
+    Raw results and regions already held in memory (e.g. when called from
+    :func:`~.run_scenario.run_scenario`) may be passed using `results_raw`
+    and `regions`, they are neither loaded from files nor imported again.
+    Processed results are not loaded for those scenarios.
+
+    Multiple scenarios can be analyzed in parallel using `processes`. The
+    consistency of the simulation timeranges is checked up front. If the
+    analysis of a scenario fails, the error is raised unless `raise_errors`
+    is False: the error is logged and the scenario is skipped then (e.g. to
+    analyze all scenarios of a run).
 
     Parameters
     ----------
@@ -42,113 +76,413 @@ def analysis(run_timestamp, scenarios='ALL',
     force_new_results : :obj:`bool`
         Process results even if pickled results are available.
         Default: False
+    regions : :obj:`dict` of :class:`~.model.Region`
+        Regions per scenario id, regions are imported from DB for all
+        other scenarios. Default: None
+    results_raw : :obj:`dict` of :obj:`dict`
+        Raw results per scenario id as returned by
+        :func:`~.analysis.tools.results_to_dataframes`, results are loaded
+        from files for all other scenarios. Meta infos ('meta') are only
+        needed if no region is passed for the scenario. Default: None
+    processes : :obj:`int`
+        Number of processes used to analyze scenarios in parallel.
+        Scenarios held in memory (`results_raw`) are analyzed in the main
+        process. Default: 1
+    raise_errors : :obj:`bool`
+        Raise errors occurring in the analysis of a scenario. If False,
+        failed scenarios are skipped. Default: True
 
     Returns
     -------
     :obj:`dict` of :obj:`dict` of :pandas:`pandas.DataFrame`
-        Dict with scenario names. Each entry holds a dict with a DataFrame
-        with converted columns.
+        Dict with scenario names (in order of `scenarios`). Each entry holds
+        a dict with a DataFrame with converted columns. Skipped scenarios
+        are not included.
     """
     if isinstance(scenarios, str):
         scenarios = [scenarios]
 
     # read available scenarios if 'ALL' requested
     if scenarios == ['ALL']:
-        scenarios = [
-            file.split('.')[0]
-            for file in os.listdir(os.path.join(
-                config.get_data_root_dir(),
-                config.get('user_dirs',
-                           'results_dir'),
-                run_timestamp
-            )) if not file.startswith('.')
-        ]
+        scenarios = _available_scenarios(run_timestamp)
+
+    if regions is None:
+        regions = {}
+    if results_raw is None:
+        results_raw = {}
+
+    # extract timerange and check consistency across multiple scenarios
+    timerange = None
+    for scn_id in scenarios:
+        if scn_id in regions:
+            cfg = regions[scn_id].cfg
+        elif 'meta' in results_raw.get(scn_id, {}):
+            cfg = results_raw[scn_id]['meta']['config']
+        else:
+            meta = load_results_meta(timestamp=run_timestamp,
+                                     scenario=scn_id)
+            if meta is None:
+                continue
+            cfg = meta['config']
+
+        if timerange is None:
+            timerange = [cfg.get('date_from'), cfg.get('date_to')]
+        else:
+            if timerange != [cfg.get('date_from'), cfg.get('date_to')]:
+                msg = 'Simulation timeranges of different scenarios do ' \
+                      'not match!'
+                logger.error(msg)
+                raise ValueError(msg)
 
     logger.info(f'Analyzing {len(scenarios)} scenarios...')
 
+    analyzed = {}
+    scenarios_pool = [scn_id for scn_id in scenarios
+                      if scn_id not in results_raw] if processes > 1 else []
+    if scenarios_pool:
+        with mp.Pool(processes=min(processes, len(scenarios_pool))) as pool:
+            pool_results = {
+                scn_id: pool.apply_async(
+                    _analyze_scenario,
+                    args=(run_timestamp, scn_id),
+                    kwds={'force_new_results': force_new_results,
+                          'dump_results': dump_results,
+                          'region': regions.get(scn_id),
+                          'raise_errors': raise_errors})
+                for scn_id in scenarios_pool
+            }
+            # analyze scenarios held in memory meanwhile
+            for scn_id in scenarios:
+                if scn_id not in pool_results:
+                    analyzed[scn_id] = _analyze_scenario(
+                        run_timestamp, scn_id,
+                        force_new_results=force_new_results,
+                        dump_results=dump_results,
+                        region=regions.get(scn_id),
+                        results_raw=results_raw.get(scn_id),
+                        raise_errors=raise_errors)
+            for scn_id, pool_result in pool_results.items():
+                analyzed[scn_id] = pool_result.get()
+    else:
+        for scn_id in scenarios:
+            analyzed[scn_id] = _analyze_scenario(
+                run_timestamp, scn_id,
+                force_new_results=force_new_results,
+                dump_results=dump_results,
+                region=regions.get(scn_id),
+                results_raw=results_raw.get(scn_id),
+                raise_errors=raise_errors)
+
+    # keep order of scenarios
     results_scns = {}
     regions_scns = {}
-    
-    timerange = None
-
     for scn_id in scenarios:
-        # check for processed results
-        loaded_results = None
-        if not force_new_results:
-            loaded_region, loaded_results = load_processed_results(
-                run_id=run_timestamp,
-                scn_id=scn_id
-            )
-
-        if loaded_results is None:
-            logger.info(f'-> Analyzing scenario: {scn_id}...')
-            # load raw results
-            results_raw = load_results(timestamp=run_timestamp,
-                                       scenario=scn_id)
-
-            if results_raw is None:
-                logger.warning(f'Scenario {scn_id} not found or file(s) malformed, skipping...')
-            else:
-                results_scns[scn_id] = {}
-                # import region using cfg from results meta
-                cfg = results_raw['meta']['config']
-
-                # extract timerange and check consistency across multiple scenarios
-                if timerange is None:
-                    timerange = [cfg.get('date_from'), cfg.get('date_to')]
-                else:
-                    if timerange != [cfg.get('date_from'), cfg.get('date_to')]:
-                        msg = 'Simulation timeranges of different scenarios do ' \
-                              'not match!'
-                        logger.error(msg)
-                        raise ValueError(msg)
-
-                regions_scns[scn_id] = Region.import_data(cfg)
-                results_scns[scn_id]['results_raw'] = results_raw
-
-                logger.info(f'Analyzing...')
-
-                # Flows extracted to dimension time, ags code, technology (and sometimes more dimensions)
-                flows_txaxt = flows_timexagsxtech(results_raw["flows"], regions_scns[scn_id])
-                results_scns[scn_id]['flows_txaxt'] = flows_txaxt
-
-                # Retrieve parameters from database and config file
-                parameters = aggregate_parameters(regions_scns[scn_id], results_raw, flows_txaxt)
-                results_scns[scn_id]['parameters'] = parameters
-
-                # Add more parameters derived from flows + parameters
-                results_scns[scn_id]['flows_txaxt'] = additional_results_txaxt(results_scns[scn_id]['flows_txaxt'],
-                    results_scns[scn_id]['parameters'])
-
-                # Aggregate flow results along different dimensions (outdated, see #29)
-                # only used to access DSM demand increase/decrease
-                aggregated_results = aggregate_flows(results_raw)
-                results_scns[scn_id]['flows_txaxt']["DSM activation"] = pd.concat(
-                    [aggregated_results['Lasterhöhung DSM Haushalte nach Gemeinde'].stack().rename("Demand increase"),
-                     aggregated_results['Lastreduktion DSM Haushalte nach Gemeinde'].stack().rename(
-                         "Demand decrease")], axis=1)
-                results_scns[scn_id]['flows_txaxt']["DSM activation"].index = results_scns[scn_id]['flows_txaxt']["DSM activation"].index.set_names(["timestamp", "ags"])
-
-                # Aggregation of results to region level (dimensions: ags code (region) x technology)
-                results_axlxt = results_agsxlevelxtech(flows_txaxt, parameters, regions_scns[scn_id])
-                results_scns[scn_id]['results_axlxt'] = results_axlxt
-
-                # Further aggregation and post-analysis calculations
-                results_t = results_tech(results_axlxt)
-                results_scns[scn_id]['results_t'] = results_t
-
-                # Aggregation to scalar result values
-                highlevel_results = create_highlevel_results(results_axlxt, results_t, flows_txaxt, regions_scns[scn_id])
-                results_scns[scn_id]['highlevel_results'] = highlevel_results
-
-                # Export results of analysis
-                if dump_results:
-                    export_processed_results(run_id=run_timestamp,
-                                             scn_id=scn_id,
-                                             results=results_scns[scn_id],
-                                             region=regions_scns[scn_id])
-        else:
-            regions_scns[scn_id] = loaded_region
-            results_scns[scn_id] = loaded_results
+        if analyzed[scn_id] is not None:
+            regions_scns[scn_id], results_scns[scn_id] = analyzed[scn_id]
 
     return regions_scns, results_scns
+
+
+def result_cube(run_timestamp, scenarios='ALL', force_new_results=False,
+                processes=1):
+    """Get processed results of multiple scenarios stacked along scenario
+    dimension (cube) for comparative analysis
+
+    The cube is built once per run (see
+    :func:`~.tools.data_io.export_result_cube`) and loaded if it is up to
+    date (fingerprints of all scenarios unchanged) except
+    `force_new_results` is True. Processed results of single scenarios are
+    loaded if up to date, all other scenarios are analyzed (see
+    :func:`analysis`).
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Timestamp of run, e.g. '2020-06-17_125728_1month'
+    scenarios : (:obj:`str`) OR (:obj:`list` of :obj:`str`)
+        Scenarios, use 'ALL' to use all scenarios found in directory.
+        Default: 'ALL'
+    force_new_results : :obj:`bool`
+        Process results even if cube or processed results are available.
+        Default: False
+    processes : :obj:`int`
+        Number of processes used to analyze scenarios in parallel.
+        Default: 1
+
+    Returns
+    -------
+    :class:`~.tools.data_io.ResultCube`
+        Result cube
+    """
+    if isinstance(scenarios, str):
+        scenarios = [scenarios]
+    if scenarios == ['ALL']:
+        scenarios = _available_scenarios(run_timestamp)
+
+    fingerprints = {scn_id: results_fingerprint(run_timestamp=run_timestamp,
+                                                scn_id=scn_id,
+                                                version=ANALYSIS_VERSION)
+                    for scn_id in scenarios}
+
+    if not force_new_results:
+        cube = load_result_cube(run_id=run_timestamp,
+                                fingerprints=fingerprints)
+        if cube is not None:
+            return cube
+
+    # load required processed results only (no import of regions)
+    results_scns = {}
+    if not force_new_results:
+        for scn_id in scenarios:
+            if fingerprints[scn_id] is None:
+                continue
+            _, results_scn = load_processed_results(
+                run_id=run_timestamp,
+                scn_id=scn_id,
+                fingerprint=fingerprints[scn_id],
+                groups=RESULT_CUBE_GROUPS)
+            if results_scn is not None:
+                results_scns[scn_id] = results_scn
+
+    scenarios_analysis = [scn_id for scn_id in scenarios
+                          if scn_id not in results_scns]
+    if scenarios_analysis:
+        _, results_analysis = analysis(run_timestamp=run_timestamp,
+                                       scenarios=scenarios_analysis,
+                                       force_new_results=force_new_results,
+                                       processes=processes,
+                                       raise_errors=False)
+        results_scns.update(results_analysis)
+
+    # keep order of scenarios, skip failed ones
+    results_scns = {scn_id: results_scns[scn_id] for scn_id in scenarios
+                    if scn_id in results_scns}
+    export_result_cube(run_id=run_timestamp,
+                       results_scns=results_scns,
+                       fingerprints={scn_id: fingerprints[scn_id]
+                                     for scn_id in results_scns})
+
+    return load_result_cube(run_id=run_timestamp)
+
+
+def compare_runs(run_timestamp, run_timestamp_ref, scenarios='ALL',
+                 processes=1):
+    """Compare highlevel results of scenarios in two runs
+
+    Use this to assess the accuracy of a run with the model built on
+    typical periods (see `ts_aggregation` in run config) against a reference
+    run on the full timerange. The results are taken from the result cubes
+    of both runs (see :func:`result_cube`), the errors of the aggregated
+    timeseries are found in the raw results' meta infos.
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Timestamp of run to be compared, e.g. '2020-08-05_024335_tsagg'
+    run_timestamp_ref : :obj:`str`
+        Timestamp of reference run, e.g. '2020-08-05_024335'
+    scenarios : (:obj:`str`) OR (:obj:`list` of :obj:`str`)
+        Scenarios, use 'ALL' to use all scenarios found in directory of run
+        to be compared. Default: 'ALL'
+    processes : :obj:`int`
+        Number of processes used to analyze scenarios in parallel.
+        Default: 1
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Highlevel results of both runs ('value', 'value_ref'), absolute
+        ('diff') and relative deviation ('rel_diff') with scenario,
+        variable and unit as index
+    """
+    cube = result_cube(run_timestamp=run_timestamp,
+                       scenarios=scenarios,
+                       processes=processes)
+    cube_ref = result_cube(run_timestamp=run_timestamp_ref,
+                           scenarios=cube.scenarios,
+                           processes=processes)
+
+    comparison = pd.concat(
+        [pd.to_numeric(cube['highlevel_results'],
+                       errors='coerce').rename('value'),
+         pd.to_numeric(cube_ref['highlevel_results'],
+                       errors='coerce').rename('value_ref')],
+        axis=1, join='inner')
+    comparison['diff'] = comparison['value'] - comparison['value_ref']
+    comparison['rel_diff'] = comparison['diff'] / \
+        comparison['value_ref'].abs().where(lambda value: value > 0)
+
+    for scn_id, rel_diff in comparison['rel_diff'].abs().groupby(
+            level='scenario'):
+        logger.info(f'{scn_id}: max. relative deviation of highlevel '
+                    f'results: {rel_diff.max():.2%}')
+
+    return comparison
+
+
+def _available_scenarios(run_timestamp):
+    """Get ids of all scenarios (sorted) found in directory of run"""
+    return sorted([
+        file.split('.')[0]
+        for file in os.listdir(os.path.join(
+            config.get_data_root_dir(),
+            config.get('user_dirs',
+                       'results_dir'),
+            run_timestamp
+        )) if not file.startswith('.')
+    ])
+
+
+def _analyze_scenario(run_timestamp, scn_id, force_new_results=False,
+                      dump_results=True, region=None, results_raw=None,
+                      raise_errors=True):
+    """Analyze single scenario, see :func:`analysis`
+
+    Returns
+    -------
+    :class:`~.model.Region`
+        Region
+    :obj:`dict` of :pandas:`pandas.DataFrame`
+        Results
+    None is returned if the scenario is not found or its analysis failed
+    (`raise_errors` is False).
+    """
+    try:
+        return _analyze_scenario_results(run_timestamp, scn_id,
+                                         force_new_results=force_new_results,
+                                         dump_results=dump_results,
+                                         region=region,
+                                         results_raw=results_raw)
+    except Exception:
+        if raise_errors:
+            raise
+        logger.exception(f'Analysis of scenario {scn_id} failed, skipping...')
+        return None
+
+
+def _analyze_scenario_results(run_timestamp, scn_id, force_new_results=False,
+                              dump_results=True, region=None,
+                              results_raw=None):
+    """Analyze single scenario, see :func:`_analyze_scenario`"""
+    fingerprint = results_fingerprint(run_timestamp=run_timestamp,
+                                      scn_id=scn_id,
+                                      version=ANALYSIS_VERSION)
+
+    # check for processed results
+    if not force_new_results and results_raw is None and \
+            fingerprint is not None:
+        region_ref, loaded_results = load_processed_results(
+            run_id=run_timestamp,
+            scn_id=scn_id,
+            fingerprint=fingerprint
+        )
+        if loaded_results is not None:
+            if region is None:
+                region = LazyRegion(region_ref['cfg'])
+            return region, loaded_results
+
+    logger.info(f'-> Analyzing scenario: {scn_id}...')
+    if results_raw is not None:
+        # use results in memory, no flows if model was infeasible
+        results_raw_scn = _results_raw_from_memory(results_raw)
+    else:
+        # load raw results
+        with profile_stage('load_results'):
+            results_raw_scn = load_results(timestamp=run_timestamp,
+                                           scenario=scn_id)
+
+    if results_raw_scn is None:
+        logger.warning(f'Scenario {scn_id} not found or file(s) malformed, skipping...')
+        return None
+
+    try:
+        results_scn = {}
+        # import region using cfg from results meta (if not passed)
+        if region is None:
+            region = Region.import_data(results_raw_scn['meta']['config'])
+        results_scn['results_raw'] = results_raw_scn
+
+        logger.info(f'Analyzing...')
+
+        # Flows extracted to dimension time, ags code, technology (and sometimes more dimensions)
+        with profile_stage('flows_timexagsxtech'):
+            flows_txaxt = flows_timexagsxtech(results_raw_scn["flows"], region)
+        results_scn['flows_txaxt'] = flows_txaxt
+
+        # Retrieve parameters from database and config file
+        with profile_stage('aggregate_parameters'):
+            parameters = aggregate_parameters(region, results_raw_scn, flows_txaxt)
+        results_scn['parameters'] = parameters
+
+        # Add more parameters derived from flows + parameters
+        with profile_stage('additional_results_txaxt'):
+            results_scn['flows_txaxt'] = additional_results_txaxt(results_scn['flows_txaxt'],
+                results_scn['parameters'])
+
+        # Aggregate flow results along different dimensions (outdated, see #29)
+        # only used to access DSM demand increase/decrease
+        with profile_stage('aggregate_flows'):
+            aggregated_results = aggregate_flows(results_raw_scn)
+        results_scn['flows_txaxt']["DSM activation"] = pd.concat(
+            [aggregated_results['Lasterhöhung DSM Haushalte nach Gemeinde'].stack().rename("Demand increase"),
+             aggregated_results['Lastreduktion DSM Haushalte nach Gemeinde'].stack().rename(
+                 "Demand decrease")], axis=1)
+        results_scn['flows_txaxt']["DSM activation"].index = results_scn['flows_txaxt']["DSM activation"].index.set_names(["timestamp", "ags"])
+
+        # Aggregation of results to region level (dimensions: ags code (region) x technology)
+        with profile_stage('results_agsxlevelxtech'):
+            results_axlxt = results_agsxlevelxtech(flows_txaxt, parameters, region)
+        results_scn['results_axlxt'] = results_axlxt
+
+        # Further aggregation and post-analysis calculations
+        with profile_stage('results_tech'):
+            results_t = results_tech(results_axlxt)
+        results_scn['results_t'] = results_t
+
+        # Aggregation to scalar result values
+        with profile_stage('create_highlevel_results'):
+            highlevel_results = create_highlevel_results(results_axlxt, results_t, flows_txaxt, region)
+        results_scn['highlevel_results'] = highlevel_results
+
+        # Export results of analysis
+        if dump_results:
+            with profile_stage('export_processed_results'):
+                export_processed_results(run_id=run_timestamp,
+                                         scn_id=scn_id,
+                                         results=results_scn,
+                                         region=region,
+                                         fingerprint=fingerprint)
+    finally:
+        # catalogs of node labels refer to the results of this scenario
+        clear_node_label_catalogs()
+
+    return region, results_scn
+
+
+def _results_raw_from_memory(results_raw):
+    """Convert raw results held in memory to the format of results loaded
+    from files (see :func:`~.tools.data_io.load_results`)
+
+    The time index of flows and stationary variables is converted to str as
+    in the CSV files, the data is not copied.
+
+    Parameters
+    ----------
+    results_raw : :obj:`dict`
+        Raw results, see :func:`~.analysis.tools.results_to_dataframes`
+
+    Returns
+    -------
+    :obj:`dict`
+        Raw results, None if there are no flows (model infeasible)
+    """
+    if 'flows' not in results_raw:
+        return None
+
+    results_raw = dict(results_raw)
+    for name in ['flows', 'vars_stat']:
+        df = results_raw[name].copy(deep=False)
+        df.index = df.index.astype(str)
+        results_raw[name] = df
+
+    return results_raw
@@ -1,10 +1,16 @@
+import re
+import weakref
+from itertools import islice
 import pandas as pd
+import numpy as np
 from numpy import inf, nan
 import papermill as pm
 import os
 from windnode_abw import __path__ as wn_path
 from windnode_abw.tools import config
 from windnode_abw.model.region.tools import calc_dsm_cap_up, calc_dsm_cap_down
+from oemof.network import Node
+from pyomo.core.base.var import Var
 import multiprocessing as mp
 
 
@@ -181,15 +187,141 @@ UNITS = {
     }
 
 
-def results_to_dataframes(esys, infeasible):
+class NodeLabelCatalog:
+    """Catalog of node labels of results, e.g. (from, to) node pairs of flow
+    columns
+
+    Each unique label is parsed only once: RegEx matches and extractions are
+    evaluated on the unique labels of an index level and memoized per
+    pattern. The results are mapped to the entries of the index using the
+    integer codes of the labels.
+
+    Use :func:`node_label_catalog` to reuse the catalog of an index across
+    multiple calls.
+
+    Parameters
+    ----------
+    index : :pandas:`pandas.MultiIndex` or :pandas:`pandas.Index`
+        Labels, e.g. columns of flows. A flat index (or array) is treated as
+        single level, e.g. labels of flows in long format.
+    """
+    def __init__(self, index):
+        if isinstance(index, pd.MultiIndex):
+            self._levels = list(index.levels)
+            self._codes = [np.asarray(codes) for codes in index.codes]
+        else:
+            codes, uniques = pd.factorize(index)
+            self._levels = [pd.Index(uniques)]
+            self._codes = [codes]
+        self._cache = {}
+
+    def match(self, pattern, level=0):
+        """Match labels against pattern, see
+        :pandas:`pandas.Series.str.match`
+
+        Parameters
+        ----------
+        pattern : :obj:`str`
+            RegEx pattern
+        level : :obj:`int`
+            Index level
+
+        Returns
+        -------
+        :obj:`numpy.ndarray`
+            Boolean mask of index entries
+        """
+        key = ('match', level, pattern)
+        if key not in self._cache:
+            self._cache[key] = np.asarray(
+                self._levels[level].str.match(pattern), dtype=bool)
+        return self._cache[key][self._codes[level]]
+
+    def extract(self, pattern, level=0, expand=True):
+        """Extract groups of pattern from labels, see
+        :pandas:`pandas.Series.str.extract`
+
+        Parameters
+        ----------
+        pattern : :obj:`str`
+            RegEx pattern
+        level : :obj:`int`
+            Index level
+        expand : :obj:`bool`
+            Return DataFrame with one column per group
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame` or :pandas:`pandas.Index`
+            Groups per index entry
+        """
+        key = ('extract', level, pattern, expand)
+        if key not in self._cache:
+            self._cache[key] = self._levels[level].str.extract(pattern,
+                                                               expand=expand)
+        extracted = self._cache[key]
+        if isinstance(extracted, pd.DataFrame):
+            return extracted.take(self._codes[level]).reset_index(drop=True)
+        return extracted.take(self._codes[level])
+
+
+# catalogs of indexes in use: id(index) -> (weak reference to index,
+# catalog), entries are removed when the index is garbage collected or by
+# clear_node_label_catalogs() at the end of the analysis of a scenario
+_node_label_catalogs = {}
+
+
+def node_label_catalog(index):
+    """Get catalog of node labels of index, the catalog is reused as long
+    as the same index object is passed (e.g. columns of flows)
+
+    Parameters
+    ----------
+    index : :pandas:`pandas.MultiIndex` or :pandas:`pandas.Index`
+        Labels, e.g. columns of flows
+
+    Returns
+    -------
+    :class:`NodeLabelCatalog`
+        Catalog
+    """
+    key = id(index)
+    entry = _node_label_catalogs.get(key)
+    if entry is not None and entry[0]() is index:
+        return entry[1]
+
+    def remove(ref, key=key):
+        # entry may have been replaced already (id reused by a new index)
+        if _node_label_catalogs.get(key, (None,))[0] is ref:
+            del _node_label_catalogs[key]
+
+    catalog = NodeLabelCatalog(index)
+    _node_label_catalogs[key] = (weakref.ref(index, remove), catalog)
+    return catalog
+
+
+def clear_node_label_catalogs():
+    """Remove all catalogs of node labels, see :func:`node_label_catalog`"""
+    _node_label_catalogs.clear()
+
+
+def results_to_dataframes(esys, infeasible, om=None, flows=True):
     """Convert result dict to DataFrames for flows and stationary variables.
 
+    If the solved model is passed, the results of the variables are
+    extracted directly from the model (see :func:`model_results_to_dataframes`)
+    and `esys.results['main']` is not needed.
+
     Parameters
     ----------
     esys : oemof.solph.EnergySystem
         Energy system including results
     infeasible : :obj:`bool`
         Model was infeasible
+    om : oemof.solph.Model
+        Solved model
+    flows : :obj:`bool`
+        Extract flows from model, see :func:`model_results_to_dataframes`
 
     Returns
     -------
@@ -225,7 +357,9 @@ def results_to_dataframes(esys, infeasible):
     }
 
     # add result vars to results only if there's a solution
-    if not infeasible:
+    if not infeasible and om is not None:
+        results.update(model_results_to_dataframes(om, flows=flows))
+    elif not infeasible:
         results['flows'] = pd.DataFrame(
             {(str(from_n), str(to_n)): flow['sequences']['flow']
              for (from_n, to_n), flow in esys.results['main'].items()
@@ -245,6 +379,194 @@ def results_to_dataframes(esys, infeasible):
     return results
 
 
+def model_results_to_dataframes(om, flows=True):
+    """Extract results of variables from solved model to DataFrames for
+    flows, stationary variables and investments
+
+    The values of all variables are read in one pass per variable and
+    written to preallocated (time x column) arrays. Hence, the per node
+    DataFrames of :func:`oemof.outputlib.processing.results` are not
+    created. The results equal those of :func:`results_to_dataframes` using
+    `esys.results['main']`.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        Solved model
+    flows : :obj:`bool`
+        Extract flows, set to False if flows are extracted in column groups
+        (see :func:`iter_model_flows`)
+
+    Returns
+    -------
+    :obj:`dict`
+        Results, content:
+            :pandas:`pandas.DataFrame`
+                DataFrame with flows, node pair as columns ('flows'), only
+                if `flows` is True.
+            :pandas:`pandas.DataFrame`
+                DataFrame with stationary variables, (node, var) as columns
+                ('vars_stat').
+            :pandas:`pandas.Series`
+                Investments, (node, bus) or (node, 'None') as index
+                ('invest').
+    """
+    timeindex = om.es.timeindex
+    if flows:
+        om_flows = sorted(om.FLOWS,
+                          key=lambda flow: (str(flow[0]), str(flow[1])))
+        # nodes are compared by identity, hashing of labels is slow
+        flow_cols = {(id(from_n), id(to_n)): n
+                     for n, (from_n, to_n) in enumerate(om_flows)}
+        data_flows = np.full((len(timeindex), len(om_flows)), np.nan)
+
+    vars_stat = []
+    invest = {}
+    for var in om.component_objects(Var, descend_into=True):
+        if not var.is_indexed() or len(var) == 0 or \
+                (var is om.flow and not flows):
+            continue
+        # read var data directly (Pyomo 5.6), var.items() validates every
+        # index which takes much longer than reading the values
+        index, values = zip(*((idx, var_data.value)
+                              for idx, var_data in var._data.items()))
+        values = np.array(values, dtype=float)
+        idx_first = index[0]
+
+        # scalar vars: indexed by node(s) only
+        if not isinstance(idx_first, tuple) or \
+                isinstance(idx_first[-1], Node):
+            if var.local_name == 'invest':
+                for idx, value in zip(index, values):
+                    if isinstance(idx, Node):
+                        idx = (idx,)
+                    if not np.isnan(value):
+                        invest[tuple(str(n) for n in idx)] = value
+            continue
+
+        timesteps = np.fromiter((idx[-1] for idx in index),
+                                dtype=int, count=len(index))
+        if var.local_name == 'flow' and len(idx_first) == 3:
+            cols = np.fromiter((flow_cols[id(idx[0]), id(idx[1])]
+                                for idx in index),
+                               dtype=int, count=len(index))
+            data_flows[timesteps, cols] = values
+        elif len(idx_first) == 2:
+            nodes = [str(idx[0]) for idx in index]
+            vars_stat.append((var.local_name, nodes, timesteps, values))
+
+    results = {}
+    if flows:
+        results['flows'] = _drop_empty_columns(pd.DataFrame(
+            data_flows,
+            index=timeindex,
+            columns=pd.MultiIndex.from_tuples(
+                [(str(from_n), str(to_n)) for from_n, to_n in om_flows])))
+
+    stat_cols = sorted({(node, name)
+                        for name, nodes, _, _ in vars_stat
+                        for node in nodes})
+    stat_col_pos = {col: n for n, col in enumerate(stat_cols)}
+    data_stat = np.full((len(timeindex), len(stat_cols)), np.nan)
+    for name, nodes, timesteps, values in vars_stat:
+        cols = np.fromiter((stat_col_pos[(node, name)] for node in nodes),
+                           dtype=int, count=len(nodes))
+        data_stat[timesteps, cols] = values
+    results['vars_stat'] = _drop_empty_columns(pd.DataFrame(
+        data_stat,
+        index=timeindex,
+        columns=pd.MultiIndex.from_tuples(stat_cols) if stat_cols
+        else None))
+
+    # node-only keys first (as in oemof results), 'None' for missing target
+    invest_idx = sorted(invest)
+    results['invest'] = pd.Series(
+        [invest[idx] for idx in invest_idx],
+        index=pd.MultiIndex.from_tuples(
+            [idx if len(idx) == 2 else (idx[0], 'None')
+             for idx in invest_idx]) if invest_idx else None,
+        dtype=float).rename('invest')
+
+    return results
+
+
+def iter_model_flows(om, group_size=500):
+    """Extract flows from solved model in column groups
+
+    The values of the flow variable are read in model order (all timesteps
+    of a flow consecutively), hence each group of `group_size` flows is
+    complete and can be written to disk (see
+    :class:`~.tools.data_io.ResultsWriter`) before the next group is read.
+    Flows without values are dropped as in
+    :func:`model_results_to_dataframes`.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        Solved model
+    group_size : :obj:`int`
+        Number of flows per column group
+
+    Yields
+    ------
+    :pandas:`pandas.DataFrame`
+        Flows of column group, node pair as columns
+    """
+    timeindex = om.es.timeindex
+    var_data = iter(om.flow._data.items())
+    flows_done = set()
+
+    while True:
+        group = list(islice(var_data, len(timeindex) * group_size))
+        if not group:
+            return
+
+        # nodes are compared by identity, hashing of labels is slow
+        flow_cols = {}
+        labels = []
+
+        def flow_col(idx):
+            key = (id(idx[0]), id(idx[1]))
+            col = flow_cols.get(key)
+            if col is None:
+                col = flow_cols[key] = len(flow_cols)
+                labels.append((str(idx[0]), str(idx[1])))
+            return col
+
+        cols = np.fromiter((flow_col(idx) for idx, _ in group),
+                           dtype=int, count=len(group))
+        timesteps = np.fromiter((idx[-1] for idx, _ in group),
+                                dtype=int, count=len(group))
+        values = np.fromiter((np.nan if var.value is None else var.value
+                              for _, var in group),
+                             dtype=float, count=len(group))
+        del group
+
+        if not flows_done.isdisjoint(flow_cols) or \
+                (np.bincount(cols) != len(timeindex)).any():
+            msg = 'Values of flow variable are not ordered by flow, flows ' \
+                  'cannot be extracted in groups'
+            logger.error(msg)
+            raise ValueError(msg)
+        flows_done.update(flow_cols)
+
+        data = np.full((len(timeindex), len(labels)), np.nan)
+        data[timesteps, cols] = values
+        yield _drop_empty_columns(pd.DataFrame(
+            data,
+            index=timeindex,
+            columns=pd.MultiIndex.from_tuples(labels)))
+
+
+def _drop_empty_columns(df):
+    """Drop columns without values (variables without results are not
+    contained in oemof results)"""
+    empty = np.isnan(df.values).all(axis=0)
+    if empty.any():
+        return df.loc[:, ~empty]
+    return df
+
+
 def aggregate_flows(results_raw):
     """Aggregate result flows and create result dictionary
 
@@ -369,12 +691,12 @@ def aggregate_flows(results_raw):
     results = {}
 
     # aggregation of flows
+    flow_labels = node_label_catalog(results_raw['flows'].columns)
     for name, params in aggregations_flows.items():
         results[name] = results_raw['flows'].groupby(
-            results_raw['flows'].columns.get_level_values(
-                level=params['level']).str.extract(
-                params['pattern'],
-                expand=False),
+            flow_labels.extract(params['pattern'],
+                                level=params['level'],
+                                expand=False),
             axis=1).agg('sum')
 
     # aggregation of stationary vars
@@ -408,9 +730,10 @@ def extract_line_flow(results_raw, region, level_flow_in=0, level_flow_out=1):
     line_bus_suffix = "_".join([line_suffix, "(?P<bus>\d+)"])
     line_pattern = "_".join([stubname, line_suffix])
 
+    flow_labels = node_label_catalog(results_raw.columns)
     flows_extract = results_raw.loc[:,
-                    results_raw.columns.get_level_values(level_flow_in).str.match(line_pattern)
-                    & results_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)]
+                    flow_labels.match(line_pattern, level=level_flow_in)
+                    & flow_labels.match(bus_pattern, level=level_flow_out)]
 
     # include bus id into other column level name
     if level_flow_in == 0:
@@ -428,7 +751,8 @@ def extract_line_flow(results_raw, region, level_flow_in=0, level_flow_out=1):
 
     # introduce ags and technology as new index levels
     idx_new = [list(flows_extracted_long.index.get_level_values(0))]
-    idx_split = flows_extracted_long.index.get_level_values(1).str.extract(line_bus_suffix)
+    idx_split = NodeLabelCatalog(
+        flows_extracted_long.index.get_level_values(1)).extract(line_bus_suffix)
     [idx_new.append(c[1].tolist()) for c in idx_split.iteritems()]
     flows_extracted_long.index = pd.MultiIndex.from_arrays(
         idx_new,
@@ -459,9 +783,10 @@ def extract_line_flow_imex(results_raw, level_flow_in=0, level_flow_out=1):
     line_pattern = "_".join([stubname, line_suffix])
     line_bus_suffix = "_".join([line_suffix, bus_pattern])
 
+    flow_labels = node_label_catalog(results_raw.columns)
     flows_extract = results_raw.loc[:,
-                    results_raw.columns.get_level_values(level_flow_in).str.match(line_pattern)
-                    & results_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)]
+                    flow_labels.match(line_pattern, level=level_flow_in)
+                    & flow_labels.match(bus_pattern, level=level_flow_out)]
 
     if level_flow_in == 0:
         flows_extract.columns = [i + "_" + j for i, j in flows_extract.columns]
@@ -479,7 +804,8 @@ def extract_line_flow_imex(results_raw, level_flow_in=0, level_flow_out=1):
 
     # introduce ags and technology as new index levels
     idx_new = [list(flows_extracted_long.index.get_level_values(0))]
-    idx_split = flows_extracted_long.index.get_level_values(1).str.extract(line_bus_suffix)
+    idx_split = NodeLabelCatalog(
+        flows_extracted_long.index.get_level_values(1)).extract(line_bus_suffix)
     [idx_new.append(c[1].tolist()) for c in idx_split.iteritems()]
     flows_extracted_long.index = pd.MultiIndex.from_arrays(
         idx_new,
@@ -502,11 +828,40 @@ def extract_line_flow_imex(results_raw, level_flow_in=0, level_flow_out=1):
     return line_flows
 
 
+def _empty_flows_timexagsxtech(flows_extract, node_pattern, stubname,
+                               unstack_col):
+    """Empty result of :func:`extract_flows_timexagsxtech` with the index and
+    column levels of a non-empty result (no nodes match the pattern)
+    """
+    groups = re.compile(node_pattern).groupindex
+    keys = [key for key in sorted(groups, key=groups.get)
+            if key != unstack_col]
+    index = pd.MultiIndex.from_arrays(
+        [flows_extract.index[:0]] +
+        [pd.Index([], dtype=int if key == "ags" else object)
+         for key in keys],
+        names=["timestamp"] + keys)
+    if unstack_col:
+        columns = pd.Index([], dtype=object, name=unstack_col)
+    else:
+        columns = flows_extract.columns.append(pd.Index([stubname]))
+
+    return pd.DataFrame(index=index, columns=columns, dtype=float)
+
+
 def extract_flows_timexagsxtech(results_raw, node_pattern, bus_pattern, stubname,
                         level_flow_in=0, level_flow_out=1, unstack_col="technology"):
     """
     Extract flows keeping 3 dimensions: time, ags, tech
 
+    The nodes are mapped to keys (e.g. ags and technology) using the groups
+    of the node pattern, the flows are summed per key in a single grouped
+    column sum and reshaped to the target format afterwards. The result
+    equals a wide-to-long conversion (cf. :pandas:`pandas.wide_to_long`)
+    of the flows: nodes must match the entire pattern. If no nodes match,
+    an empty DataFrame with the index and column levels of the result is
+    returned.
+
     Parameters
     ----------
     results_raw: dict of pd.DataFrame
@@ -530,33 +885,58 @@ def extract_flows_timexagsxtech(results_raw, node_pattern, bus_pattern, stubname
     """
 
     # Get an extract of relevant flows
+    flow_labels = node_label_catalog(results_raw.columns)
     flows_extract = results_raw.loc[:,
-                    results_raw.columns.get_level_values(level_flow_in).str.match("_".join([
-                        stubname, node_pattern]))
-                    & results_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)]
+                    flow_labels.match("_".join([stubname, node_pattern]), level=level_flow_in)
+                    & flow_labels.match(bus_pattern, level=level_flow_out)]
 
-    # transform to wide-to-long format while dropping bus column level
+    # sum over buses while dropping bus column level
     flows_extract = flows_extract.sum(level=level_flow_in, axis=1)
     flows_extract.index.name = "timestamp"
-    flows_extract = flows_extract.reset_index()
-    flows_extracted_long = pd.wide_to_long(flows_extract, stubnames=stubname, i="timestamp", j="ags_tech", sep="_",
-                                           suffix=node_pattern)
-
-    # introduce ags and technology as new index levels
-    idx_new = [list(flows_extracted_long.index.get_level_values(0))]
-    idx_split = flows_extracted_long.index.get_level_values(1).str.extract(node_pattern)
-    [idx_new.append(c[1].tolist()) for c in idx_split.iteritems()]
-    flows_extracted_long.index = pd.MultiIndex.from_arrays(
-        idx_new,
-        names=["timestamp"] + list(idx_split.columns))
-
-    # convert level ags to int
-    flows_extracted_long.index = _ags_index2int(flows_extracted_long.index)
 
-    # Sum over buses (aggregation) in one region and unstack technology
-    flows_formatted = flows_extracted_long.sum(level=list(range(len(idx_new))))
+    # map nodes matching the entire pattern to keys (pattern groups)
+    stub = stubname + "_"
+    nodes = NodeLabelCatalog(flows_extract.columns).match(
+        re.escape(stub) + node_pattern + "$")
+    if not nodes.any():
+        logger.debug(f'No flows found matching node pattern '
+                     f'{stub}{node_pattern}')
+        return _empty_flows_timexagsxtech(flows_extract, node_pattern,
+                                          stubname, unstack_col)
+    keys = NodeLabelCatalog(
+        pd.Index([node.replace(stub, "") for node in flows_extract.columns[nodes]])
+    ).extract(node_pattern)
+
+    # convert ags to int
+    if "ags" in keys.columns:
+        keys["ags"] = keys["ags"].astype(int)
+
+    # Sum over buses (aggregation) in one region and reshape to
+    # time x keys, unstack technology
+    flows_nodes = flows_extract.loc[:, nodes]
+    flows_nodes.columns = pd.MultiIndex.from_frame(keys)
+    levels = list(range(flows_nodes.columns.nlevels))
+    flows_grouped = flows_nodes.sum(level=levels, axis=1)
     if unstack_col:
-        flows_formatted = flows_formatted[stubname].unstack(unstack_col, fill_value=0)
+        return flows_grouped.stack(levels).unstack(unstack_col, fill_value=0)
+
+    # time x keys in long format, keep order of rows of wide-to-long
+    # conversion (by key, then time)
+    flows_formatted = flows_grouped.T.stack(dropna=False).reorder_levels(
+        [len(levels)] + levels).to_frame(stubname)
+
+    # nodes not matching the entire pattern are preserved as columns in
+    # wide-to-long conversion and summed per key
+    nodes_other = flows_extract.columns[~nodes]
+    if len(nodes_other) > 0:
+        key_count = keys.groupby(list(keys.columns)).size()
+        flows_other = flows_extract[nodes_other].reindex(
+            flows_formatted.index.get_level_values(0))
+        flows_other = flows_other.mul(
+            key_count.reindex(flows_formatted.index.droplevel(0)).values,
+            axis=0)
+        flows_other.index = flows_formatted.index
+        flows_formatted = pd.concat([flows_other, flows_formatted], axis=1)
 
     return flows_formatted
 
@@ -567,9 +947,10 @@ def extract_flow_params(flow_params_raw, node_pattern, bus_pattern, stubname,
     pattern = "_".join([stubname, node_pattern])
 
     # Get an extract of relevant flows
+    flow_labels = node_label_catalog(flow_params_raw.columns)
     params_extract = flow_params_raw.loc[params,
-                    flow_params_raw.columns.get_level_values(level_flow_in).str.match(pattern)
-                    & flow_params_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)].astype(float)
+                    flow_labels.match(pattern, level=level_flow_in)
+                    & flow_labels.match(bus_pattern, level=level_flow_out)].astype(float)
 
     # transform to wide-to-long format while dropping bus column level
     params_extract = params_extract.sum(level=level_flow_in, axis=1).T
@@ -587,7 +968,7 @@ def extract_stat_params(stat_params_raw, node_pattern, stubname, params=None):
     pattern = "_".join([stubname, node_pattern])
 
     params_extract = stat_params_raw.loc[
-        stat_params_raw.index.get_level_values(0).str.match(pattern)]
+        node_label_catalog(stat_params_raw.index).match(pattern, level=0)]
 
     # transform to wide-to-long format and create multiindex from pattern groups
     params_extract = params_extract.unstack().droplevel(0, axis=1)
@@ -603,9 +984,10 @@ def extract_stat_params(stat_params_raw, node_pattern, stubname, params=None):
 def extract_invest(vars, node_pattern, bus_pattern):
 
     # Get an extract of relevant data
+    var_labels = node_label_catalog(vars.index)
     vars_extract = vars.loc[
-                    vars.index.get_level_values(0).str.match(node_pattern),
-                    vars.index.get_level_values(1).str.match(bus_pattern), :].astype(float)
+                    var_labels.match(node_pattern, level=0)
+                    & var_labels.match(bus_pattern, level=1)].astype(float)
 
     # transform to wide-to-long format while dropping bus column level
     vars_extract = vars_extract.max(level=0)
@@ -671,6 +1053,101 @@ def stat_params_agsxtech(results_raw):
     return params
 
 
+# extraction patterns of flows, see flows_timexagsxtech()
+FLOW_EXTRACTOR = {
+    "Stromerzeugung": {
+        "node_pattern": "\w+_(?P<ags>\d+)(?:_b\d+)?_(?P<technology>\w+)",
+        "stubname": "gen",
+        "bus_pattern": 'b_el_\d+'},
+    "Wärmeerzeugung": {
+        "node_pattern": "th_(?P<level>\w{3})_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?_(?P<technology>\w+)",
+        "stubname": "gen",
+        "bus_pattern": 'b_th_\w+_\d+(_\w+)?',},
+    "Wärmeerzeugung PtH": {
+        "node_pattern": "(?P<level>\w{3})_(?P<technology>\w+)_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
+        "stubname": "flex",
+        "bus_pattern": 'b_th_\w+_\d+(_\w+)?'},
+    "Wärmespeicher discharge": {
+        "node_pattern": "(?P<level>\w{3})(?:_pth)?_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
+        "stubname": "stor_th",
+        "bus_pattern": 'b_th_\w+_\d+(_\w+)?',
+        "unstack_col": None},
+    "Wärmespeicher charge": {
+        "node_pattern": "(?P<level>\w{3})(?:_pth)?_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
+        "stubname": "stor_th",
+        "bus_pattern": 'b_th_\w+_\d+(_\w+)?',
+        "unstack_col": None,
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Batteriespeicher discharge": {
+        "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_b\d+",
+        "stubname": "flex_bat",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": None},
+    "Batteriespeicher charge": {
+        "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_b\d+",
+        "stubname": "flex_bat",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": None,
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Stromnachfrage": {
+        "node_pattern": "(?P<ags>\d+)_b\d+_(?P<sector>\w+)",
+        "stubname": "dem_el",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": "sector",
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Wärmenachfrage": {
+        "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_(?P<sector>\w+)",
+        "stubname": "dem_th",
+        "bus_pattern": 'b_th_(?:dec|cen_out)_\d+',
+        "unstack_col": "sector",
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Stromexport": {
+        "node_pattern": "(?P<level>\w+)_b(?P<bus>\d+)",
+        "stubname": "excess_el",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": "level",
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Stromimport": {
+        "node_pattern": "(?P<level>\w+)_b(?P<bus>\d+)",
+        "stubname": "shortage_el",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": "level"},
+    "Stromnachfrage Heizstab": {
+        "node_pattern": "th_(?P<level>\w{3})_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?_(?P<technology>\w+)",
+        "stubname": "gen",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": "technology",
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Stromnachfrage PtH": {
+        "node_pattern": "(?P<level>\w{3})_(?P<technology>\w+)_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
+        "stubname": "flex",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": "technology",
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "Stromnachfrage DSM HH": {
+        "node_pattern": "(?P<ags>\d+)_b\d+",
+        "stubname": "flex_dsm",
+        "bus_pattern": 'b_el_\w+',
+        "unstack_col": None,
+        "level_flow_in": 1,
+        "level_flow_out": 0},
+    "GuD Dessau": {
+        "node_pattern": "(th_cen_15001000_gud)",
+        "stubname": "gen",
+        "bus_pattern": 'b_gas',
+        "unstack_col": None,
+        "level_flow_in": 1,
+        "level_flow_out": 0}
+}
+
+
 def flows_timexagsxtech(results_raw, region):
     """
     Organized, extracted flows with dimensions time (x level) x ags x technology
@@ -686,107 +1163,16 @@ def flows_timexagsxtech(results_raw, region):
         Extracted flows
     """
 
-    # define extraction pattern
-    flow_extractor = {
-        "Stromerzeugung": {
-            "node_pattern": "\w+_(?P<ags>\d+)(?:_b\d+)?_(?P<technology>\w+)",
-            "stubname": "gen",
-            "bus_pattern": 'b_el_\d+'},
-        "Wärmeerzeugung": {
-            "node_pattern": "th_(?P<level>\w{3})_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?_(?P<technology>\w+)",
-            "stubname": "gen",
-            "bus_pattern": 'b_th_\w+_\d+(_\w+)?',},
-        "Wärmeerzeugung PtH": {
-            "node_pattern": "(?P<level>\w{3})_(?P<technology>\w+)_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
-            "stubname": "flex",
-            "bus_pattern": 'b_th_\w+_\d+(_\w+)?'},
-        "Wärmespeicher discharge": {
-            "node_pattern": "(?P<level>\w{3})(?:_pth)?_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
-            "stubname": "stor_th",
-            "bus_pattern": 'b_th_\w+_\d+(_\w+)?',
-            "unstack_col": None},
-        "Wärmespeicher charge": {
-            "node_pattern": "(?P<level>\w{3})(?:_pth)?_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
-            "stubname": "stor_th",
-            "bus_pattern": 'b_th_\w+_\d+(_\w+)?',
-            "unstack_col": None,
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Batteriespeicher discharge": {
-            "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_b\d+",
-            "stubname": "flex_bat",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": None},
-        "Batteriespeicher charge": {
-            "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_b\d+",
-            "stubname": "flex_bat",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": None,
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Stromnachfrage": {
-            "node_pattern": "(?P<ags>\d+)_b\d+_(?P<sector>\w+)",
-            "stubname": "dem_el",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": "sector",
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Wärmenachfrage": {
-            "node_pattern": "(?P<level>\w+)_(?P<ags>\d+)_(?P<sector>\w+)",
-            "stubname": "dem_th",
-            "bus_pattern": 'b_th_(?:dec|cen_out)_\d+',
-            "unstack_col": "sector",
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Stromexport": {
-            "node_pattern": "(?P<level>\w+)_b(?P<bus>\d+)",
-            "stubname": "excess_el",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": "level",
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Stromimport": {
-            "node_pattern": "(?P<level>\w+)_b(?P<bus>\d+)",
-            "stubname": "shortage_el",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": "level"},
-        "Stromnachfrage Heizstab": {
-            "node_pattern": "th_(?P<level>\w{3})_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?_(?P<technology>\w+)",
-            "stubname": "gen",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": "technology",
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Stromnachfrage PtH": {
-            "node_pattern": "(?P<level>\w{3})_(?P<technology>\w+)_(?P<ags>\d+)(?:_hh_efh|_hh_mfh|_rca)?",
-            "stubname": "flex",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": "technology",
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "Stromnachfrage DSM HH": {
-            "node_pattern": "(?P<ags>\d+)_b\d+",
-            "stubname": "flex_dsm",
-            "bus_pattern": 'b_el_\w+',
-            "unstack_col": None,
-            "level_flow_in": 1,
-            "level_flow_out": 0},
-        "GuD Dessau": {
-            "node_pattern": "(th_cen_15001000_gud)",
-            "stubname": "gen",
-            "bus_pattern": 'b_gas',
-            "unstack_col": None,
-            "level_flow_in": 1,
-            "level_flow_out": 0}
-    }
-
     flows = {}
-    for name, patterns in flow_extractor.items():
+    for name, patterns in FLOW_EXTRACTOR.items():
         # HOTFIX: create zero-filled DFs if results cannot be extracted
-        # cf. https://github.com/windnode/WindNODE_ABW/pull/40
+        # (or are empty) cf. https://github.com/windnode/WindNODE_ABW/pull/40
         try:
             flows[name] = extract_flows_timexagsxtech(results_raw, **patterns)
+            extracted = not flows[name].empty
         except:
+            extracted = False
+        if not extracted:
             logger.warning(f"Could not extract flows of '{name}' as it's not "
                            f"contained in the scenario results! Creating "
                            f"empty dataframe..")
@@ -837,7 +1223,7 @@ def flows_timexagsxtech(results_raw, region):
         flows[stor] = flows[stor + " discharge"].join(flows[stor + " charge"],
                                                       lsuffix="discharge",
                                                       rsuffix="charge")
-        flows[stor].columns = flows[stor].columns.str.replace(flow_extractor[stor + " charge"]["stubname"], "")
+        flows[stor].columns = flows[stor].columns.str.replace(FLOW_EXTRACTOR[stor + " charge"]["stubname"], "")
         flows.pop(stor + " discharge")
         flows.pop(stor + " charge")
 
@@ -1774,8 +2160,8 @@ def create_highlevel_results(results_tables, results_t, results_txaxt, region):
             (results_txaxt['Stromnachfrage'].drop(columns='export').sum(axis=1).sum(level="timestamp") +
              results_txaxt['Stromnachfrage Wärme'].sum(axis=1).sum(level="timestamp"))
     ).mean() # mean of boolean is intended
-    for re in results_tables["Area required"].columns:
-        highlevel["Area required " + re] = results_tables["Area required"][re].sum()
+    for tech in results_tables["Area required"].columns:
+        highlevel["Area required " + tech] = results_tables["Area required"][tech].sum()
 
     highlevel["CO2 emissions el."] = results_t["CO2 emissions el. total"].sum()
     highlevel["CO2 emissions th."] = results_t["CO2 emissions th. total"].sum()
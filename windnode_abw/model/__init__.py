@@ -6,6 +6,7 @@ import logging
 logger = logging.getLogger('windnode_abw')
 
 from windnode_abw.tools import config
+from windnode_abw.tools.logger import profile_stage
 from windnode_abw.tools.data_io import import_db_data
 from windnode_abw.model.region.tools import \
     prepare_feedin_timeseries, prepare_demand_timeseries, \
@@ -65,10 +66,14 @@ class Region:
     _tech_assumptions : :pandas:`pandas.DataFrame`
         Technical assumptions (costs, lifespan, emissions, system efficiency)
         per technbology and scenario
+    _scn_cache : :obj:`dict`
+        Cached data for year set in cfg (e.g. :attr:`tech_assumptions_scn`),
+        invalidated when cfg is set. Keys: (name, year)
     """
     def __init__(self, **kwargs):
         self._name = 'ABW region'
         self._cfg = kwargs.get('cfg', None)
+        self._scn_cache = {}
 
         self._muns = kwargs.get('muns', None)
         self._buses = kwargs.get('buses', None)
@@ -84,35 +89,52 @@ class Region:
         self._pot_areas_wec = kwargs.get('pot_areas_wec', None)
 
         # update mun data table using RE potential areas
-        self._muns.update(calc_available_pv_capacity(self))
-        self._muns.update(calc_available_pv_roof_capacity(self))
-        self._muns.update(calc_available_wec_capacity(self))
+        with profile_stage('calc_available_capacity'):
+            self._muns.update(calc_available_pv_capacity(self))
+            self._muns.update(calc_available_pv_roof_capacity(self))
+            self._muns.update(calc_available_wec_capacity(self))
 
         self._demography = kwargs.get('demography', None)
 
         self._demand_ts_init = kwargs.get('demand_ts_init', None)
         self._dsm_ts = kwargs.get('dsm_ts', None)
-        self._demand_ts, self._dsm_ts = prepare_demand_timeseries(self)
+        with profile_stage('prepare_demand_timeseries'):
+            self._demand_ts, self._dsm_ts = prepare_demand_timeseries(self)
 
         self._feedin_ts_init = kwargs.get('feedin_ts_init', None)
-        self._feedin_ts = prepare_feedin_timeseries(self)
+        with profile_stage('prepare_feedin_timeseries'):
+            self._feedin_ts = prepare_feedin_timeseries(self)
 
         self._temp_ts_init = kwargs.get('temp_ts_init', None)
-        self._temp_ts = prepare_temp_timeseries(self)
-
-        self._heating_structure_dec,\
-        self._dist_heating_share = preprocess_heating_structure(
-            cfg=self._cfg,
-            heating_structure=kwargs.get('heating_structure', None)
-        )
-
-        self._tech_assumptions = calc_annuity(
-            cfg=self._cfg,
-            tech_assumptions=kwargs.get('tech_assumptions', None)
-        )
-
-        self._batteries_large = distribute_large_battery_capacity(self)
-        self._batteries_small = distribute_small_battery_capacity(self)
+        with profile_stage('prepare_temp_timeseries'):
+            self._temp_ts = prepare_temp_timeseries(self)
+
+        with profile_stage('preprocess_heating_structure'):
+            self._heating_structure_dec,\
+            self._dist_heating_share = preprocess_heating_structure(
+                cfg=self._cfg,
+                heating_structure=kwargs.get('heating_structure', None)
+            )
+
+        with profile_stage('calc_annuity'):
+            self._tech_assumptions = calc_annuity(
+                cfg=self._cfg,
+                tech_assumptions=kwargs.get('tech_assumptions', None)
+            )
+
+        with profile_stage('distribute_battery_capacity'):
+            self._batteries_large = distribute_large_battery_capacity(self)
+            self._batteries_small = distribute_small_battery_capacity(self)
+
+    def __getstate__(self):
+        # do not pickle cached data
+        state = self.__dict__.copy()
+        state['_scn_cache'] = {}
+        return state
+
+    def __setstate__(self, state):
+        # add cache to regions pickled before it was introduced
+        self.__dict__.update({'_scn_cache': {}, **state})
 
     @property
     def muns(self):
@@ -127,6 +149,38 @@ class Region:
     @cfg.setter
     def cfg(self, cfg):
         self._cfg = cfg
+        self.clear_scn_cache()
+
+    def clear_scn_cache(self):
+        """Clear cached data for year set in cfg
+
+        Needs to be called if the scenario data in cfg is modified in place
+        (reassigning cfg clears the cache automatically).
+        """
+        self._scn_cache = {}
+
+    def _scn_cached(self, name, func):
+        """Return data for year set in cfg from cache, create if not cached
+
+        The returned data is shared by all callers and must not be modified.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Name of data, e.g. 'tech_assumptions_scn'
+        func : callable
+            Function to create data, called with year as single argument
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame` or :pandas:`pandas.Series`
+            Data for year
+        """
+        year = self._cfg['scn_data']['general']['year']
+        key = (name, year)
+        if key not in self._scn_cache:
+            self._scn_cache[key] = func(year)
+        return self._scn_cache[key]
 
     @property
     def buses(self):
@@ -276,9 +330,9 @@ class Region:
         which includes district heating,
         the shares of energy sources sum up to 1 per municipality.
         """
-        return self._heating_structure_dec.xs(
-            self._cfg['scn_data']['general']['year'],
-            level='year'
+        return self._scn_cached(
+            'heating_structure_dec_scn',
+            lambda year: self._heating_structure_dec.xs(year, level='year')
         )
 
     @property
@@ -290,21 +344,23 @@ class Region:
         This is needed at creation of decentral sources which cover the
         residual load (load - solar_heat_feedin).
         """
+        def calc(year):
+            heating_structure_dec_scn_wo_solar = self.heating_structure_dec_scn.loc[
+                self.heating_structure_dec_scn.index.get_level_values(1) != 'solar']
 
-        heating_structure_dec_scn_wo_solar = self.heating_structure_dec_scn.loc[
-            self.heating_structure_dec_scn.index.get_level_values(1) != 'solar']
+            source_scale_factor = 1 / heating_structure_dec_scn_wo_solar.groupby(
+                ['ags_id']).agg('sum')
+            return heating_structure_dec_scn_wo_solar * source_scale_factor
 
-        source_scale_factor = 1 / heating_structure_dec_scn_wo_solar.groupby(
-            ['ags_id']).agg('sum')
-        return heating_structure_dec_scn_wo_solar * source_scale_factor
+        return self._scn_cached('heating_structure_dec_scn_wo_solar', calc)
 
     @property
     def dist_heating_share_scn(self):
         """Return district heating share per municipality for year set in
         cfg"""
-        return self._dist_heating_share.xs(
-            self._cfg['scn_data']['general']['year'],
-            level='year'
+        return self._scn_cached(
+            'dist_heating_share_scn',
+            lambda year: self._dist_heating_share.xs(year, level='year')
         )
 
     @property
@@ -315,9 +371,9 @@ class Region:
     @property
     def tech_assumptions_scn(self):
         """Return technical assumptions for year set in cfg"""
-        return self._tech_assumptions.xs(
-            self._cfg['scn_data']['general']['year'],
-            level='year'
+        return self._scn_cached(
+            'tech_assumptions_scn',
+            lambda year: self._tech_assumptions.xs(year, level='year')
         )
 
     @property
@@ -411,30 +467,93 @@ class Region:
     @property
     def demography_scn(self):
         """Return population and employees for year set in cfg"""
-        return self._demography.xs(
-            self._cfg['scn_data']['general']['year'],
-            level='year'
-    )
+        return self._scn_cached(
+            'demography_scn',
+            lambda year: self._demography.xs(year, level='year')
+        )
 
     @property
     def demography_change(self):
         """Return relative change of population and employees for year set in
         cfg since 2017"""
-        return self._demography.xs(
-            self._cfg['scn_data']['general']['year'],
-            level='year') / self._demography.xs(2017,
-                                                level='year')
+        return self._scn_cached(
+            'demography_change',
+            lambda year: self.demography_scn / self._demography.xs(
+                2017, level='year')
+        )
 
     @classmethod
-    def import_data(cls, cfg=None):
-        """Import data to Region object"""
+    def import_data(cls, cfg=None, data=None):
+        """Import data to Region object
+
+        Parameters
+        ----------
+        cfg : :obj:`dict`
+            Config to be used to create model
+        data : :obj:`dict`
+            Scenario-independent data as returned by
+            :func:`~.tools.data_io.import_db_data`. If not provided, data is
+            imported from DB.
+        """
 
         if cfg is None:
             msg = 'Please provide config'
             logger.error(msg)
             raise ValueError(msg)
 
+        if data is None:
+            with profile_stage('import_db_data'):
+                data = import_db_data(cfg)
+
         # create the region instance
-        region = cls(**{**import_db_data(cfg), 'cfg': cfg})
+        with profile_stage('create_region'):
+            region = cls(**{**data, 'cfg': cfg})
 
         return region
+
+
+class LazyRegion:
+    """Region which is imported on first access of its data
+
+    The config is available without importing the region. Used for regions of
+    processed results (see :func:`~.analysis.analysis`) which are often not
+    needed at all.
+
+    Parameters
+    ----------
+    cfg : :obj:`dict`
+        Config to import region with (see :meth:`Region.import_data`)
+    """
+    def __init__(self, cfg):
+        self._cfg = cfg
+        self._region = None
+
+    def __getattr__(self, name):
+        # only called for attributes not found in proxy: delegate to region,
+        # do not import it for special attributes (e.g. looked up by pickle)
+        if name.startswith('__') or name in ['_cfg', '_region']:
+            raise AttributeError(name)
+        return getattr(self.region, name)
+
+    @property
+    def imported(self):
+        """Returns True if region has been imported"""
+        return self._region is not None
+
+    @property
+    def region(self):
+        """Returns region, imported on first access"""
+        if self._region is None:
+            self._region = Region.import_data(self._cfg)
+        return self._region
+
+    @property
+    def cfg(self):
+        """Returns run config"""
+        return self._cfg if self._region is None else self._region.cfg
+
+    @cfg.setter
+    def cfg(self, cfg):
+        self._cfg = cfg
+        if self._region is not None:
+            self._region.cfg = cfg
@@ -0,0 +1,456 @@
+import numpy as np
+import pandas as pd
+import oemof.solph as solph
+from pyomo.environ import Constraint
+
+import logging
+logger = logging.getLogger('windnode_abw')
+
+
+def region_timeseries(region, datetime_index):
+    """Collect all timeseries of region which are used in the model
+
+    Parameters
+    ----------
+    region : :class:`~.model.Region`
+        Region object
+    datetime_index : :pandas:`pandas.DatetimeIndex`
+        Datetime index
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Timeseries with (group, name, column) as columns, groups: 'demand',
+        'feedin', 'dsm' and 'temp'
+    """
+    ts = {}
+    for group, data in [('demand', region.demand_ts),
+                        ('feedin', region.feedin_ts),
+                        ('dsm', region.dsm_ts),
+                        ('temp', region.temp_ts)]:
+        if data is None:
+            continue
+        if isinstance(data, dict):
+            data = pd.concat(data, axis=1)
+        ts[group] = data.loc[datetime_index]
+
+    return pd.concat(ts, axis=1)
+
+
+def k_medoids(distances, k, max_iter=100):
+    """Cluster objects into k clusters using k-medoids
+
+    The medoids are initialized greedily (BUILD step of PAM: each medoid
+    minimizes the total distance of all objects to their nearest medoid),
+    then assignment of objects and update of medoids are alternated until
+    the medoids do not change. The result is deterministic.
+
+    Parameters
+    ----------
+    distances : :obj:`numpy.ndarray`
+        Symmetric (n x n) distance matrix
+    k : :obj:`int`
+        Number of clusters
+    max_iter : :obj:`int`
+        Max. number of iterations
+
+    Returns
+    -------
+    :obj:`numpy.ndarray`
+        Medoids (object positions), length k
+    :obj:`numpy.ndarray`
+        Cluster (position in medoids) per object, length n
+    """
+    n = len(distances)
+    if k >= n:
+        return np.arange(n), np.arange(n)
+
+    medoids = [int(distances.sum(axis=1).argmin())]
+    nearest = distances[medoids[0]].copy()
+    for _ in range(1, k):
+        gain = np.maximum(nearest[np.newaxis, :] - distances, 0).sum(axis=1)
+        gain[medoids] = -1
+        medoids.append(int(gain.argmax()))
+        nearest = np.minimum(nearest, distances[medoids[-1]])
+    medoids = np.array(medoids)
+
+    for _ in range(max_iter):
+        clusters = distances[:, medoids].argmin(axis=1)
+        medoids_new = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(clusters == cluster)
+            if len(members) == 0:
+                continue
+            medoids_new[cluster] = members[
+                distances[np.ix_(members, members)].sum(axis=1).argmin()]
+        if (medoids_new == medoids).all():
+            break
+        medoids = medoids_new
+
+    return medoids, distances[:, medoids].argmin(axis=1)
+
+
+class TypicalPeriods:
+    """Typical periods (e.g. days) representing the full timerange of the
+    model, see :func:`aggregate_timeseries`
+
+    The model is built on the timesteps of the typical periods
+    (:attr:`datetime_index`), each timestep is weighted by the number of
+    timesteps it represents (:attr:`weights`).
+
+    Parameters
+    ----------
+    full_index : :pandas:`pandas.DatetimeIndex`
+        Datetime index of full timerange
+    period_length : :obj:`int`
+        Number of timesteps per period
+    period_medoids : :obj:`numpy.ndarray`
+        Typical period (period number) per period of full timerange, a
+        remaining incomplete period at the end is included and mapped to
+        the first timesteps of its typical period
+
+    Attributes
+    ----------
+    full_index : :pandas:`pandas.DatetimeIndex`
+        Datetime index of full timerange
+    period_length : :obj:`int`
+        Number of timesteps per period
+    periods : :obj:`numpy.ndarray`
+        Typical periods (period number), chronological
+    datetime_index : :pandas:`pandas.DatetimeIndex`
+        Datetime index of the timesteps of all typical periods (not
+        contiguous)
+    index_map : :obj:`numpy.ndarray`
+        Position in :attr:`datetime_index` per timestep of full timerange
+    weights : :obj:`numpy.ndarray`
+        Number of represented timesteps per timestep of
+        :attr:`datetime_index`
+    timeincrement : :obj:`float`
+        Length of timestep in hours
+    errors : :obj:`dict`
+        Errors of timeseries reconstructed from typical periods, see
+        :meth:`reconstruction_errors`
+    """
+    def __init__(self, full_index, period_length, period_medoids):
+        self.full_index = full_index
+        self.period_length = period_length
+        self.periods = np.unique(period_medoids)
+        # positions of timesteps of typical periods in full timerange
+        self._full_positions = (self.periods[:, np.newaxis] * period_length +
+                                np.arange(period_length)).ravel()
+        self.datetime_index = full_index[self._full_positions]
+
+        steps = np.arange(len(full_index))
+        position = np.searchsorted(self.periods,
+                                   period_medoids[steps // period_length])
+        self.index_map = position * period_length + steps % period_length
+        self.weights = np.bincount(self.index_map,
+                                   minlength=len(self.datetime_index))
+        self.timeincrement = pd.to_timedelta(
+            full_index.freq).total_seconds() / 3600
+        self.errors = {}
+
+    @property
+    def objective_weighting(self):
+        """Weights of timesteps in objective function (see
+        :class:`oemof.solph.Model`)"""
+        return list(self.weights * self.timeincrement)
+
+    def disaggregate(self, data):
+        """Map data of typical periods to full timerange
+
+        Parameters
+        ----------
+        data : :pandas:`pandas.DataFrame`
+            Data indexed by :attr:`datetime_index`, e.g. flows
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame`
+            Data indexed by :attr:`full_index`
+        """
+        if len(data) != len(self.datetime_index):
+            msg = f'Data has {len(data)} timesteps, typical periods have ' \
+                  f'{len(self.datetime_index)}.'
+            logger.error(msg)
+            raise ValueError(msg)
+        data = data.iloc[self.index_map]
+        data.index = self.full_index
+        return data
+
+    def reconstruction_errors(self, ts):
+        """Calculate errors of timeseries reconstructed from typical periods
+
+        Parameters
+        ----------
+        ts : :pandas:`pandas.DataFrame`
+            Timeseries of full timerange, see :func:`region_timeseries`
+
+        Returns
+        -------
+        :obj:`dict`
+            Errors per group of timeseries: RMSE of min-max normalized
+            timeseries ('rmse') and relative deviation of the sum of all
+            timeseries ('sum')
+        """
+        errors = {}
+        for group in ts.columns.get_level_values(0).unique():
+            values = ts[group].values
+            values_rec = values[self._full_positions[self.index_map]]
+            value_min = values.min(axis=0)
+            value_range = values.max(axis=0) - value_min
+            value_range[value_range == 0] = 1
+            sum_total = np.abs(values).sum()
+            errors[group] = {
+                'rmse': float(np.sqrt(
+                    (((values_rec - values) / value_range) ** 2).mean())),
+                'sum': float((values_rec.sum() - values.sum()) / sum_total)
+                if sum_total > 0 else 0.
+            }
+        return errors
+
+    def meta(self):
+        """Meta infos of typical periods
+
+        Returns
+        -------
+        :obj:`dict`
+            Period length, start and number of represented periods of each
+            typical period and reconstruction errors
+        """
+        return {
+            'period_length': self.period_length,
+            'periods': {
+                str(self.full_index[period * self.period_length]):
+                    float(self.weights[n * self.period_length:
+                                       (n + 1) * self.period_length].sum() /
+                          self.period_length)
+                for n, period in enumerate(self.periods)
+            },
+            'errors': self.errors
+        }
+
+
+def aggregate_timeseries(region, periods, period_length=24,
+                         peak_period=True):
+    """Aggregate region's timeseries to typical periods
+
+    The timeseries of demand, feedin, DSM and temperature (see
+    :func:`region_timeseries`) are min-max normalized per column, all
+    columns of a group are weighted equally and each group contributes
+    equally to the distance of two periods. The periods are clustered using
+    :func:`k_medoids`, the medoids are used as typical periods (real
+    periods of the timerange, hence all timeseries of a typical period are
+    consistent).
+
+    Parameters
+    ----------
+    region : :class:`~.model.Region`
+        Region object
+    periods : :obj:`int`
+        Number of typical periods
+    period_length : :obj:`int`
+        Number of timesteps per period, e.g. 24 for typical days at hourly
+        resolution. Must be a multiple of the DSM shift interval.
+    peak_period : :obj:`bool`
+        Add period with peak electrical residual load (demand - feedin) as
+        additional typical period
+
+    Returns
+    -------
+    :class:`TypicalPeriods`
+        Typical periods
+    """
+    datetime_index = pd.date_range(start=region.cfg['date_from'],
+                                   end=region.cfg['date_to'],
+                                   freq=region.cfg['freq'])
+    n_periods = len(datetime_index) // period_length
+    if not 0 < periods < n_periods:
+        msg = f'Number of typical periods must be between 1 and ' \
+              f'{n_periods - 1} (timerange has {n_periods} full periods).'
+        logger.error(msg)
+        raise ValueError(msg)
+
+    # DSM shift intervals must not span multiple periods
+    dsm_cfg = region.cfg['scn_data']['flexopt']['dsm']['params']
+    if dsm_cfg['hh_share'] > 0 and (
+            dsm_cfg['method'] != 'interval' or
+            period_length % int(dsm_cfg['shift_interval']) != 0):
+        msg = f'Typical periods require DSM method interval with a shift ' \
+              f'interval which divides the period length ({period_length}).'
+        logger.error(msg)
+        raise ValueError(msg)
+
+    ts = region_timeseries(region, datetime_index)
+
+    # normalize, weight columns by 1/sqrt(columns per group) to weight
+    # groups equally in squared distances
+    values = ts.values.astype(float)
+    value_min = values.min(axis=0)
+    value_range = values.max(axis=0) - value_min
+    value_range[value_range == 0] = 1
+    group_size = ts.columns.get_level_values(0).value_counts()
+    values = (values - value_min) / value_range / np.sqrt(
+        group_size[ts.columns.get_level_values(0)].values)
+
+    features = values[:n_periods * period_length].reshape(n_periods, -1)
+    sq_norms = (features ** 2).sum(axis=1)
+    distances = np.sqrt(np.maximum(
+        sq_norms[:, np.newaxis] + sq_norms[np.newaxis, :] -
+        2 * features @ features.T, 0))
+
+    medoids, clusters = k_medoids(distances, periods)
+    period_medoids = medoids[clusters]
+
+    if peak_period:
+        el_demand = sum(region.demand_ts[sector]
+                        for sector in region.demand_ts
+                        if sector.startswith('el_'))
+        el_feedin = sum(region.feedin_ts[tech]
+                        for tech in region.feedin_ts
+                        if tech != 'solar_heat')
+        residual_load = (el_demand - el_feedin).loc[datetime_index].sum(
+            axis=1)
+        peak = int(np.argmax(residual_load.values)) // period_length
+        if peak < n_periods and peak not in medoids:
+            period_medoids[peak] = peak
+
+    # map remaining incomplete period to typical period with most similar
+    # first timesteps
+    remainder = values[n_periods * period_length:].ravel()
+    if len(remainder) > 0:
+        period_medoids = np.append(
+            period_medoids,
+            min(np.unique(period_medoids),
+                key=lambda period: np.sum((features[
+                    period, :len(remainder)] - remainder) ** 2)))
+
+    typical_periods = TypicalPeriods(full_index=datetime_index,
+                                     period_length=period_length,
+                                     period_medoids=period_medoids)
+    typical_periods.errors = typical_periods.reconstruction_errors(ts)
+
+    logger.info(f'Timeseries aggregated to {len(typical_periods.periods)} '
+                f'typical periods ({len(typical_periods.datetime_index)} of '
+                f'{len(datetime_index)} timesteps), errors: ' +
+                ', '.join(f'{group} RMSE {err["rmse"]:.3f}, '
+                          f'sum {err["sum"]:+.2%}'
+                          for group, err in typical_periods.errors.items()))
+
+    return typical_periods
+
+
+def link_typical_period_storages(om, typical_periods):
+    """Link storage levels within typical periods
+
+    The storage balance of the first timestep of each typical period refers
+    to the storage level of the last timestep of the same period (instead
+    of the preceding typical period), hence each typical period is cyclic
+    and no energy is shifted between periods which are not consecutive.
+    The balance over the entire timerange is implied (the constraint
+    `balanced_cstr` is deactivated).
+
+    Parameters
+    ----------
+    om : :class:`OperationalModel <oemof.solph.Model>`
+        Instance of oemof.solph operational model built on timesteps of
+        typical periods
+    typical_periods : :class:`TypicalPeriods`
+        Typical periods
+    """
+    period_length = typical_periods.period_length
+    period_starts = list(range(0, len(typical_periods.datetime_index),
+                               period_length))
+
+    for block_name, storages_name in [
+            ('GenericStorageBlock', 'STORAGES'),
+            ('GenericInvestmentStorageBlock', 'INVESTSTORAGES')]:
+        block = getattr(om, block_name, None)
+        if block is None:
+            continue
+        storages = list(getattr(block, storages_name))
+        if not storages:
+            continue
+
+        for n in storages:
+            block.balance_first[n].deactivate()
+            for t in period_starts[1:]:
+                block.balance[n, t].deactivate()
+        if hasattr(block, 'balanced_cstr'):
+            block.balanced_cstr.deactivate()
+
+        inflows = {n: list(n.inputs)[0] for n in storages}
+        outflows = {n: list(n.outputs)[0] for n in storages}
+
+        def _storage_balance_period_rule(block, n, t):
+            """Storage balance of first timestep of typical period"""
+            expr = 0
+            expr += block.capacity[n, t]
+            expr += - block.capacity[n, t + period_length - 1] * (
+                1 - n.loss_rate[t])
+            expr += (- om.flow[inflows[n], n, t] *
+                     n.inflow_conversion_factor[t]) * om.timeincrement[t]
+            expr += (om.flow[n, outflows[n], t] /
+                     n.outflow_conversion_factor[t]) * om.timeincrement[t]
+            return expr == 0
+        block.balance_typical_period = Constraint(
+            storages, period_starts, rule=_storage_balance_period_rule)
+
+
+def weight_dsm_costs(om):
+    """Weight costs of DSM activity in objective by timestep weights
+
+    The costs of :class:`~oemof.solph.custom.SinkDSM` are not weighted by
+    oemof.
+
+    Parameters
+    ----------
+    om : :class:`OperationalModel <oemof.solph.Model>`
+        Instance of oemof.solph operational model
+    """
+    block = getattr(om, 'SinkDSMIntervalBlock', None)
+    if block is None:
+        return
+    # components of DSM block as of oemof 0.3.2
+    if not all(hasattr(block, attr)
+               for attr in ['cost', 'dsm', 'dsm_up', 'dsm_do']):
+        logger.warning('DSM block of oemof version not supported, costs of '
+                       'DSM activity are not weighted!')
+        return
+
+    block.cost.set_value(sum(
+        (block.dsm_up[g, t] * g.cost_dsm_up +
+         block.dsm_do[g, t] * g.cost_dsm_down) * om.objective_weighting[t]
+        for t in om.TIMESTEPS
+        for g in block.dsm))
+
+
+def create_typical_periods_model(esys, typical_periods):
+    """Create optimization model on timesteps of typical periods
+
+    The timesteps are weighted in the objective, storages are linked within
+    typical periods (see :func:`link_typical_period_storages`).
+
+    Note: The full load hours constraints (`summed_min`, `summed_max`) are
+    not weighted by oemof, they refer to the timesteps of the typical
+    periods (unweighted).
+
+    Parameters
+    ----------
+    esys : oemof.solph.EnergySystem
+        Energy system with :attr:`TypicalPeriods.datetime_index` as time
+        index
+    typical_periods : :class:`TypicalPeriods`
+        Typical periods
+
+    Returns
+    -------
+    oemof.solph.OperationalModel
+    """
+    om = solph.Model(esys,
+                     timeincrement=typical_periods.timeincrement,
+                     objective_weighting=typical_periods.objective_weighting)
+    link_typical_period_storages(om, typical_periods)
+    weight_dsm_costs(om)
+
+    return om
@@ -2,13 +2,16 @@ import os
 import pandas as pd
 import oemof.solph as solph
 from pyomo.environ import Constraint
-from windnode_abw.tools.logger import log_memory_usage
+from windnode_abw.tools.logger import log_memory_usage, profile_stage
 import logging
 
 logger = logging.getLogger('windnode_abw')
 
 from windnode_abw.model.region.tools import calc_heat_pump_cops, \
-    calc_dsm_cap_down, calc_dsm_cap_up, create_maintenance_timeseries
+    calc_dsm_cap_down, calc_dsm_cap_up, create_maintenance_timeseries, \
+    prepare_el_node_timeseries
+from windnode_abw.model.region.aggregation import \
+    create_typical_periods_model
 
 
 def simulate(om, solver='cbc', verbose=True, keepfiles=False):
@@ -40,7 +43,7 @@ def simulate(om, solver='cbc', verbose=True, keepfiles=False):
     return om
 
 
-def create_oemof_model(region, save_lp=False):
+def create_oemof_model(region, save_lp=False, typical_periods=None):
     """Create oemof model using config and data files. An oemof energy system
     is created, nodes are added and parametrized.
 
@@ -50,6 +53,10 @@ def create_oemof_model(region, save_lp=False):
         Region object
     save_lp : :obj:`bool`
         Triggers dump of lp file
+    typical_periods : :class:`~.model.region.aggregation.TypicalPeriods`
+        If passed, the model is built on the timesteps of the typical
+        periods (see :func:`~.model.region.aggregation.aggregate_timeseries`)
+        instead of the full timerange
 
     Returns
     -------
@@ -59,32 +66,38 @@ def create_oemof_model(region, save_lp=False):
     logger.info('Create energy system...')
 
     # create time index
-    datetime_index = pd.date_range(start=region.cfg['date_from'],
-                                   end=region.cfg['date_to'],
-                                   freq=region.cfg['freq'])
+    if typical_periods is None:
+        datetime_index = pd.date_range(start=region.cfg['date_from'],
+                                       end=region.cfg['date_to'],
+                                       freq=region.cfg['freq'])
+    else:
+        datetime_index = typical_periods.datetime_index
 
     # init energy system
     esys = solph.EnergySystem(timeindex=datetime_index)
 
     # create and add nodes
-    el_nodes = create_el_model(
-        region=region,
-        datetime_index=datetime_index
-    )
+    with profile_stage('create_el_model'):
+        el_nodes = create_el_model(
+            region=region,
+            datetime_index=datetime_index
+        )
     esys.add(*el_nodes)
 
-    th_nodes = create_th_model(
-        region=region,
-        datetime_index=datetime_index,
-        esys_nodes=el_nodes
-    )
+    with profile_stage('create_th_model'):
+        th_nodes = create_th_model(
+            region=region,
+            datetime_index=datetime_index,
+            esys_nodes=el_nodes
+        )
     esys.add(*th_nodes)
 
-    flex_nodes = create_flexopts(
-        region=region,
-        datetime_index=datetime_index,
-        esys_nodes=th_nodes+el_nodes
-    )
+    with profile_stage('create_flexopts'):
+        flex_nodes = create_flexopts(
+            region=region,
+            datetime_index=datetime_index,
+            esys_nodes=th_nodes+el_nodes
+        )
     esys.add(*flex_nodes)
 
     logger.info(f'Energy system created '
@@ -99,7 +112,11 @@ def create_oemof_model(region, save_lp=False):
     log_memory_usage()
     logger.info('Create optimization problem...')
 
-    om = solph.Model(esys)
+    with profile_stage('create_solph_model'):
+        if typical_periods is None:
+            om = solph.Model(esys)
+        else:
+            om = create_typical_periods_model(esys, typical_periods)
 
     # Add electricity import limit
     el_import_limit = region.cfg['scn_data']['grid']['extgrid'][
@@ -165,51 +182,67 @@ def create_el_model(region=None, datetime_index=None):
     # get el. sectors from cfg
     el_sectors = region.cfg['scn_data']['demand']['dem_el_general']['sectors']
 
-    # get el. demand profile type for households and DSM status from cfg
-    hh_profile_type = scn_data['demand']['dem_el_hh']['profile_type']
+    # get DSM status from cfg
     hh_dsm_share = scn_data['flexopt']['dsm']['params']['hh_share']
 
-    # create nodes for all municipalities
-    for ags, mundata in region.muns.iterrows():
-        # get buses for subst in mun
-        mun_buses = region.buses.loc[region.subst.loc[mundata.subst_id].bus_id]
-
-        # note: timeseries are distributed equally to all buses of mun
-        for bus_id, busdata in mun_buses.iterrows():
-            # generators
-            for tech, feedin_ts in {t: ts[ags] for t, ts
-                                in region.feedin_ts.items()
-                                if t in scn_data[
-                    'generation']['gen_el']['technologies']}.items():
-                outflow_args = {
+    # precompute feedin and demand timeseries per bus
+    # note: timeseries are distributed equally to all buses of mun
+    el_ts = prepare_el_node_timeseries(region=region,
+                                       datetime_index=datetime_index)
+
+    # create nodes for all municipalities and their buses
+    for col, (ags, bus_id) in enumerate(el_ts['mun_buses']):
+        # generators
+        for n, tech in enumerate(el_ts['feedin_techs']):
+            outflow_args = {
+                'nominal_value': 1,
+                'fixed':  True,
+                'actual_value': list(el_ts['feedin'][:, col, n]),
+                'variable_costs': region.tech_assumptions_scn.loc[
+                    tech]['opex_var'],
+                'emissions': region.tech_assumptions_scn.loc[
+                    tech]['emissions_var']
+                }
+
+            # create node only if feedin sum is >0
+            if el_ts['feedin_sum'].loc[ags, tech] > 0:
+                nodes.append(
+                    solph.Source(
+                        label=f'gen_el_{ags}_b{bus_id}_{tech}',
+                        outputs={buses[bus_id]: solph.Flow(**outflow_args)})
+                )
+
+        for sector in el_sectors:
+            if sector in ['rca', 'ind']:
+                inflow_args = {
                     'nominal_value': 1,
                     'fixed':  True,
-                    'actual_value': list((feedin_ts /
-                                          len(mun_buses))[datetime_index]),
-                    'variable_costs': region.tech_assumptions_scn.loc[
-                        tech]['opex_var'],
-                    'emissions': region.tech_assumptions_scn.loc[
-                        tech]['emissions_var']
-                    }
-
-                # create node only if feedin sum is >0
-                if feedin_ts.sum(axis=0) > 0:
-                    nodes.append(
-                        solph.Source(
-                            label=f'gen_el_{ags}_b{bus_id}_{tech}',
-                            outputs={buses[bus_id]: solph.Flow(**outflow_args)})
+                    'actual_value': list(el_ts['demand'][
+                        :, col, el_ts['demand_sectors'].index(sector)])
+                }
+                nodes.append(
+                    solph.Sink(
+                        label=f'dem_el_{ags}_b{bus_id}_{sector}',
+                        inputs={buses[bus_id]: solph.Flow(
+                            **inflow_args)})
+                )
+            elif sector == 'hh':
+                # deactivate hh_sinks if DSM is 100% in scenario config,
+                # reduce load otherwise
+                if hh_dsm_share == 1:
+                    pass
+                elif 1 > hh_dsm_share >= 0:
+                    # profile type (SLP or IÖW) is considered in precompute
+                    actual_value = list(
+                        el_ts['demand'][
+                            :, col, el_ts['demand_sectors'].index(sector)] *
+                        (1 - hh_dsm_share)
                     )
 
-            for sector in el_sectors:
-                if sector in ['rca', 'ind']:
                     inflow_args = {
                         'nominal_value': 1,
-                        'fixed':  True,
-                        'actual_value': list(
-                            (region.demand_ts[f'el_{sector}'][ags] /
-                             len(mun_buses)
-                             )[datetime_index]
-                        )
+                        'fixed': True,
+                        'actual_value': actual_value
                     }
                     nodes.append(
                         solph.Sink(
@@ -217,44 +250,14 @@ def create_el_model(region=None, datetime_index=None):
                             inputs={buses[bus_id]: solph.Flow(
                                 **inflow_args)})
                     )
-                elif sector == 'hh':
-                    # deactivate hh_sinks if DSM is 100% in scenario config,
-                    # reduce load otherwise
-                    if hh_dsm_share == 1:
-                        pass
-                    elif 1 > hh_dsm_share >= 0:
-                        if hh_profile_type == 'ioew':
-                            actual_value = list(
-                                (region.dsm_ts['Lastprofil'][ags] /
-                                 len(mun_buses)
-                                 )[datetime_index] * (1 - hh_dsm_share)
-                            )
-                        else:
-                            actual_value = list(
-                                (region.demand_ts[f'el_{sector}'][ags] /
-                                 len(mun_buses)
-                                 )[datetime_index] * (1 - hh_dsm_share)
-                            )
-
-                        inflow_args = {
-                            'nominal_value': 1,
-                            'fixed': True,
-                            'actual_value': actual_value
-                        }
-                        nodes.append(
-                            solph.Sink(
-                                label=f'dem_el_{ags}_b{bus_id}_{sector}',
-                                inputs={buses[bus_id]: solph.Flow(
-                                    **inflow_args)})
-                        )
-                    else:
-                        msg = 'cfg parameter hh_share must be in range 0..1'
-                        logger.error(msg)
-                        raise ValueError(msg)
                 else:
-                    msg = 'Invalid power demand sector'
+                    msg = 'cfg parameter hh_share must be in range 0..1'
                     logger.error(msg)
                     raise ValueError(msg)
+            else:
+                msg = 'Invalid power demand sector'
+                logger.error(msg)
+                raise ValueError(msg)
 
     ################
     # TRANSFORMERS #
@@ -1560,25 +1563,19 @@ def imported_electricity_limit(om, limit):
                          for (i, o) in om.FLOWS
                          if isinstance(i, solph.custom.Link)]
 
+    def _sum_flows(om, flows):
+        # weight timesteps (typical periods), equals time increment otherwise
+        return sum(om.flow[i, o, t] * om.objective_weighting[t]
+                   for (i, o) in flows
+                   for t in om.TIMESTEPS)
+
     def _import_limit_rule(om):
-        lhs = sum(om.flow[i, o, t]
-                  for (i, o) in import_flows
-                  for t in om.TIMESTEPS)
-        rhs = limit * (sum(om.flow[i, o, t]
-                           for (i, o) in el_demand_flows
-                           for t in om.TIMESTEPS) +
-                       sum(om.flow[i, o, t]
-                           for (i, o) in battery_storage_charge_flows
-                           for t in om.TIMESTEPS) -
-                       sum(om.flow[i, o, t]
-                           for (i, o) in battery_storage_discharge_flows
-                           for t in om.TIMESTEPS) +
-                       sum(om.flow[i, o, t]
-                           for (i, o) in grid_flows_to_grid
-                           for t in om.TIMESTEPS) -
-                       sum(om.flow[i, o, t]
-                           for (i, o) in grid_flows_to_bus
-                           for t in om.TIMESTEPS)
+        lhs = _sum_flows(om, import_flows)
+        rhs = limit * (_sum_flows(om, el_demand_flows) +
+                       _sum_flows(om, battery_storage_charge_flows) -
+                       _sum_flows(om, battery_storage_discharge_flows) +
+                       _sum_flows(om, grid_flows_to_grid) -
+                       _sum_flows(om, grid_flows_to_bus)
                        )
 
         return lhs <= rhs
@@ -5,6 +5,7 @@ import pandas as pd
 from pandas import compat
 import networkx as nx
 import matplotlib.pyplot as plt
+import numpy as np
 from numpy import nan
 
 import oemof.solph as solph
@@ -369,29 +370,21 @@ def prepare_feedin_timeseries(region):
                               'gen_capacity_conventional_small'],
                      inplace=True)
 
-    # adjust feedin ts columns
-    region.feedin_ts_init = pd.concat(
-        [region.feedin_ts_init,
-         region.feedin_ts_init[['pv_roof']].rename(
-             columns={'pv_roof': 'pv_roof_small'})],
-        axis=1)
-    region.feedin_ts_init.rename(columns={'pv_roof': 'pv_roof_large'},
-                                 inplace=True)
-
-    region.feedin_ts_init.drop(
-        columns=['wind_fs' if status_quo
-                 else 'wind_sq'
-                 ],
-        level=0,
-        inplace=True
-    )
+    # timeseries per technology: both PV rooftop technologies use the PV
+    # rooftop timeseries, feedin_ts_init is not modified as it may be a
+    # read-only memory map shared across processes (see attach_db_data())
+    # which would be copied entirely
+    ts_techs = {tech: 'pv_roof' if tech in ['pv_roof_small', 'pv_roof_large']
+                else tech
+                for tech in cap_per_mun.columns}
 
     # calculate capacity(mun)-weighted aggregated feedin timeseries for entire region:
     # 1) process relative TS
     feedin_agg = {}
     for tech in list(cap_per_mun.loc[:,
                      cap_per_mun.columns != 'conventional'].columns):
-        feedin_agg[tech] = region.feedin_ts_init[tech] * cap_per_mun[tech]
+        feedin_agg[tech] = region.feedin_ts_init[ts_techs[tech]] * \
+                           cap_per_mun[tech]
 
     # 2) process absolute TS (conventional plants)
     # do not use capacities as the full load hours of the plants differ - use
@@ -478,6 +471,88 @@ def prepare_temp_timeseries(region):
     return temp_ts
 
 
+def prepare_el_node_timeseries(region, datetime_index):
+    """Precompute feedin and demand timeseries of el. generators and demand
+    nodes per bus
+
+    As in the model, timeseries of each municipality are distributed equally
+    to the municipality's buses (share: 1 / number of buses). The data of all
+    buses is stored in one array for feedin and one for demand, so that node
+    creation only needs to slice columns.
+
+    Parameters
+    ----------
+    region : :class:`~.model.Region`
+        Region object
+    datetime_index : :pandas:`pandas.DatetimeIndex`
+        Datetime index of simulation timerange
+
+    Returns
+    -------
+    :obj:`dict`
+        Keys:
+        * 'mun_buses': :obj:`list` of :obj:`tuple` (ags, bus id), in order of
+          municipalities and their buses (2nd dimension of arrays)
+        * 'feedin_techs': :obj:`list` of generator technologies enabled in
+          scenario (3rd dimension of feedin array)
+        * 'feedin': :obj:`numpy.ndarray` of feedin (time x bus x tech)
+        * 'feedin_sum': :pandas:`pandas.DataFrame` of feedin sum per
+          municipality (unrestricted timerange) and technology (column)
+        * 'demand_sectors': :obj:`list` of el. demand sectors (3rd dimension
+          of demand array)
+        * 'demand': :obj:`numpy.ndarray` of demand (time x bus x sector),
+          household demand according to profile type set in scenario
+    """
+    scn_data = region.cfg['scn_data']
+
+    mun_buses = [(ags, bus_id)
+                 for ags, mundata in region.muns.iterrows()
+                 for bus_id in region.buses.loc[
+                     region.subst.loc[mundata.subst_id].bus_id].index]
+    mun_buses_ags = [ags for ags, _ in mun_buses]
+    mun_buses_count = pd.Series(mun_buses_ags).value_counts()[
+        mun_buses_ags].to_numpy()
+
+    def distribute(ts):
+        """Distribute timeseries of municipalities (DF columns) to buses"""
+        return ts.loc[datetime_index, mun_buses_ags].to_numpy() / \
+            mun_buses_count
+
+    # generators
+    feedin_techs = [
+        tech for tech in region.feedin_ts.keys()
+        if tech in scn_data['generation']['gen_el']['technologies']]
+    feedin = np.empty((len(datetime_index), len(mun_buses),
+                       len(feedin_techs)))
+    for n, tech in enumerate(feedin_techs):
+        feedin[:, :, n] = distribute(region.feedin_ts[tech])
+    feedin_sum = pd.DataFrame({tech: region.feedin_ts[tech].sum(axis=0)
+                               for tech in feedin_techs})
+
+    # demand
+    demand_ts = {
+        'rca': region.demand_ts['el_rca'],
+        'ind': region.demand_ts['el_ind'],
+        'hh': region.dsm_ts['Lastprofil']
+        if scn_data['demand']['dem_el_hh']['profile_type'] == 'ioew'
+        else region.demand_ts['el_hh']
+    }
+    demand_sectors = [
+        sector for sector in scn_data['demand']['dem_el_general']['sectors']
+        if sector in demand_ts.keys()]
+    demand = np.empty((len(datetime_index), len(mun_buses),
+                       len(demand_sectors)))
+    for n, sector in enumerate(demand_sectors):
+        demand[:, :, n] = distribute(demand_ts[sector])
+
+    return {'mun_buses': mun_buses,
+            'feedin_techs': feedin_techs,
+            'feedin': feedin,
+            'feedin_sum': feedin_sum,
+            'demand_sectors': demand_sectors,
+            'demand': demand}
+
+
 def calc_heat_pump_cops(t_high, t_low, quality_grade, consider_icing=False,
                         temp_icing=None, factor_icing=None, spf=None, year=2017):
     """Calculate temperature-dependent COP of heat pumps including efficiency
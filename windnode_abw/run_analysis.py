@@ -21,6 +21,8 @@ if __name__ == "__main__":
 
     regions_scns, results_scns = analysis(run_timestamp=run_timestamp,
                                           scenarios=scenarios,
-                                          force_new_results=False)
+                                          force_new_results=False,
+                                          processes=1,
+                                          raise_errors=False)
 
     logger.info('===== All done! =====')
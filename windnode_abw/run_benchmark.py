@@ -0,0 +1,342 @@
+# define and setup logger
+from windnode_abw.tools.logger import setup_logger
+logger = setup_logger()
+
+import argparse
+import time
+from copy import deepcopy
+import pandas as pd
+
+from sqlalchemy.orm import sessionmaker
+
+# load configs
+from windnode_abw.tools import config
+config.load_config('config_data.cfg')
+config.load_config('config_misc.cfg')
+
+from windnode_abw.tools.data_io import db_engine, query_timeseries, \
+    read_sql_copy, load_scenario_cfg, load_results
+from windnode_abw.model import Region
+from windnode_abw.model.region.model import create_el_model, \
+    create_th_model, create_flexopts
+from windnode_abw.analysis.tools import FLOW_EXTRACTOR, \
+    extract_flows_timexagsxtech, _ags_index2int
+from windnode_abw.config.db_models import WnAbwDemandTs, WnAbwFeedinTs, \
+    WnAbwDsmTs
+
+
+def timeit(func, repeat=3):
+    """Measure execution time of function
+
+    Parameters
+    ----------
+    func : callable
+        Function to be measured (no args)
+    repeat : :obj:`int`
+        Number of repetitions
+
+    Returns
+    -------
+    :obj:`float`
+        Min. execution time in seconds
+    object
+        Return value of last call
+    """
+    times = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - time_start)
+
+    return min(times), result
+
+
+def benchmark_db_fetch(db_section='windnode_abw', repeat=3):
+    """Benchmark fetching of large timeseries tables: ORM query
+    (:pandas:`pandas.read_sql_query`) vs. COPY
+    (:func:`~.tools.data_io.read_sql_copy`)
+
+    Use the docker-compose PostGIS service (see docs) to get comparable
+    results.
+
+    Parameters
+    ----------
+    db_section : :obj:`str`
+        Database section in ego.io db config
+    repeat : :obj:`int`
+        Number of repetitions per table and method (min. time is used)
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Execution times in seconds per table and method
+    """
+    tables = {
+        'demand_ts_init': (WnAbwDemandTs,
+                           ['el_hh', 'el_rca', 'el_ind', 'th_hh_efh',
+                            'th_hh_mfh', 'th_rca']),
+        'feedin_ts_init': (WnAbwFeedinTs,
+                           ['wind_sq', 'wind_fs', 'pv_ground', 'pv_roof',
+                            'hydro', 'bio', 'conventional', 'solar_heat']),
+        'dsm_ts': (WnAbwDsmTs,
+                   ['Lastprofil', 'Flex_Minus', 'Flex_Minus_Max',
+                    'Flex_Plus', 'Flex_Plus_Max'])
+    }
+
+    engine = db_engine(db_section, pool_size=1)
+    session = sessionmaker(bind=engine)()
+
+    results = {}
+    for name, (table, columns) in tables.items():
+        query = query_timeseries(session, table, columns)
+
+        time_orm, data_orm = timeit(
+            lambda: pd.read_sql_query(query.statement, session.bind),
+            repeat=repeat)
+        time_copy, data_copy = timeit(
+            lambda: read_sql_copy(query, session),
+            repeat=repeat)
+
+        # both methods must return the same data
+        pd.testing.assert_frame_equal(data_orm, data_copy, check_dtype=False)
+
+        results[name] = {'rows': len(data_orm),
+                         'orm': time_orm,
+                         'copy': time_copy,
+                         'speedup': time_orm / time_copy}
+        logger.info(f'{name}: ORM {time_orm:.2f} s, COPY {time_copy:.2f} s')
+
+    session.close()
+    engine.dispose()
+
+    return pd.DataFrame(results).T
+
+
+def benchmark_model_build(scenario='ISE_DSM_BAT_PTH', data_source='db',
+                          repeat=3):
+    """Benchmark creation of oemof nodes: with vs. without cached scenario
+    data in :class:`~.model.Region` (e.g.
+    :attr:`~.model.Region.tech_assumptions_scn`)
+
+    Nodes are created by :func:`~.model.region.model.create_el_model`,
+    :func:`~.model.region.model.create_th_model` and
+    :func:`~.model.region.model.create_flexopts`.
+
+    Parameters
+    ----------
+    scenario : :obj:`str`
+        Scenario to be used
+    data_source : :obj:`str`
+        Data source, see :func:`~.tools.data_io.create_data_source`
+    repeat : :obj:`int`
+        Number of repetitions per method (min. time is used)
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Execution times in seconds per method
+    """
+    cfg = {
+        'scenario': scenario,
+        'date_from': '2015-01-01 00:00:00',
+        'date_to': '2015-12-31 23:00:00',
+        'freq': '60min',
+        'data_source': data_source,
+        'db_cache': True,
+        'db_pool_size': 4,
+        'db_copy': True
+    }
+    cfg['scn_data'] = load_scenario_cfg(cfg['scenario'])
+    region = Region.import_data(cfg)
+
+    datetime_index = pd.date_range(start=cfg['date_from'],
+                                   end=cfg['date_to'],
+                                   freq=cfg['freq'])
+
+    def build_nodes(cache):
+        # the model creation modifies cfg params, use fresh cfg per run
+        region.cfg = deepcopy(cfg)
+        if not cache:
+            # bypass cache: create data on every access
+            region._scn_cached = lambda name, func: func(
+                region.cfg['scn_data']['general']['year'])
+        el_nodes = create_el_model(region=region,
+                                   datetime_index=datetime_index)
+        th_nodes = create_th_model(region=region,
+                                   datetime_index=datetime_index,
+                                   esys_nodes=el_nodes)
+        flex_nodes = create_flexopts(region=region,
+                                     datetime_index=datetime_index,
+                                     esys_nodes=th_nodes + el_nodes)
+        if not cache:
+            del region._scn_cached
+        return len(el_nodes) + len(th_nodes) + len(flex_nodes)
+
+    time_nocache, nodes_nocache = timeit(lambda: build_nodes(cache=False),
+                                         repeat=repeat)
+    time_cache, nodes_cache = timeit(lambda: build_nodes(cache=True),
+                                     repeat=repeat)
+
+    # both methods must create the same number of nodes
+    assert nodes_nocache == nodes_cache
+
+    logger.info(f'Model build ({nodes_cache} nodes): without cache '
+                f'{time_nocache:.2f} s, with cache {time_cache:.2f} s')
+
+    return pd.DataFrame({scenario: {'nodes': nodes_cache,
+                                    'without_cache': time_nocache,
+                                    'with_cache': time_cache,
+                                    'speedup': time_nocache / time_cache}}).T
+
+
+def _extract_flows_wide_to_long(results_raw, node_pattern, bus_pattern,
+                                stubname, level_flow_in=0, level_flow_out=1,
+                                unstack_col="technology"):
+    """Reference implementation of
+    :func:`~.analysis.tools.extract_flows_timexagsxtech` using
+    :pandas:`pandas.wide_to_long`
+    """
+    flows_extract = results_raw.loc[:,
+                    results_raw.columns.get_level_values(level_flow_in).str.match("_".join([
+                        stubname, node_pattern]))
+                    & results_raw.columns.get_level_values(level_flow_out).str.match(bus_pattern)]
+
+    flows_extract = flows_extract.sum(level=level_flow_in, axis=1)
+    flows_extract.index.name = "timestamp"
+    flows_extract = flows_extract.reset_index()
+    flows_extracted_long = pd.wide_to_long(flows_extract, stubnames=stubname, i="timestamp", j="ags_tech", sep="_",
+                                           suffix=node_pattern)
+
+    idx_new = [list(flows_extracted_long.index.get_level_values(0))]
+    idx_split = flows_extracted_long.index.get_level_values(1).str.extract(node_pattern)
+    [idx_new.append(c[1].tolist()) for c in idx_split.iteritems()]
+    flows_extracted_long.index = pd.MultiIndex.from_arrays(
+        idx_new,
+        names=["timestamp"] + list(idx_split.columns))
+    flows_extracted_long.index = _ags_index2int(flows_extracted_long.index)
+
+    flows_formatted = flows_extracted_long.sum(level=list(range(len(idx_new))))
+    if unstack_col:
+        flows_formatted = flows_formatted[stubname].unstack(unstack_col, fill_value=0)
+
+    return flows_formatted
+
+
+def benchmark_flow_extraction(run_timestamp, scenario, repeat=3):
+    """Benchmark extraction of flows (time x ags x technology) from raw
+    results: wide-to-long conversion (reference) vs. grouped column sum
+    (:func:`~.analysis.tools.extract_flows_timexagsxtech`)
+
+    All extraction patterns used in the analysis are benchmarked (see
+    :data:`~.analysis.tools.FLOW_EXTRACTOR`). Use a full-year result to get
+    meaningful results.
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp of results
+    scenario : :obj:`str`
+        Scenario id
+    repeat : :obj:`int`
+        Number of repetitions per pattern and method (min. time is used)
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Execution times in seconds per pattern and method
+    """
+    results_raw = load_results(timestamp=run_timestamp, scenario=scenario)
+    if results_raw is None:
+        msg = f'Results of scenario {scenario} in run {run_timestamp} not ' \
+              f'found'
+        logger.error(msg)
+        raise ValueError(msg)
+    flows = results_raw['flows']
+
+    results = {}
+    for name, patterns in FLOW_EXTRACTOR.items():
+        try:
+            time_ref, data_ref = timeit(
+                lambda: _extract_flows_wide_to_long(flows, **patterns),
+                repeat=repeat)
+        except Exception:
+            # flows not contained in scenario results
+            logger.info(f'{name}: not found in results, skipping')
+            continue
+        time_new, data_new = timeit(
+            lambda: extract_flows_timexagsxtech(flows, **patterns),
+            repeat=repeat)
+
+        # both methods must return the same data
+        try:
+            pd.testing.assert_frame_equal(data_ref, data_new)
+            equal = True
+        except AssertionError:
+            equal = False
+            logger.warning(f'{name}: results differ')
+
+        results[name] = {'rows': len(data_new),
+                         'wide_to_long': time_ref,
+                         'grouped': time_new,
+                         'speedup': time_ref / time_new,
+                         'equal': equal}
+        logger.info(f'{name}: wide-to-long {time_ref:.2f} s, grouped '
+                    f'{time_new:.2f} s')
+
+    results = pd.DataFrame(results).T
+    results.loc['total'] = {
+        'rows': results['rows'].sum(),
+        'wide_to_long': results['wide_to_long'].sum(),
+        'grouped': results['grouped'].sum(),
+        'speedup': results['wide_to_long'].sum() / results['grouped'].sum(),
+        'equal': results['equal'].all()}
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='WindNODE ABW benchmarks.')
+    parser.add_argument('benchmark', type=str,
+                        choices=['db_fetch', 'model_build',
+                                 'flow_extraction'],
+                        help='Benchmark to be run')
+    parser.add_argument('--repeat', metavar='NUMBER', type=int, default=3,
+                        help='Number of repetitions (min. time is used)')
+    parser.add_argument('--db-section', type=str, dest='db_section',
+                        default='windnode_abw',
+                        help='Database section in ego.io db config, '
+                             'defaults to windnode_abw')
+    parser.add_argument('--scenario', type=str, default='ISE_DSM_BAT_PTH',
+                        help='Scenario used in model build benchmark, '
+                             'defaults to ISE_DSM_BAT_PTH')
+    parser.add_argument('--data-source', type=str, dest='data_source',
+                        default='db', choices=['db', 'files'],
+                        help='Data source used in model build benchmark, '
+                             'defaults to db')
+    parser.add_argument('--run-timestamp', type=str, dest='run_timestamp',
+                        help='Run timestamp of results used in flow '
+                             'extraction benchmark (full year), e.g. '
+                             '2020-08-05_024335')
+    parser.add_argument('--scenario-id', type=str, dest='scn_id',
+                        default='ISE_DSM_BAT_PTH',
+                        help='Scenario id of results used in flow extraction '
+                             'benchmark, defaults to ISE_DSM_BAT_PTH')
+    args = parser.parse_args()
+
+    if args.benchmark == 'db_fetch':
+        results = benchmark_db_fetch(db_section=args.db_section,
+                                     repeat=args.repeat)
+    elif args.benchmark == 'model_build':
+        results = benchmark_model_build(scenario=args.scenario,
+                                        data_source=args.data_source,
+                                        repeat=args.repeat)
+    elif args.benchmark == 'flow_extraction':
+        if args.run_timestamp is None:
+            parser.error('--run-timestamp is required for flow extraction '
+                         'benchmark')
+        results = benchmark_flow_extraction(run_timestamp=args.run_timestamp,
+                                            scenario=args.scn_id,
+                                            repeat=args.repeat)
+
+    print(results.to_string())
@@ -0,0 +1,37 @@
+# define and setup logger
+from windnode_abw.tools.logger import setup_logger
+logger = setup_logger()
+
+import argparse
+
+# load configs
+from windnode_abw.tools import config
+config.load_config('config_data.cfg')
+config.load_config('config_misc.cfg')
+
+from windnode_abw.tools.data_io import export_db_to_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Export WindNODE ABW DB tables to local files to run the '
+                    'model without DB connection (set data_source to files '
+                    'in run config).')
+    parser.add_argument('--path', type=str, default=None,
+                        help='Target directory, defaults to '
+                             '~/.windnode_abw/data/db_export/')
+    parser.add_argument('--db-section', type=str, dest='db_section',
+                        default='windnode_abw',
+                        help='Database section in ego.io db config, '
+                             'defaults to windnode_abw')
+    parser.add_argument('--tables', metavar='TABLE', type=str, nargs='*',
+                        default=None,
+                        help='Tables to be exported (e.g. wn_abw_mun), '
+                             'defaults to all tables')
+    args = parser.parse_args()
+
+    export_db_to_files(db_section=args.db_section,
+                       path=args.path,
+                       tables=args.tables or None)
+
+    logger.info('===== All done! =====')
@@ -1,8 +1,10 @@
 # define and setup logger
-from windnode_abw.tools.logger import setup_logger, log_memory_usage
+from windnode_abw.tools.logger import setup_logger, log_memory_usage, \
+    profiler, profile_stage, MemorySampler
 logger = setup_logger()
 
 import os
+import gc
 import argparse
 import time
 import multiprocessing
@@ -11,24 +13,49 @@ from copy import deepcopy
 from windnode_abw import __path__ as wn_path
 from windnode_abw.model import Region
 from windnode_abw.model.region.model import simulate, create_oemof_model
+from windnode_abw.model.region.aggregation import aggregate_timeseries
 from windnode_abw.model.region.tools import calc_line_loading
 from windnode_abw.model.region.tools import grid_graph
 from windnode_abw.analysis import analysis
-from windnode_abw.analysis.tools import results_to_dataframes
+from windnode_abw.analysis.tools import results_to_dataframes, \
+    model_results_to_dataframes, iter_model_flows
 
 # load configs
 from windnode_abw.tools import config
 config.load_config('config_data.cfg')
 config.load_config('config_misc.cfg')
 
+from windnode_abw.tools.scheduler import estimate_scenario_resources, \
+    run_scheduled, AnalysisPipeline
 from windnode_abw.tools.draw import draw_graph, set_node_colors, debug_plot_results
-from windnode_abw.tools.data_io import load_scenario_cfg, export_results
+from windnode_abw.tools.data_io import load_scenario_cfg, export_results, \
+    export_stage_profile, load_run_manifest, load_run_config, \
+    update_run_manifest, validate_results, clear_results, clear_db_cache, \
+    import_db_data, share_db_data, attach_db_data, release_shared_db_data, \
+    ResultsWriter
 
 # import oemof modules
 import oemof.solph as solph
 import oemof.outputlib as outputlib
 from oemof.graph import create_nx_graph
 
+# spec of scenario-independent data shared across scenarios (set in
+# init_worker())
+_shared_data = None
+
+
+def init_worker(shared_data):
+    """Initialize worker process: set spec of shared data
+
+    Parameters
+    ----------
+    shared_data : :obj:`dict`
+        Spec of shared data as returned by
+        :func:`~.tools.data_io.share_db_data`
+    """
+    global _shared_data
+    _shared_data = shared_data
+
 
 def run_scenario(cfg):
     """Run scenario
@@ -42,6 +69,9 @@ def run_scenario(cfg):
     -------
     :obj:`str`
         Scenario name if model is infeasible, None otherwise.
+    :obj:`bool`
+        True if results are analyzed, False if the analysis failed, None if
+        the analysis is not performed (see `cfg['do_analysis']`).
     """
 
     # define paths
@@ -56,8 +86,23 @@ def run_scenario(cfg):
 
     cfg['scn_data'] = load_scenario_cfg(cfg['scenario'])
 
+    # record timing and memory usage of stages for this scenario, sample
+    # memory usage incl. child processes (solver) in background
+    profiler.reset()
+    if profiler.sampler is not None:
+        # stop sampler of previous scenario (if aborted)
+        profiler.sampler.stop()
+    profiler.sampler = MemorySampler(
+        interval=cfg.get('memory_sampling_interval', 1))
+    profiler.sampler.start()
+
     log_memory_usage()
-    region = Region.import_data(cfg)
+    # use shared data if available (import data from DB otherwise)
+    data = None
+    if _shared_data is not None:
+        with profile_stage('attach_db_data'):
+            data = attach_db_data(_shared_data)
+    region = Region.import_data(cfg, data=data)
 
     # Vergleich el load IÖW+SLP
     # import pandas as pd
@@ -68,12 +113,22 @@ def run_scenario(cfg):
 
     log_memory_usage()
 
+    # aggregate timeseries to typical periods (model is built on these)
+    typical_periods = None
+    if region.cfg['ts_aggregation']:
+        with profile_stage('aggregate_timeseries'):
+            typical_periods = aggregate_timeseries(
+                region=region,
+                **region.cfg['ts_aggregation'])
+
     # backup region's cfg using deepcopy to preserve state -> restored below.
     # this is needed as some cfg params are modified in the model creation.
     cfg_bkp = deepcopy(region.cfg)
 
-    esys, om = create_oemof_model(region=region,
-                                  save_lp=region.cfg['save_lp'])
+    with profile_stage('create_oemof_model'):
+        esys, om = create_oemof_model(region=region,
+                                      save_lp=region.cfg['save_lp'],
+                                      typical_periods=typical_periods)
 
     # restore region's cfg
     region.cfg = cfg_bkp
@@ -93,17 +148,21 @@ def run_scenario(cfg):
     # graph = grid_graph(region=region,
     #                    draw=True)
 
-    om = simulate(om=om,
-                  solver=region.cfg['solver'],
-                  verbose=region.cfg['solver_verbose'],
-                  keepfiles=region.cfg['solver_keepfiles'])
+    with profile_stage('simulate'):
+        om = simulate(om=om,
+                      solver=region.cfg['solver'],
+                      verbose=region.cfg['solver_verbose'],
+                      keepfiles=region.cfg['solver_keepfiles'])
 
     log_memory_usage()
     logger.info('Processing results...')
 
     if om.solver_results.Solver.Status.key == 'ok':
-        # add results to energy system
-        esys.results['main'] = outputlib.processing.results(om)
+        # add results to energy system (not needed if results are extracted
+        # directly from model)
+        if not region.cfg['results_direct']:
+            with profile_stage('process_results'):
+                esys.results['main'] = outputlib.processing.results(om)
         # add meta infos
         esys.results['meta'] = outputlib.processing.meta_results(om)
         # add om flows to allow access Flow objects
@@ -117,30 +176,98 @@ def run_scenario(cfg):
         infeasible = True
 
     # add initial params to energy system
-    esys.results['params'] = outputlib.processing.parameter_as_dict(esys)
+    with profile_stage('process_params'):
+        esys.results['params'] = outputlib.processing.parameter_as_dict(esys)
+
+    # write flows to disk while extracting them from model (see below)
+    stream_flows = region.cfg['results_streaming'] and \
+        region.cfg['results_direct'] and region.cfg['dump_results'] and \
+        region.cfg['results_format'] == 'parquet' and not infeasible
 
     # convert results to DF
-    results = results_to_dataframes(esys, infeasible)
+    with profile_stage('results_to_dataframes'):
+        results = results_to_dataframes(
+            esys, infeasible,
+            om=om if region.cfg['results_direct'] else None,
+            flows=not stream_flows)
+
+        # map results of typical periods to full timerange
+        if typical_periods is not None:
+            for name in ['flows', 'vars_stat']:
+                if name in results:
+                    results[name] = typical_periods.disaggregate(
+                        results[name])
 
     log_memory_usage()
 
     # dump raw results and meta info
     if region.cfg['dump_results']:
-        export_results(results=results,
-                       cfg=region.cfg,
-                       solver_meta=esys.results['meta'],
-                       infeasible=infeasible)
-
+        with profile_stage('export_results'):
+            results_path = export_results(results=results,
+                                          cfg=region.cfg,
+                                          solver_meta=esys.results['meta'],
+                                          infeasible=infeasible,
+                                          ts_aggregation=None
+                                          if typical_periods is None
+                                          else typical_periods.meta())
+
+    if stream_flows:
+        with profile_stage('export_flows'):
+            writer = ResultsWriter(
+                path=results_path,
+                name='flows',
+                float32=region.cfg['results_float32'],
+                compression=region.cfg['results_compression'])
+            try:
+                for flows in iter_model_flows(om):
+                    if typical_periods is not None:
+                        flows = typical_periods.disaggregate(flows)
+                    writer.write(flows)
+            except ValueError:
+                # flows cannot be extracted in groups, extract all at once
+                writer.abort()
+                flows = model_results_to_dataframes(om)['flows']
+                if typical_periods is not None:
+                    flows = typical_periods.disaggregate(flows)
+                writer.write(flows)
+            flows = None
+
+            # free model before flows file is assembled
+            del om
+            gc.collect()
+            log_memory_usage()
+
+            writer.close()
+
+    # analyze results in memory (no reimport of region and results)
+    analyzed = None
     if region.cfg['do_analysis']:
-        analysis(run_timestamp=region.cfg['run_timestamp'],
-                 scenarios=region.cfg['scn_data']['general']['id'])
+        scn_id = region.cfg['scn_data']['general']['id']
+        with profile_stage('analysis'):
+            _, results_scns = analysis(
+                run_timestamp=region.cfg['run_timestamp'],
+                scenarios=scn_id,
+                dump_results=region.cfg['dump_results'],
+                regions={scn_id: region},
+                # streamed flows are loaded from file
+                results_raw=None if stream_flows
+                else {scn_id: results},
+                raise_errors=False)
+        analyzed = scn_id in results_scns
+
+    # dump timing and memory usage of stages
+    profiler.sampler.stop()
+    if region.cfg['dump_results']:
+        export_stage_profile(cfg=region.cfg,
+                             stages=profiler.stages,
+                             memory=profiler.sampler.samples)
 
     logger.info(f'===== Scenario {region.cfg["scenario"]} done! =====')
 
     # debug_plot_results(esys=esys,
     #                    region=region)
 
-    return region.cfg['scenario'] if infeasible else None
+    return region.cfg['scenario'] if infeasible else None, analyzed
 
 
 if __name__ == "__main__":
@@ -157,12 +284,13 @@ if __name__ == "__main__":
         description='WindNODE ABW energy system.',
         formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument('scn', metavar='SCENARIO', type=str, nargs='*',
-                        default=['dev/future'],
+                        default=None,
                         help='ID of scenario to be run, e.g. \'ISE2050\'. '
                              'You may pass multiple, e.g. \'dev/sq ISE2050\'. '
                              'Use \'all\' for all scenarios. '
                              'If nothing is provided, it defaults to scenario '
-                             'dev/future.\n\n'
+                             'dev/future (or the scenarios of the resumed '
+                             'run if --resume is used).\n\n'
                              f'Available scenarios:\n  {avail_scenarios_str}')
     parser.add_argument('--mp', metavar='NUMBER', type=int, nargs='?',
                         dest='proc_count', default=1,
@@ -171,6 +299,33 @@ if __name__ == "__main__":
                              'provided, program is executed without MP. '
                              'If value exceeds number of scenarios, number of '
                              'scenarios is used.')
+    parser.add_argument('--refresh-cache', metavar='TABLE', type=str,
+                        nargs='*', dest='refresh_cache', default=None,
+                        help='Clear local DB cache before run to force a '
+                             'refresh of the data from the DB. You may pass '
+                             'the tables to be refreshed, e.g. '
+                             '\'feedin_ts_init muns\'. If no table is '
+                             'provided, the entire cache is cleared.')
+    parser.add_argument('--mem-budget', metavar='MB', type=float,
+                        dest='mem_budget', default=None,
+                        help='Memory budget in MB for multiprocessing. '
+                             'Scenarios are only started if their estimated '
+                             'memory fits the budget. Defaults to 90 %% of '
+                             'available memory.')
+    parser.add_argument('--resume', metavar='RUN_TIMESTAMP', type=str,
+                        dest='resume', default=None,
+                        help='Resume interrupted run, e.g. '
+                             '\'2020-08-05_024335\'. Scenarios which have '
+                             'been completed are skipped, partial results '
+                             'are deleted and the scenarios are rerun. The '
+                             'config of the resumed run is used.')
+    parser.add_argument('--analysis-workers', metavar='NUMBER', type=int,
+                        dest='analysis_workers', default=1,
+                        help='Number of processes used to analyze solved '
+                             'scenarios while further scenarios are solved '
+                             '(multiple scenarios only). If value is 0, '
+                             'each scenario is analyzed right after solving. '
+                             'Defaults to 1.')
     args = parser.parse_args()
 
     # check if sufficient CPU cores
@@ -179,14 +334,60 @@ if __name__ == "__main__":
         logger.error(msg)
         raise ValueError(msg)
 
+    if args.resume is not None:
+        run_timestamp = args.resume
+        if not os.path.isdir(os.path.join(config.get_data_root_dir(),
+                                          config.get('user_dirs',
+                                                     'results_dir'),
+                                          run_timestamp)):
+            msg = f'Run {run_timestamp} to be resumed not found.'
+            logger.error(msg)
+            raise ValueError(msg)
+        manifest = load_run_manifest(run_timestamp)
+    else:
+        run_timestamp = time.strftime('%Y-%m-%d_%H%M%S')
+        manifest = None
+
     # create scenario list
     if args.scn == ['all']:
         scenarios = avail_scenarios
-    else:
+    elif args.scn:
         scenarios = args.scn
+    elif manifest is not None:
+        scenarios = list(manifest['scenarios'].keys())
+    else:
+        scenarios = ['dev/future']
+
+    # skip scenarios completed in resumed run, delete partial results
+    infeasible_scenarios = []
+    # scenarios solved but not analyzed in resumed run
+    scenarios_analysis = []
+    if args.resume is not None:
+        scenarios_todo = []
+        for scn in scenarios:
+            scn_id = load_scenario_cfg(scn)['general']['id']
+            # scenario must be finished according to manifest (if available,
+            # not for runs created before manifest was introduced) and
+            # results must be complete
+            status = manifest['scenarios'].get(scn, {}).get('status') \
+                if manifest is not None else None
+            if (manifest is None or status in ['done', 'infeasible']) and \
+                    validate_results(run_timestamp, scn_id):
+                logger.info(f'Scenario {scn} already completed, skipping...')
+                if status == 'infeasible':
+                    infeasible_scenarios.append(scn)
+                continue
+            if status == 'solved' and validate_results(run_timestamp, scn_id):
+                logger.info(f'Scenario {scn} already solved, analyzing '
+                            f'only...')
+                scenarios_analysis.append(scn)
+                continue
+            clear_results(run_timestamp, scn_id)
+            scenarios_todo.append(scn)
+        scenarios = scenarios_todo
 
     # check if MP process count exceeds scenario count
-    if args.proc_count > len(scenarios):
+    if args.proc_count > len(scenarios) > 0:
         logger.info('Number of processes exceeds number of scenarios. '
                     'I will use the number of scenarios '
                     f'({len(scenarios)}) as process count.')
@@ -194,7 +395,6 @@ if __name__ == "__main__":
 
     logger.info(f'Running scenarios: {str(scenarios)} in {args.proc_count} '
                 f'processes.')
-    run_timestamp = time.strftime('%Y-%m-%d_%H%M%S')
     logger.info(f'Run timestamp: {run_timestamp}')
 
     # configuration for all calculated scenarios
@@ -209,30 +409,158 @@ if __name__ == "__main__":
         'solver_verbose': True,
         'solver_keepfiles': False,
         'save_lp': False,
+        'results_direct': True,
+        'results_streaming': True,
         'dump_results': True,
-        'do_analysis': True
+        'results_format': 'parquet',
+        'results_float32': False,
+        'results_compression': 'snappy',
+        # build model on typical periods instead of full timerange, e.g.
+        # {'periods': 12, 'period_length': 24} for 12 typical days
+        'ts_aggregation': None,
+        'do_analysis': True,
+        'memory_sampling_interval': 1,
+        'data_source': 'db',
+        'db_cache': True,
+        # import timeseries for timerange only instead of full year, changes
+        # annual values such as peak loads (see import_db_data())
+        'db_timerange_only': False,
+        'db_pool_size': 4,
+        'db_copy': True
     }
 
-    infeasible_scenarios = []
-
-    # use MP
-    if args.proc_count > 1:
-        pool = multiprocessing.Pool(args.proc_count)
-        cfgs = [dict(**c, **{'scenario': s})
-                for c, s in zip([cfg] * len(scenarios), scenarios)]
-        infeasible_scenario = pool.map(run_scenario, cfgs)
-        pool.close()
-        infeasible_scenarios = [_
-                                for _ in infeasible_scenario
-                                if _ is not None]
-
-    # do not use MP
-    else:
-        for scn_id in scenarios:
-            cfg['scenario'] = scn_id
-            infeasible_scenario = run_scenario(cfg=cfg)
-            if infeasible_scenario is not None:
-                infeasible_scenarios.append(scn_id)
+    # use config of resumed run to not mix results of different configs
+    # (e.g. timerange or results format) in one run
+    if args.resume is not None:
+        cfg_run = load_run_config(run_timestamp)
+        if cfg_run is None:
+            logger.warning(f'Config of run {run_timestamp} not found, '
+                           f'current config is used.')
+        else:
+            changed = sorted(key for key, value in cfg_run.items()
+                             if key in cfg and cfg[key] != value)
+            if changed:
+                logger.warning(f'Current config differs from config of '
+                               f'resumed run in {changed}, config of resumed '
+                               f'run is used.')
+            # keys missing in config of run are taken from current config
+            cfg = dict(cfg, **cfg_run)
+
+    # clear DB cache (entirely if no tables are specified)
+    if args.refresh_cache is not None:
+        clear_db_cache(tables=args.refresh_cache or None)
+
+    # record progress of run
+    update_run_manifest(run_timestamp, scenarios, 'pending', cfg=cfg)
+
+    # analyze solved scenarios in separate processes while further scenarios
+    # are solved (pipeline), results are passed via results files
+    def analysis_finished(scn, error):
+        if error is None:
+            update_run_manifest(run_timestamp, [scn], 'done')
+
+    do_analysis = cfg['do_analysis']
+    pipeline = None
+    if do_analysis and cfg['dump_results'] and \
+            args.analysis_workers > 0 and \
+            len(scenarios) + len(scenarios_analysis) > 1:
+        # scenarios are analyzed by pipeline, not in run_scenario()
+        cfg['do_analysis'] = False
+        pipeline = AnalysisPipeline(worker_count=args.analysis_workers,
+                                    callback=analysis_finished)
+        pipeline.start()
+
+    def analyze_scenario(scn):
+        scn_id = load_scenario_cfg(scn)['general']['id']
+        if pipeline is not None:
+            pipeline.put(run_timestamp, scn, scn_id)
+            pipeline.poll()
+        else:
+            # scenario remains 'solved' if analysis fails
+            _, results_scns = analysis(run_timestamp=run_timestamp,
+                                       scenarios=scn_id,
+                                       raise_errors=False)
+            if scn_id in results_scns:
+                update_run_manifest(run_timestamp, [scn], 'done')
+
+    def scenario_finished(scn_cfg, result):
+        infeasible_scenario, analyzed = result
+        if infeasible_scenario is not None:
+            update_run_manifest(run_timestamp, [scn_cfg['scenario']],
+                                'infeasible')
+        elif pipeline is not None:
+            update_run_manifest(run_timestamp, [scn_cfg['scenario']],
+                                'solved')
+            analyze_scenario(scn_cfg['scenario'])
+        elif analyzed is False:
+            # analysis failed, scenario is analyzed only on resume
+            update_run_manifest(run_timestamp, [scn_cfg['scenario']],
+                                'solved')
+        else:
+            update_run_manifest(run_timestamp, [scn_cfg['scenario']],
+                                'done')
+
+    if do_analysis:
+        for scn in scenarios_analysis:
+            analyze_scenario(scn)
+
+    # import scenario-independent data only once and share it across all
+    # scenarios (processes)
+    shared_data = None
+    n_muns = None
+    if len(scenarios) > 1:
+        logger.info('Importing data to be shared across scenarios...')
+        data = import_db_data(cfg)
+        # number of municipalities is used to estimate the model size
+        n_muns = len(data['muns'])
+        shared_data = share_db_data(data)
+        del data
+        log_memory_usage()
+
+    try:
+        # nothing to be solved (e.g. all scenarios of resumed run are solved)
+        if len(scenarios) == 0:
+            logger.info('No scenarios to be solved.')
+
+        # use MP
+        elif args.proc_count > 1:
+            cfgs = [dict(**c, **{'scenario': s})
+                    for c, s in zip([cfg] * len(scenarios), scenarios)]
+            # estimate memory and time needs to schedule scenarios
+            estimates = [estimate_scenario_resources(c, n_muns=n_muns)
+                         for c in cfgs]
+            results = run_scheduled(
+                run_scenario,
+                cfgs,
+                estimates,
+                proc_count=args.proc_count,
+                memory_budget=args.mem_budget,
+                initializer=init_worker,
+                initargs=(shared_data,),
+                callback=scenario_finished
+            )
+            infeasible_scenarios += [infeasible_scenario
+                                     for infeasible_scenario, _ in results
+                                     if infeasible_scenario is not None]
+
+        # do not use MP
+        else:
+            init_worker(shared_data)
+            for scn_id in scenarios:
+                cfg['scenario'] = scn_id
+                result = run_scenario(cfg=cfg)
+                scenario_finished(cfg, result)
+                infeasible_scenario, _ = result
+                if infeasible_scenario is not None:
+                    infeasible_scenarios.append(scn_id)
+    finally:
+        if pipeline is not None:
+            analysis_errors = pipeline.join()
+            if len(analysis_errors) > 0:
+                logger.warning(f'Analysis failed for scenarios: '
+                               f'{list(analysis_errors.keys())}')
+        if shared_data is not None:
+            release_shared_db_data(shared_data)
 
     if len(infeasible_scenarios) > 0:
         logger.warning(f'Infeasible scenarios: {infeasible_scenarios}')
@@ -7,16 +7,38 @@ import os
 import requests
 import pandas as pd
 import keyring
+import io
 import json
 import pickle
+import time
+import hashlib
+import shutil
+import tempfile
+from glob import glob
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func
+from sqlalchemy import func, text, create_engine, Column
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import Label, BindParameter, Grouping, \
+    BooleanClauseList, BinaryExpression, UnaryExpression
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.selectable import Join
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.sql.visitors import iterate
+from geoalchemy2.types import Geometry
+import geopandas as gpd
+from shapely.wkb import loads as wkb_loads
 
 from windnode_abw.tools.geo import convert_df_wkt_to_shapely
 from egoio.tools.db import connection
 from windnode_abw.tools.logger import log_memory_usage
 
+from windnode_abw.config.db_models import metadata as db_metadata
 from windnode_abw.config.db_models import \
     WnAbwDemandTs, WnAbwFeedinTs, WnAbwGridHvBus, WnAbwGridHvLine,\
     WnAbwGridHvmvSubstation, WnAbwGridMvGriddistrict, WnAbwGridHvTransformer,\
@@ -25,6 +47,9 @@ from windnode_abw.config.db_models import \
     WnAbwPotentialAreasPv, WnAbwPotentialAreasPvRoof, WnAbwPotentialAreasWec,\
     WnAbwDemography
 
+# groups of processed results stacked in result cube
+RESULT_CUBE_GROUPS = ['highlevel_results', 'results_t', 'results_axlxt']
+
 
 def db_session(db_section):
     """Create DB session using egoio
@@ -47,6 +72,35 @@ def db_session(db_section):
     return Session()
 
 
+def db_engine(db_section, pool_size=5):
+    """Create pooled DB engine using egoio's connection details
+
+    The engine must be disposed (:meth:`sqlalchemy.engine.Engine.dispose`)
+    when it is not needed anymore to close the connections of its pool.
+
+    Parameters
+    ----------
+    db_section : :obj:`str`
+      Database section in ego.io db config (usually ~/.egoio/config.ini) which
+      holds connection details. Note: keyring entry must exist for the section
+      to load the credentials.
+    pool_size : :obj:`int`
+        Number of connections in pool
+
+    Returns
+    -------
+    :class:`sqlalchemy.engine.Engine`
+        SQLAlchemy engine
+    """
+    conn = connection(section=db_section)
+    # egoio's engine is used for connection details only
+    conn.dispose()
+
+    return create_engine(conn.url,
+                         pool_size=pool_size,
+                         max_overflow=0)
+
+
 def oep_get_token():
     """Read token (password) from system's keyring
 
@@ -179,9 +233,666 @@ def oep_api_write_data(schema, table, data):
     return pd.DataFrame(result.json())
 
 
+def db_cache_path():
+    """Get path of local DB cache, create directory if not existent
+
+    Returns
+    -------
+    :obj:`str`
+        Path to cache directory ~/.windnode_abw/data/db_cache/
+    """
+    path = os.path.join(config.get_data_root_dir(),
+                        config.get('user_dirs',
+                                   'data_dir'),
+                        'db_cache'
+                        )
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+
+def db_fingerprint(session, schema='windnode'):
+    """Get content fingerprint of all tables in DB schema
+
+    The fingerprint of a table is made of its number of rows and the sum of
+    the hashes of the ids of the transactions which created the rows
+    (system column `xmin`). Inserted and updated rows are new row versions
+    with a new `xmin`, deleted rows change the number of rows. Hence, the
+    fingerprint changes on every write operation on the table (incl.
+    TRUNCATE and reload) and it is not affected by table statistics being
+    reset. Every table is scanned once (`xmin` only).
+
+    Parameters
+    ----------
+    session : :class:`sqlalchemy.orm.session.Session`
+        SQLAlchemy session
+    schema : :obj:`str`
+        DB schema
+
+    Returns
+    -------
+    :obj:`dict`
+        Fingerprint (:obj:`str`) per table name
+    """
+    tables = [row[0] for row in session.execute(
+        text('SELECT tablename FROM pg_tables WHERE schemaname = :schema'),
+        {'schema': schema}
+    ).fetchall()]
+    if not tables:
+        return {}
+
+    quote = session.bind.dialect.identifier_preparer.quote
+    stats = session.execute(
+        text(' UNION ALL '.join(
+            f'SELECT :table_{n} AS relname, count(*) AS n_rows, '
+            f'coalesce(sum(hashtext(xmin::text)::bigint), 0) AS xmin_hash '
+            f'FROM {quote(schema)}.{quote(table)}'
+            for n, table in enumerate(tables))),
+        {f'table_{n}': table for n, table in enumerate(tables)}
+    ).fetchall()
+
+    return {row[0]: '_'.join(str(_) for _ in row[1:]) for row in stats}
+
+
+def clear_db_cache(tables=None):
+    """Delete cached tables from local DB cache
+
+    Parameters
+    ----------
+    tables : :obj:`list` of :obj:`str`
+        Tables to be removed from cache, e.g. ['feedin_ts_init', 'muns'] (names
+        as in data dict returned by :func:`import_db_data`). If None, the
+        entire cache is deleted.
+    """
+    path = db_cache_path()
+
+    if tables is None:
+        files = glob(os.path.join(path, '*.parquet'))
+    else:
+        files = [f for table in tables
+                 for f in glob(os.path.join(path, f'{table}__*.parquet'))]
+
+    for file in files:
+        os.remove(file)
+    logger.info(f'Removed {len(files)} file(s) from DB cache {path}')
+
+
+def read_sql_copy(query, session, **kwargs):
+    """Read query result to DataFrame using PostgreSQL's COPY command
+
+    The result is streamed by `COPY (<query>) TO STDOUT` in CSV format to a
+    buffer which is parsed by pandas' C parser directly to NumPy arrays. This
+    is much faster than :pandas:`pandas.read_sql_query` for large tables as
+    no Python objects are created per row.
+
+    Parameters
+    ----------
+    query : :class:`sqlalchemy.orm.query.Query`
+        Query
+    session : :class:`sqlalchemy.orm.session.Session`
+        SQLAlchemy session, DB driver must be psycopg2
+    **kwargs
+        Further args passed to :pandas:`pandas.read_csv`, e.g. `index_col`
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Query result
+    """
+    statement = query.statement.compile(dialect=session.bind.dialect)
+
+    conn = session.bind.raw_connection()
+    try:
+        cursor = conn.cursor()
+        sql = cursor.mogrify(str(statement), statement.params).decode()
+        buffer = io.BytesIO()
+        cursor.copy_expert(f'COPY ({sql}) TO STDOUT WITH (FORMAT csv, '
+                           f'HEADER true)',
+                           buffer)
+        cursor.close()
+    finally:
+        conn.close()
+
+    buffer.seek(0)
+    return pd.read_csv(buffer, **kwargs)
+
+
+def read_db_table(name, query, session, fingerprint=None, copy=False,
+                  **kwargs):
+    """Read query result to DataFrame using a local read-through cache
+
+    The result is cached as parquet file in the cache directory (see
+    :func:`db_cache_path`). The cache key is made of the table name, the
+    query (SQL statement and parameters incl. SRID) and the fingerprints of
+    all DB tables involved in the query. Hence, cached data is invalidated
+    automatically if query or DB content changes. Older cache entries of
+    the table are deleted when a new one is written.
+
+    Parameters
+    ----------
+    name : :obj:`str`
+        Name of table (key of data dict, e.g. 'feedin_ts_init')
+    query : :class:`sqlalchemy.orm.query.Query`
+        Query
+    session : :class:`sqlalchemy.orm.session.Session`
+        SQLAlchemy session
+    fingerprint : :obj:`dict`
+        DB fingerprint as returned by :func:`db_fingerprint`. If None or if
+        it lacks one of the tables involved in the query, cache is not
+        used.
+    copy : :obj:`bool`
+        If True, data is fetched using COPY (see :func:`read_sql_copy`). If
+        COPY is not available, the ORM query is used.
+    **kwargs
+        Further args passed to :pandas:`pandas.read_sql_query`
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Query result
+    """
+    def fetch():
+        if copy:
+            try:
+                return read_sql_copy(query, session, **kwargs)
+            except Exception as ex:
+                logger.warning(f'Could not fetch {name} using COPY, ORM query '
+                               f'is used. Details: {ex}')
+        return pd.read_sql_query(query.statement,
+                                 session.bind,
+                                 **kwargs)
+
+    if fingerprint is None:
+        return fetch()
+
+    statement = query.statement.compile()
+    tables = sorted({t.name for t in find_tables(query.statement,
+                                                 check_columns=True)})
+    missing = [t for t in tables if t not in fingerprint]
+    if missing:
+        logger.debug(f'No fingerprint of table(s) {missing}, {name} is not '
+                     f'cached.')
+        return fetch()
+
+    key = hashlib.sha1(
+        '|'.join([name,
+                  str(statement),
+                  repr(sorted(statement.params.items())),
+                  str(config.get('geo', 'srid')),
+                  repr(kwargs),
+                  *[f'{t}:{fingerprint[t]}' for t in tables]]
+                 ).encode('utf-8')
+    ).hexdigest()
+    file = os.path.join(db_cache_path(), f'{name}__{key[:16]}.parquet')
+
+    if os.path.isfile(file):
+        logger.debug(f'Loading {name} from DB cache...')
+        try:
+            return pd.read_parquet(file)
+        except OSError:
+            # removed by parallel run in the meantime
+            logger.debug(f'Could not load {name} from DB cache, fetching...')
+
+    data = fetch()
+
+    # write to temp file first to prevent incomplete files from parallel runs
+    file_tmp = f'{file}.{os.getpid()}.tmp'
+    data.to_parquet(file_tmp)
+    os.replace(file_tmp, file)
+
+    # remove outdated entries
+    for file_old in glob(os.path.join(db_cache_path(), f'{name}__*.parquet')):
+        if file_old != file:
+            try:
+                os.remove(file_old)
+            except OSError:
+                pass
+
+    return data
+
+
+def query_timeseries(session, table, columns, timerange=None, source=None):
+    """Create query for timeseries table
+
+    Parameters
+    ----------
+    session : :class:`sqlalchemy.orm.session.Session`
+        SQLAlchemy session
+    table : :obj:`type`
+        SQLA DB model of timeseries table, e.g. :class:`WnAbwFeedinTs`
+    columns : :obj:`list` of :obj:`str`
+        Value columns to be selected
+    timerange : :obj:`tuple` of :pandas:`pandas.Timedelta`
+        Start and end of timerange to be selected, given as offsets from the
+        first timestamp in table. If None, the entire table is selected.
+    source : :class:`DbDataSource` or :class:`FileDataSource`
+        Data source used to obtain the first timestamp if timerange is
+        given. If None, the session's DB is queried.
+
+    Returns
+    -------
+    :class:`sqlalchemy.orm.query.Query`
+        Query, ordered by timestamp
+    """
+    query = session.query(
+        table.ags_id.label('ags'),
+        *[getattr(table, col) for col in columns]
+    ).order_by(table.timestamp)
+
+    # filter by offsets as the table's year may differ from the model's year
+    if timerange is not None:
+        ts_first_query = session.query(
+            func.min(table.timestamp).label('ts_first'))
+        if source is None:
+            ts_first = pd.Timestamp(ts_first_query.scalar())
+        else:
+            ts_first = pd.Timestamp(
+                source.read(f'{table.__tablename__}_first',
+                            ts_first_query,
+                            session).iloc[0, 0])
+        query = query.filter(
+            table.timestamp >= (ts_first + timerange[0]).to_pydatetime(),
+            table.timestamp <= (ts_first + timerange[1]).to_pydatetime()
+        )
+
+    return query
+
+
+class DbDataSource:
+    """Data source: PostGIS DB
+
+    The pooled engine is created per data source, call :meth:`close` to
+    close its connections.
+
+    Parameters
+    ----------
+    db_section : :obj:`str`
+        Database section in ego.io db config (usually ~/.egoio/config.ini)
+    pool_size : :obj:`int`
+        Number of connections in pool
+    cache : :obj:`bool`
+        Use local DB cache (see :func:`read_db_table`)
+    copy : :obj:`bool`
+        Allow fetching data using COPY (see :func:`read_sql_copy`)
+    """
+    def __init__(self, db_section='windnode_abw', pool_size=1, cache=False,
+                 copy=False):
+        self._engine = db_engine(db_section, pool_size=pool_size)
+        self._Session = sessionmaker(bind=self._engine)
+        self._copy = copy
+
+        self._fingerprint = None
+        if cache:
+            session = self.session()
+            try:
+                self._fingerprint = db_fingerprint(session)
+            except Exception as ex:
+                logger.warning(f'Could not obtain DB fingerprint, DB cache is '
+                               f'disabled. Details: {ex}')
+            finally:
+                session.close()
+
+    def session(self):
+        """Create new session"""
+        return self._Session()
+
+    def close(self):
+        """Close all connections of engine"""
+        self._engine.dispose()
+
+    def read(self, name, query, session, copy=False, **kwargs):
+        """Read query result to DataFrame, see :func:`read_db_table`
+
+        COPY is used only if `copy` is True and enabled for data source.
+        """
+        return read_db_table(name, query, session,
+                             fingerprint=self._fingerprint,
+                             copy=copy and self._copy,
+                             **kwargs)
+
+
+class FileDataSource:
+    """Data source: Directory of (Geo)Parquet files with one file per DB
+    table as exported by :func:`export_db_to_files`
+
+    The queries are evaluated on the files by :func:`read_query_from_files`,
+    no DB connection is required.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Directory of files
+    """
+    def __init__(self, path):
+        if not os.path.isdir(path):
+            msg = f'Data directory {path} does not exist, export data from ' \
+                  f'DB first using export_db_to_files()'
+            logger.error(msg)
+            raise ValueError(msg)
+        self._path = path
+        # unbound session, used to create queries only
+        self._Session = sessionmaker()
+
+    def session(self):
+        """Create new (unbound) session"""
+        return self._Session()
+
+    def read(self, name, query, session, copy=False, **kwargs):
+        """Read query result to DataFrame, see :func:`read_query_from_files`
+        """
+        return read_query_from_files(query, self._path, **kwargs)
+
+    def close(self):
+        """Nothing to be closed (no DB connection)"""
+        pass
+
+
+def create_data_source(cfg):
+    """Create data source from run config
+
+    Parameters
+    ----------
+    cfg : :obj:`dict`
+        Run config, relevant keys:
+        * 'data_source': 'db' (default) or 'files'
+        * 'data_source_path': Directory of files, defaults to
+          :func:`db_export_path`
+        * 'db_pool_size', 'db_cache', 'db_copy' (DB only)
+
+    Returns
+    -------
+    :class:`DbDataSource` or :class:`FileDataSource`
+        Data source
+    """
+    data_source = cfg.get('data_source', 'db')
+
+    if data_source == 'db':
+        return DbDataSource(db_section='windnode_abw',
+                            pool_size=int(cfg.get('db_pool_size', 1)),
+                            cache=cfg.get('db_cache', False),
+                            copy=cfg.get('db_copy', False))
+    elif data_source == 'files':
+        return FileDataSource(path=cfg.get('data_source_path', None) or
+                              db_export_path())
+    else:
+        msg = f'Invalid data source {data_source}'
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+def db_export_path():
+    """Get path of DB export (file data source), create directory if not
+    existent
+
+    Returns
+    -------
+    :obj:`str`
+        Path to export directory ~/.windnode_abw/data/db_export/
+    """
+    path = os.path.join(config.get_data_root_dir(),
+                        config.get('user_dirs',
+                                   'data_dir'),
+                        'db_export'
+                        )
+    os.makedirs(path, exist_ok=True)
+
+    return path
+
+
+def export_db_to_files(db_section='windnode_abw', path=None, tables=None):
+    """Export DB tables to (Geo)Parquet files to be used by
+    :class:`FileDataSource`
+
+    All tables defined in :mod:`~.config.db_models` are exported to one file
+    per table (file name: <table name>.parquet) with the same columns.
+    Geometries are stored as WKB with the table's CRS (GeoParquet).
+
+    Parameters
+    ----------
+    db_section : :obj:`str`
+        Database section in ego.io db config (usually ~/.egoio/config.ini)
+    path : :obj:`str`
+        Target directory, defaults to :func:`db_export_path`
+    tables : :obj:`list` of :obj:`str`
+        Tables to be exported, e.g. ['wn_abw_mun']. If None, all tables are
+        exported.
+    """
+    if path is None:
+        path = db_export_path()
+    os.makedirs(path, exist_ok=True)
+
+    engine = db_engine(db_section, pool_size=1)
+    session = sessionmaker(bind=engine)()
+    try:
+        _export_db_tables(session, path, tables)
+    finally:
+        session.close()
+        engine.dispose()
+    logger.info(f'DB exported to {path}')
+
+
+def _export_db_tables(session, path, tables=None):
+    """Export DB tables to files, see :func:`export_db_to_files`"""
+    for table in db_metadata.sorted_tables:
+        if tables is not None and table.name not in tables:
+            continue
+        logger.info(f'Exporting table {table.name}...')
+
+        geom_cols = [col for col in table.columns
+                     if isinstance(col.type, Geometry)]
+        query = session.query(
+            *[func.ST_AsBinary(col).label(col.name) if col in geom_cols
+              else col
+              for col in table.columns]
+        )
+        data = pd.read_sql_query(query.statement, session.bind)
+
+        file = os.path.join(path, f'{table.name}.parquet')
+        if geom_cols:
+            for col in geom_cols:
+                data[col.name] = gpd.GeoSeries(
+                    [wkb_loads(bytes(_)) if _ is not None else None
+                     for _ in data[col.name]],
+                    index=data.index,
+                    crs=f'EPSG:{col.type.srid}' if col.type.srid > 0
+                    else None)
+            gpd.GeoDataFrame(data,
+                             geometry=geom_cols[0].name).to_parquet(file)
+        else:
+            data.to_parquet(file)
+
+
+def read_query_from_files(query, path, **kwargs):
+    """Evaluate query on DB tables exported to files by
+    :func:`export_db_to_files`
+
+    Only the subset of SQL used in :func:`import_db_data` is supported:
+    selection of (labeled) columns, arithmetic and comparison operators,
+    inner/outer joins on column equality, filters, ordering and the functions
+    ST_Transform, ST_AsText, min and max. Other expressions raise
+    :obj:`NotImplementedError`. Only the columns referenced by the query are
+    read from the files.
+
+    Parameters
+    ----------
+    query : :class:`sqlalchemy.orm.query.Query`
+        Query
+    path : :obj:`str`
+        Directory of files
+    **kwargs
+        Supported: `index_col` (cf. :pandas:`pandas.read_sql_query`)
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame`
+        Query result
+    """
+    statement = query.statement
+    select_exprs = list(statement.inner_columns)
+    whereclause = getattr(statement, '_whereclause', None)
+    order_by_clause = getattr(statement, '_order_by_clause', None)
+    order_by_exprs = list(order_by_clause.clauses) \
+        if order_by_clause is not None else []
+
+    if len(statement.froms) != 1:
+        msg = 'Only queries with a single FROM clause are supported by ' \
+              'file data source'
+        logger.error(msg)
+        raise NotImplementedError(msg)
+    from_clause = statement.froms[0]
+
+    # collect referenced columns per table
+    columns = {}
+    exprs = select_exprs + order_by_exprs
+    if whereclause is not None:
+        exprs.append(whereclause)
+    joins = [from_clause]
+    while joins:
+        join = joins.pop()
+        if isinstance(join, Join):
+            exprs.append(join.onclause)
+            joins += [join.left, join.right]
+    for expr in exprs:
+        for elem in iterate(expr, {}):
+            if isinstance(elem, Column) and elem.table is not None:
+                columns.setdefault(elem.table.name, {})[elem.name] = elem
+
+    def load_table(table):
+        """Load referenced columns of table, columns named <table>.<col>"""
+        cols = columns.get(table.name, {})
+        data = pd.read_parquet(os.path.join(path, f'{table.name}.parquet'),
+                               columns=list(cols.keys()))
+        for name, col in cols.items():
+            if isinstance(col.type, Geometry):
+                data[name] = gpd.GeoSeries(
+                    [wkb_loads(bytes(_)) if _ is not None else None
+                     for _ in data[name]],
+                    index=data.index,
+                    crs=f'EPSG:{col.type.srid}' if col.type.srid > 0
+                    else None)
+        return data.rename(columns=lambda _: f'{table.name}.{_}')
+
+    def evaluate_from(clause):
+        """Load tables and evaluate joins"""
+        if not isinstance(clause, Join):
+            return load_table(clause)
+
+        left = evaluate_from(clause.left)
+        right = evaluate_from(clause.right)
+        conditions = clause.onclause.clauses \
+            if isinstance(clause.onclause, BooleanClauseList) \
+            else [clause.onclause]
+        left_on, right_on = [], []
+        for cond in conditions:
+            cols = [f'{cond.left.table.name}.{cond.left.name}',
+                    f'{cond.right.table.name}.{cond.right.name}']
+            if cols[0] not in left.columns:
+                cols.reverse()
+            left_on.append(cols[0])
+            right_on.append(cols[1])
+
+        return left.merge(right,
+                          how='left' if clause.isouter else 'inner',
+                          left_on=left_on,
+                          right_on=right_on)
+
+    # operators which behave the same on pandas objects
+    supported_operators = [operators.and_, operators.or_,
+                           operators.eq, operators.ne,
+                           operators.lt, operators.le,
+                           operators.gt, operators.ge,
+                           operators.add, operators.sub,
+                           operators.mul, operators.truediv]
+
+    def evaluate(expr, data):
+        """Evaluate SQL expression on data"""
+        if isinstance(expr, Label):
+            return evaluate(expr.element, data)
+        elif isinstance(expr, Column):
+            return data[f'{expr.table.name}.{expr.name}']
+        elif isinstance(expr, BindParameter):
+            return expr.effective_value
+        elif isinstance(expr, Grouping):
+            return evaluate(expr.element, data)
+        elif isinstance(expr, BooleanClauseList) and \
+                expr.operator in supported_operators:
+            values = [evaluate(_, data) for _ in expr.clauses]
+            result = values[0]
+            for value in values[1:]:
+                result = expr.operator(result, value)
+            return result
+        elif isinstance(expr, BinaryExpression) and \
+                expr.operator in supported_operators:
+            return expr.operator(evaluate(expr.left, data),
+                                 evaluate(expr.right, data))
+        elif isinstance(expr, FunctionElement):
+            name = expr.name.lower()
+            args = [evaluate(_, data) for _ in expr.clauses.clauses]
+            if name == 'st_transform':
+                return gpd.GeoSeries(args[0]).to_crs(epsg=int(args[1]))
+            elif name == 'st_astext':
+                return args[0].apply(
+                    lambda _: _.wkt if _ is not None else None)
+            elif name == 'min':
+                return args[0].min()
+            elif name == 'max':
+                return args[0].max()
+
+        msg = f'Expression {expr} is not supported by file data source'
+        logger.error(msg)
+        raise NotImplementedError(msg)
+
+    data = evaluate_from(from_clause)
+
+    if whereclause is not None:
+        data = data[evaluate(whereclause, data).to_numpy()]
+
+    if order_by_exprs:
+        ascending = [not (isinstance(_, UnaryExpression) and
+                          _.modifier is operators.desc_op)
+                     for _ in order_by_exprs]
+        keys = pd.DataFrame(
+            {n: evaluate(_.element if isinstance(_, UnaryExpression) else _,
+                         data).to_numpy()
+             for n, _ in enumerate(order_by_exprs)})
+        data = data.iloc[keys.sort_values(by=list(keys.columns),
+                                          ascending=ascending,
+                                          kind='mergesort').index]
+
+    result = {}
+    for expr in select_exprs:
+        values = evaluate(expr, data)
+        result[expr.name] = values.to_numpy() \
+            if isinstance(values, pd.Series) else [values]
+    result = pd.DataFrame(result)
+
+    if kwargs.get('index_col', None) is not None:
+        result.set_index(kwargs['index_col'], inplace=True)
+
+    return result
+
+
 def import_db_data(cfg):
     """Import data from DB using SQLA DB models
 
+    The data source is set by `cfg['data_source']` (see
+    :func:`create_data_source`): PostGIS DB (default) or local files exported
+    by :func:`export_db_to_files`.
+
+    The tables are imported concurrently in `cfg['db_pool_size']` threads
+    (default: 1) using a pooled engine, each table in its own session.
+
+    If `cfg['db_cache']` is True, data is read through the local DB cache
+    (see :func:`read_db_table`). If `cfg['db_copy']` is True, timeseries are
+    fetched using COPY (see :func:`read_sql_copy`).
+
+    If the scenario config is contained in `cfg`, only the timeseries columns
+    needed by the scenario are imported (wind feedin depending on year, DSM
+    timeseries depending on DSM mode). If `cfg['db_timerange_only']` is True,
+    only the timerange from `cfg` is imported instead of the full year. Note:
+    Annual values derived from the timeseries (e.g. peak loads) are
+    calculated for this timerange then.
+
     Parameters
     ----------
     cfg : :obj:`dict`
@@ -193,357 +904,592 @@ def import_db_data(cfg):
         Imported data
     """
 
-    data = {}
-
     srid = int(config.get('geo', 'srid'))
-    session = db_session('windnode_abw')
+
+    # tables are imported concurrently using one session per table
+    source = create_data_source(cfg)
 
     year = pd.to_datetime(cfg['date_from']).year
-    datetime_index_full_year = pd.date_range(start=f'{year}-01-01 00:00:00',
-                                             end=f'{year}-12-31 23:00:00',
-                                             freq=cfg['freq'])
+    year_start = pd.Timestamp(f'{year}-01-01 00:00:00')
+
+    # import timeseries for timerange from cfg only (full year otherwise).
+    # The full year is imported by default as annual values are derived from
+    # the timeseries when the model is built: e.g. the district heating peak
+    # load (sizing of plants), the solar thermal feedin (scaled by annual
+    # heat demand) and the distribution of batteries (peak loads). With a
+    # pruned timerange these values differ from the full year's and so do the
+    # results of short runs, hence the filter is only enabled on demand
+    # (e.g. debug runs). The timerange is part of the query parameters and
+    # thus of the DB cache key (see read_db_table()).
+    if cfg.get('db_timerange_only', False):
+        timerange = (pd.Timestamp(cfg['date_from']) - year_start,
+                     pd.Timestamp(cfg['date_to']) - year_start)
+        datetime_index = pd.date_range(start=cfg['date_from'],
+                                       end=cfg['date_to'],
+                                       freq=cfg['freq'])
+    else:
+        timerange = None
+        datetime_index = pd.date_range(start=f'{year}-01-01 00:00:00',
+                                       end=f'{year}-12-31 23:00:00',
+                                       freq=cfg['freq'])
+
+    # import only timeseries columns needed by scenario (if given)
+    scn_data = cfg.get('scn_data', None)
+    if scn_data is not None:
+        feedin_wind_cols = ['wind_sq'] \
+            if int(scn_data['general']['year']) == 2017 \
+            else ['wind_fs']
+        dsm_flex_cols = ['Flex_Minus_Max', 'Flex_Plus_Max'] \
+            if scn_data['flexopt']['dsm']['params']['mode'] == 'flex_max' \
+            else ['Flex_Minus', 'Flex_Plus']
+    else:
+        feedin_wind_cols = ['wind_sq', 'wind_fs']
+        dsm_flex_cols = ['Flex_Minus', 'Flex_Minus_Max',
+                         'Flex_Plus', 'Flex_Plus_Max']
 
     ########################################################
     # import municipalities including stats and substation #
     ########################################################
-    logger.info('Importing municipalities...')
-
-    muns_query = session.query(
-        WnAbwMun.ags,
-        WnAbwMun.name,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwMun.geom, srid)).label('geom'),
-        WnAbwRelSubstIdAgsId.subst_id,
-
-        WnAbwMundata.area,
-        WnAbwMundata.gen_capacity_wind,
-        WnAbwMundata.gen_capacity_pv_roof_small,
-        WnAbwMundata.gen_capacity_pv_roof_large,
-        WnAbwMundata.gen_capacity_pv_ground,
-        WnAbwMundata.gen_capacity_hydro,
-        WnAbwMundata.gen_capacity_bio,
-        WnAbwMundata.gen_capacity_sewage_landfill_gas,
-        WnAbwMundata.gen_capacity_conventional_large,
-        WnAbwMundata.gen_capacity_conventional_small,
-
-        WnAbwMundata.gen_count_wind,
-        WnAbwMundata.gen_count_pv_roof_small,
-        WnAbwMundata.gen_count_pv_roof_large,
-        WnAbwMundata.gen_count_pv_ground,
-        WnAbwMundata.gen_count_hydro,
-        WnAbwMundata.gen_count_bio,
-        WnAbwMundata.gen_count_sewage_landfill_gas,
-        WnAbwMundata.gen_count_conventional_large,
-        WnAbwMundata.gen_count_conventional_small,
-
-        WnAbwMundata.dem_el_energy_hh,
-        WnAbwMundata.dem_el_energy_rca,
-        WnAbwMundata.dem_el_energy_ind,
-
-        WnAbwMundata.dem_th_energy_hh,
-        WnAbwMundata.dem_th_energy_rca
-    ).join(WnAbwMundata).join(WnAbwRelSubstIdAgsId).order_by(WnAbwMun.ags)
-
-    muns = pd.read_sql_query(muns_query.statement,
-                             session.bind,
-                             index_col='ags')
-    # got one dataset per subst -> muns are duplicated -> create subst list
-    muns['subst_id'] = muns.groupby(muns.index)['subst_id'].apply(list)
-    # delete duplicates brought by groupby (drop_duplicates do not work here)
-    muns = muns[~muns.duplicated(subset='gen')]
-    # convert geom to shapely
-    data['muns'] = convert_df_wkt_to_shapely(df=muns,
-                                             cols=['geom'])
+    def import_muns(session):
+        data = {}
+        logger.info('Importing municipalities...')
+
+        muns_query = session.query(
+            WnAbwMun.ags,
+            WnAbwMun.name,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwMun.geom, srid)).label('geom'),
+            WnAbwRelSubstIdAgsId.subst_id,
+
+            WnAbwMundata.area,
+            WnAbwMundata.gen_capacity_wind,
+            WnAbwMundata.gen_capacity_pv_roof_small,
+            WnAbwMundata.gen_capacity_pv_roof_large,
+            WnAbwMundata.gen_capacity_pv_ground,
+            WnAbwMundata.gen_capacity_hydro,
+            WnAbwMundata.gen_capacity_bio,
+            WnAbwMundata.gen_capacity_sewage_landfill_gas,
+            WnAbwMundata.gen_capacity_conventional_large,
+            WnAbwMundata.gen_capacity_conventional_small,
+
+            WnAbwMundata.gen_count_wind,
+            WnAbwMundata.gen_count_pv_roof_small,
+            WnAbwMundata.gen_count_pv_roof_large,
+            WnAbwMundata.gen_count_pv_ground,
+            WnAbwMundata.gen_count_hydro,
+            WnAbwMundata.gen_count_bio,
+            WnAbwMundata.gen_count_sewage_landfill_gas,
+            WnAbwMundata.gen_count_conventional_large,
+            WnAbwMundata.gen_count_conventional_small,
+
+            WnAbwMundata.dem_el_energy_hh,
+            WnAbwMundata.dem_el_energy_rca,
+            WnAbwMundata.dem_el_energy_ind,
+
+            WnAbwMundata.dem_th_energy_hh,
+            WnAbwMundata.dem_th_energy_rca
+        ).join(WnAbwMundata).join(WnAbwRelSubstIdAgsId).order_by(WnAbwMun.ags)
+
+        muns = source.read('muns', muns_query,
+                           session,
+                           index_col='ags')
+        # got one dataset per subst -> muns are duplicated -> create subst list
+        muns['subst_id'] = muns.groupby(muns.index)['subst_id'].apply(list)
+        # delete duplicates brought by groupby (drop_duplicates do not work here)
+        muns = muns[~muns.duplicated(subset='gen')]
+        # convert geom to shapely
+        data['muns'] = convert_df_wkt_to_shapely(df=muns,
+                                                 cols=['geom'])
+
+        return data
 
     ###############################################
     # import population and employment timeseries #
     ###############################################
-    logger.info('Importing demography...')
-    demography_query = session.query(
-        WnAbwDemography.ags_id.label('ags'),
-        WnAbwDemography.year,
-        WnAbwDemography.population,
-        WnAbwDemography.employees
-    ).order_by(WnAbwDemography.year,
-               WnAbwDemography.ags_id)
-    data['demography'] = pd.read_sql_query(demography_query.statement,
-                                           session.bind,
-                                           index_col=['year', 'ags'])
+    def import_demography(session):
+        data = {}
+        logger.info('Importing demography...')
+        demography_query = session.query(
+            WnAbwDemography.ags_id.label('ags'),
+            WnAbwDemography.year,
+            WnAbwDemography.population,
+            WnAbwDemography.employees
+        ).order_by(WnAbwDemography.year,
+                   WnAbwDemography.ags_id)
+        data['demography'] = source.read('demography', demography_query,
+                                         session,
+                                         index_col=['year', 'ags'])
+
+        return data
 
     ############################
     # import demand timeseries #
     ############################
-    logger.info('Importing demand timeseries...')
-    demandts_query = session.query(
-        WnAbwDemandTs.ags_id.label('ags'),
-        WnAbwDemandTs.el_hh,
-        WnAbwDemandTs.el_rca,
-        WnAbwDemandTs.el_ind,
-        WnAbwDemandTs.th_hh_efh,
-        WnAbwDemandTs.th_hh_mfh,
-        WnAbwDemandTs.th_rca
-    ).order_by(WnAbwDemandTs.timestamp)
-    data['demand_ts_init'] = reformat_timeseries(
-        pd.read_sql_query(demandts_query.statement,
-                          session.bind)
-    )
-    data['demand_ts_init'].index = datetime_index_full_year
+    def import_demand_ts(session):
+        data = {}
+        logger.info('Importing demand timeseries...')
+        demandts_query = query_timeseries(
+            session,
+            WnAbwDemandTs,
+            ['el_hh', 'el_rca', 'el_ind', 'th_hh_efh', 'th_hh_mfh', 'th_rca'],
+            timerange,
+            source)
+        data['demand_ts_init'] = reformat_timeseries(
+            source.read('demand_ts_init', demandts_query,
+                        session, copy=True)
+        )
+        data['demand_ts_init'].index = datetime_index
+
+        return data
 
     ############################
     # import feedin timeseries #
     ############################
-    logger.info('Importing feedin timeseries...')
-    feedints_query = session.query(
-        WnAbwFeedinTs.ags_id.label('ags'),
-        WnAbwFeedinTs.wind_sq,
-        WnAbwFeedinTs.wind_fs,
-        WnAbwFeedinTs.pv_ground,
-        WnAbwFeedinTs.pv_roof,
-        WnAbwFeedinTs.hydro,
-        WnAbwFeedinTs.bio,
-        WnAbwFeedinTs.conventional,
-        WnAbwFeedinTs.solar_heat
-    ).order_by(WnAbwFeedinTs.timestamp)
-    data['feedin_ts_init'] = reformat_timeseries(
-        pd.read_sql_query(feedints_query.statement,
-                          session.bind)
-    )
-    data['feedin_ts_init'].index = datetime_index_full_year
+    def import_feedin_ts(session):
+        data = {}
+        logger.info('Importing feedin timeseries...')
+        feedints_query = query_timeseries(
+            session,
+            WnAbwFeedinTs,
+            feedin_wind_cols + ['pv_ground', 'pv_roof', 'hydro', 'bio',
+                                'conventional', 'solar_heat'],
+            timerange,
+            source)
+        data['feedin_ts_init'] = reformat_timeseries(
+            source.read('feedin_ts_init', feedints_query,
+                        session, copy=True)
+        )
+        data['feedin_ts_init'].index = datetime_index
+
+        return data
 
     #########################
     # import DSM timeseries #
     #########################
-    logger.info('Importing DSM timeseries...')
-    dsmts_query = session.query(
-        WnAbwDsmTs.ags_id.label('ags'),
-        WnAbwDsmTs.Lastprofil,
-        WnAbwDsmTs.Flex_Minus,
-        WnAbwDsmTs.Flex_Minus_Max,
-        WnAbwDsmTs.Flex_Plus,
-        WnAbwDsmTs.Flex_Plus_Max,
-    ).order_by(WnAbwDsmTs.timestamp)
-    data['dsm_ts'] = reformat_timeseries(
-        pd.read_sql_query(dsmts_query.statement,
-                          session.bind)
-    )
-    data['dsm_ts'].index = datetime_index_full_year
+    def import_dsm_ts(session):
+        data = {}
+        logger.info('Importing DSM timeseries...')
+        dsmts_query = query_timeseries(
+            session,
+            WnAbwDsmTs,
+            ['Lastprofil'] + dsm_flex_cols,
+            timerange,
+            source)
+        data['dsm_ts'] = reformat_timeseries(
+            source.read('dsm_ts', dsmts_query,
+                        session, copy=True)
+        )
+        data['dsm_ts'].index = datetime_index
+
+        return data
 
     #################################
     # import temperature timeseries #
     #################################
-    logger.info('Importing temperature timeseries...')
-    tempts_query = session.query(
-        WnAbwTempTs.ags_id.label('ags'),
-        WnAbwTempTs.air_temp,
-        WnAbwTempTs.soil_temp
-    ).order_by(WnAbwTempTs.timestamp)
-    data['temp_ts_init'] = reformat_timeseries(
-        pd.read_sql_query(tempts_query.statement,
-                          session.bind)
-    )
-    data['temp_ts_init'].index = datetime_index_full_year
+    def import_temp_ts(session):
+        data = {}
+        logger.info('Importing temperature timeseries...')
+        tempts_query = query_timeseries(
+            session,
+            WnAbwTempTs,
+            ['air_temp', 'soil_temp'],
+            timerange,
+            source)
+        data['temp_ts_init'] = reformat_timeseries(
+            source.read('temp_ts_init', tempts_query,
+                        session, copy=True)
+        )
+        data['temp_ts_init'].index = datetime_index
+
+        return data
 
     #####################################################################
     # import HV grid (buses, lines, trafos, substations+grid districts) #
     #####################################################################
-    logger.info('Importing HV grid...')
-    gridhvbus_query = session.query(
-        WnAbwGridHvBus.bus_id,
-        WnAbwGridHvBus.v_nom,
-        WnAbwGridHvBus.hvmv_subst_id,
-        WnAbwGridHvBus.region_bus,
-        WnAbwGridHvBus.ags_id.label('ags'),
-        func.ST_AsText(func.ST_Transform(
-            WnAbwGridHvBus.geom, srid)).label('geom'),
-    ).order_by(WnAbwGridHvBus.bus_id)
-    data['buses'] = pd.read_sql_query(gridhvbus_query.statement,
-                                      session.bind,
-                                      index_col='bus_id')
-    data['buses'] = convert_df_wkt_to_shapely(df=data['buses'],
-                                              cols=['geom'])
-
-    gridhvlines_query = session.query(
-        WnAbwGridHvLine.line_id,
-        WnAbwGridHvLine.bus0,
-        WnAbwGridHvLine.bus1,
-        WnAbwGridHvLine.x,
-        WnAbwGridHvLine.r,
-        WnAbwGridHvLine.g,
-        WnAbwGridHvLine.b,
-        WnAbwGridHvLine.s_nom,
-        WnAbwGridHvLine.length,
-        WnAbwGridHvLine.cables,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwGridHvLine.geom, srid)).label('geom'),
-    ).order_by(WnAbwGridHvLine.line_id)
-    data['lines'] = pd.read_sql_query(gridhvlines_query.statement,
-                                      session.bind)
-    data['lines'] = convert_df_wkt_to_shapely(df=data['lines'],
-                                              cols=['geom'])
-
-    gridhvtrafo_query = session.query(
-        WnAbwGridHvTransformer.trafo_id,
-        WnAbwGridHvTransformer.bus0,
-        WnAbwGridHvTransformer.bus1,
-        WnAbwGridHvTransformer.x,
-        WnAbwGridHvTransformer.r,
-        WnAbwGridHvTransformer.g,
-        WnAbwGridHvTransformer.b,
-        WnAbwGridHvTransformer.s_nom,
-        WnAbwGridHvTransformer.tap_ratio,
-        WnAbwGridHvTransformer.phase_shift,
-        WnAbwGridHvTransformer.ags_id.label('ags'),
-        func.ST_AsText(func.ST_Transform(
-            WnAbwGridHvTransformer.geom_point, srid)).label('geom'),
-    ).order_by(WnAbwGridHvTransformer.trafo_id)
-    data['trafos'] = pd.read_sql_query(gridhvtrafo_query.statement,
-                                       session.bind,
-                                       index_col='trafo_id')
-    data['trafos'] = convert_df_wkt_to_shapely(df=data['trafos'],
-                                               cols=['geom'])
-
-    gridhvmvsubst_query = session.query(
-        WnAbwGridHvmvSubstation.subst_id,
-        WnAbwGridHvmvSubstation.otg_id.label('bus_id'),
-        WnAbwGridHvmvSubstation.voltage,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwGridHvmvSubstation.geom, srid)).label('geom'),
-        func.ST_AsText(func.ST_Transform(
-            WnAbwGridMvGriddistrict.geom, srid)).label('geom_mvgd'),
-    ).join(
-        WnAbwGridMvGriddistrict,
-        WnAbwGridHvmvSubstation.subst_id == WnAbwGridMvGriddistrict.subst_id).\
-        order_by(WnAbwGridHvmvSubstation.subst_id)
-    data['subst'] = pd.read_sql_query(gridhvmvsubst_query.statement,
-                                      session.bind,
-                                      index_col='subst_id')
-    data['subst'] = convert_df_wkt_to_shapely(df=data['subst'],
-                                              cols=['geom', 'geom_mvgd'])
+    def import_buses(session):
+        data = {}
+        logger.info('Importing HV grid...')
+        gridhvbus_query = session.query(
+            WnAbwGridHvBus.bus_id,
+            WnAbwGridHvBus.v_nom,
+            WnAbwGridHvBus.hvmv_subst_id,
+            WnAbwGridHvBus.region_bus,
+            WnAbwGridHvBus.ags_id.label('ags'),
+            func.ST_AsText(func.ST_Transform(
+                WnAbwGridHvBus.geom, srid)).label('geom'),
+        ).order_by(WnAbwGridHvBus.bus_id)
+        data['buses'] = source.read('buses', gridhvbus_query,
+                                    session,
+                                    index_col='bus_id')
+        data['buses'] = convert_df_wkt_to_shapely(df=data['buses'],
+                                                  cols=['geom'])
+
+        return data
+
+    def import_lines(session):
+        data = {}
+        gridhvlines_query = session.query(
+            WnAbwGridHvLine.line_id,
+            WnAbwGridHvLine.bus0,
+            WnAbwGridHvLine.bus1,
+            WnAbwGridHvLine.x,
+            WnAbwGridHvLine.r,
+            WnAbwGridHvLine.g,
+            WnAbwGridHvLine.b,
+            WnAbwGridHvLine.s_nom,
+            WnAbwGridHvLine.length,
+            WnAbwGridHvLine.cables,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwGridHvLine.geom, srid)).label('geom'),
+        ).order_by(WnAbwGridHvLine.line_id)
+        data['lines'] = source.read('lines', gridhvlines_query,
+                                    session)
+        data['lines'] = convert_df_wkt_to_shapely(df=data['lines'],
+                                                  cols=['geom'])
+
+        return data
+
+    def import_trafos(session):
+        data = {}
+        gridhvtrafo_query = session.query(
+            WnAbwGridHvTransformer.trafo_id,
+            WnAbwGridHvTransformer.bus0,
+            WnAbwGridHvTransformer.bus1,
+            WnAbwGridHvTransformer.x,
+            WnAbwGridHvTransformer.r,
+            WnAbwGridHvTransformer.g,
+            WnAbwGridHvTransformer.b,
+            WnAbwGridHvTransformer.s_nom,
+            WnAbwGridHvTransformer.tap_ratio,
+            WnAbwGridHvTransformer.phase_shift,
+            WnAbwGridHvTransformer.ags_id.label('ags'),
+            func.ST_AsText(func.ST_Transform(
+                WnAbwGridHvTransformer.geom_point, srid)).label('geom'),
+        ).order_by(WnAbwGridHvTransformer.trafo_id)
+        data['trafos'] = source.read('trafos', gridhvtrafo_query,
+                                     session,
+                                     index_col='trafo_id')
+        data['trafos'] = convert_df_wkt_to_shapely(df=data['trafos'],
+                                                   cols=['geom'])
+
+        return data
+
+    def import_subst(session):
+        data = {}
+        gridhvmvsubst_query = session.query(
+            WnAbwGridHvmvSubstation.subst_id,
+            WnAbwGridHvmvSubstation.otg_id.label('bus_id'),
+            WnAbwGridHvmvSubstation.voltage,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwGridHvmvSubstation.geom, srid)).label('geom'),
+            func.ST_AsText(func.ST_Transform(
+                WnAbwGridMvGriddistrict.geom, srid)).label('geom_mvgd'),
+        ).join(
+            WnAbwGridMvGriddistrict,
+            WnAbwGridHvmvSubstation.subst_id == WnAbwGridMvGriddistrict.subst_id).\
+            order_by(WnAbwGridHvmvSubstation.subst_id)
+        data['subst'] = source.read('subst', gridhvmvsubst_query,
+                                    session,
+                                    index_col='subst_id')
+        data['subst'] = convert_df_wkt_to_shapely(df=data['subst'],
+                                                  cols=['geom', 'geom_mvgd'])
+
+        return data
 
     #####################
     # import generators #
     #####################
-    logger.info('Importing generators...')
-    generators_query = session.query(
-        WnAbwPowerplant.id,
-        WnAbwPowerplant.ags_id,
-        WnAbwPowerplant.capacity,
-        WnAbwPowerplant.chp,
-        WnAbwPowerplant.com_month,
-        WnAbwPowerplant.com_year,
-        WnAbwPowerplant.energy_source_level_1,
-        WnAbwPowerplant.energy_source_level_2,
-        WnAbwPowerplant.energy_source_level_3,
-        WnAbwPowerplant.technology,
-        WnAbwPowerplant.thermal_capacity,
-        WnAbwPowerplant.capacity_in,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwPowerplant.geometry, srid)).label('geom')
-    )
-    data['generators'] = pd.read_sql_query(generators_query.statement,
-                                           session.bind,
-                                           index_col='id')
-    data['generators'] = convert_df_wkt_to_shapely(df=data['generators'],
-                                                   cols=['geom'])
+    def import_generators(session):
+        data = {}
+        logger.info('Importing generators...')
+        generators_query = session.query(
+            WnAbwPowerplant.id,
+            WnAbwPowerplant.ags_id,
+            WnAbwPowerplant.capacity,
+            WnAbwPowerplant.chp,
+            WnAbwPowerplant.com_month,
+            WnAbwPowerplant.com_year,
+            WnAbwPowerplant.energy_source_level_1,
+            WnAbwPowerplant.energy_source_level_2,
+            WnAbwPowerplant.energy_source_level_3,
+            WnAbwPowerplant.technology,
+            WnAbwPowerplant.thermal_capacity,
+            WnAbwPowerplant.capacity_in,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwPowerplant.geometry, srid)).label('geom')
+        )
+        data['generators'] = source.read('generators', generators_query,
+                                         session,
+                                         index_col='id')
+        data['generators'] = convert_df_wkt_to_shapely(df=data['generators'],
+                                                       cols=['geom'])
+
+        return data
 
     #####################################
     # import heating structure (hh+rca) #
     #####################################
-    logger.info('Importing heating structure...')
-    heating_structure_query = session.query(
-        WnAbwHeatingStructure.ags_id,
-        WnAbwHeatingStructure.year,
-        WnAbwHeatingStructure.energy_source,
-        WnAbwHeatingStructure.tech_share_hh_efh.label('hh_efh'),
-        WnAbwHeatingStructure.tech_share_hh_mfh.label('hh_mfh'),
-        WnAbwHeatingStructure.tech_share_rca.label('rca')
-    )
-    data['heating_structure'] = pd.read_sql_query(
-        heating_structure_query.statement,
-        session.bind,
-        index_col=['ags_id', 'energy_source', 'year'])
+    def import_heating_structure(session):
+        data = {}
+        logger.info('Importing heating structure...')
+        heating_structure_query = session.query(
+            WnAbwHeatingStructure.ags_id,
+            WnAbwHeatingStructure.year,
+            WnAbwHeatingStructure.energy_source,
+            WnAbwHeatingStructure.tech_share_hh_efh.label('hh_efh'),
+            WnAbwHeatingStructure.tech_share_hh_mfh.label('hh_mfh'),
+            WnAbwHeatingStructure.tech_share_rca.label('rca')
+        )
+        data['heating_structure'] = source.read(
+            'heating_structure', heating_structure_query,
+            session,
+            index_col=['ags_id', 'energy_source', 'year'])
+
+        return data
 
     #######################################################
     # import technical assumptions (costs, eff, emissions #
     #######################################################
-    # convert units to MW/MWh (cf. table "Kosten_Emissionen_Wirkungsgrade")
-    logger.info('Importing technical assumptions...')
-    tech_assumptions_query = session.query(
-        WnAbwTechAssumptions.technology,
-        WnAbwTechAssumptions.year,
-        WnAbwTechAssumptions.technology_name,
-        (WnAbwTechAssumptions.capex * 1000).label('capex'),
-        (WnAbwTechAssumptions.opex_fix * 1000).label('opex_fix'),
-        (WnAbwTechAssumptions.opex_var * 1000).label('opex_var'),
-        WnAbwTechAssumptions.lifespan,
-        WnAbwTechAssumptions.emissions_fix,
-        WnAbwTechAssumptions.emissions_var,
-        (WnAbwTechAssumptions.sys_eff / 100).label('sys_eff'),
-        (WnAbwTechAssumptions.wacc / 100).label('wacc')
-    )
-    data['tech_assumptions'] = pd.read_sql_query(
-        tech_assumptions_query.statement,
-        session.bind,
-        index_col=['technology', 'year'])
+    def import_tech_assumptions(session):
+        data = {}
+        # convert units to MW/MWh (cf. table "Kosten_Emissionen_Wirkungsgrade")
+        logger.info('Importing technical assumptions...')
+        tech_assumptions_query = session.query(
+            WnAbwTechAssumptions.technology,
+            WnAbwTechAssumptions.year,
+            WnAbwTechAssumptions.technology_name,
+            (WnAbwTechAssumptions.capex * 1000).label('capex'),
+            (WnAbwTechAssumptions.opex_fix * 1000).label('opex_fix'),
+            (WnAbwTechAssumptions.opex_var * 1000).label('opex_var'),
+            WnAbwTechAssumptions.lifespan,
+            WnAbwTechAssumptions.emissions_fix,
+            WnAbwTechAssumptions.emissions_var,
+            (WnAbwTechAssumptions.sys_eff / 100).label('sys_eff'),
+            (WnAbwTechAssumptions.wacc / 100).label('wacc')
+        )
+        data['tech_assumptions'] = source.read(
+            'tech_assumptions', tech_assumptions_query,
+            session,
+            index_col=['technology', 'year'])
+
+        return data
 
     #####################################
     # import WEC and PV potential areas #
     #####################################
-    logger.info('Importing RE potential areas...')
-    pot_areas_pv_query = session.query(
-        WnAbwPotentialAreasPv.ags_id,
-        WnAbwPotentialAreasPv.scenario,
-        WnAbwPotentialAreasPv.area_ha,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwPotentialAreasPv.geom, srid)).label('geom')
-    )
-    data['pot_areas_pv'] = pd.read_sql_query(
-        pot_areas_pv_query.statement,
-        session.bind,
-        index_col=['ags_id', 'scenario'])
-
-    pot_areas_pv_roof_query = session.query(
-        WnAbwPotentialAreasPvRoof.ags_id,
-        WnAbwPotentialAreasPvRoof.area_resid_ha,
-        WnAbwPotentialAreasPvRoof.area_ind_ha
-    )
-    data['pot_areas_pv_roof'] = pd.read_sql_query(
-        pot_areas_pv_roof_query.statement,
-        session.bind,
-        index_col=['ags_id'])
-
-    pot_areas_wec_query = session.query(
-        WnAbwPotentialAreasWec.ags_id,
-        WnAbwPotentialAreasWec.scenario,
-        WnAbwPotentialAreasWec.area_ha,
-        func.ST_AsText(func.ST_Transform(
-            WnAbwPotentialAreasWec.geom, srid)).label('geom')
-    )
-    data['pot_areas_wec'] = pd.read_sql_query(
-        pot_areas_wec_query.statement,
-        session.bind,
-        index_col=['ags_id', 'scenario'])
+    def import_pot_areas_pv(session):
+        data = {}
+        logger.info('Importing RE potential areas...')
+        pot_areas_pv_query = session.query(
+            WnAbwPotentialAreasPv.ags_id,
+            WnAbwPotentialAreasPv.scenario,
+            WnAbwPotentialAreasPv.area_ha,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwPotentialAreasPv.geom, srid)).label('geom')
+        )
+        data['pot_areas_pv'] = source.read(
+            'pot_areas_pv', pot_areas_pv_query,
+            session,
+            index_col=['ags_id', 'scenario'])
+
+        return data
+
+    def import_pot_areas_pv_roof(session):
+        data = {}
+        pot_areas_pv_roof_query = session.query(
+            WnAbwPotentialAreasPvRoof.ags_id,
+            WnAbwPotentialAreasPvRoof.area_resid_ha,
+            WnAbwPotentialAreasPvRoof.area_ind_ha
+        )
+        data['pot_areas_pv_roof'] = source.read(
+            'pot_areas_pv_roof', pot_areas_pv_roof_query,
+            session,
+            index_col=['ags_id'])
+
+        return data
+
+    def import_pot_areas_wec(session):
+        data = {}
+        pot_areas_wec_query = session.query(
+            WnAbwPotentialAreasWec.ags_id,
+            WnAbwPotentialAreasWec.scenario,
+            WnAbwPotentialAreasWec.area_ha,
+            func.ST_AsText(func.ST_Transform(
+                WnAbwPotentialAreasWec.geom, srid)).label('geom')
+        )
+        data['pot_areas_wec'] = source.read(
+            'pot_areas_wec', pot_areas_wec_query,
+            session,
+            index_col=['ags_id', 'scenario'])
+
+        return data
+
+    ############################
+    # run imports concurrently #
+    ############################
+    importers = [import_muns, import_demography, import_demand_ts,
+                 import_feedin_ts, import_dsm_ts, import_temp_ts,
+                 import_buses, import_lines, import_trafos, import_subst,
+                 import_generators, import_heating_structure,
+                 import_tech_assumptions, import_pot_areas_pv,
+                 import_pot_areas_pv_roof, import_pot_areas_wec]
+
+    def run_importer(importer):
+        """Run importer in new session and log elapsed time"""
+        session = source.session()
+        time_start = time.perf_counter()
+        try:
+            imported = importer(session)
+        finally:
+            session.close()
+        logger.info(f'Imported {", ".join(imported.keys())} in '
+                    f'{time.perf_counter() - time_start:.2f} s')
+        return imported
+
+    # note: map() preserves the order of importers
+    data = {}
+    try:
+        with ThreadPoolExecutor(
+                max_workers=int(cfg.get('db_pool_size', 1))) as executor:
+            for imported in executor.map(run_importer, importers):
+                data.update(imported)
+    finally:
+        # close DB connections, the data source is created per import
+        source.close()
 
     return data
 
 
+def share_db_data(data):
+    """Store large timeseries of imported data in memory-mapped files to share
+    them across processes
+
+    The timeseries are written to a temporary directory once, processes
+    attaching to the data (see :func:`attach_db_data`) use read-only memory
+    maps of these files. Hence, the data is held in memory only once (OS page
+    cache) regardless of the number of processes.
+
+    Parameters
+    ----------
+    data : :obj:`dict`
+        Imported data as returned by :func:`import_db_data`
+
+    Returns
+    -------
+    :obj:`dict`
+        Spec of shared data (picklable), to be passed to
+        :func:`attach_db_data` and :func:`release_shared_db_data`
+    """
+    ts_names = ['demand_ts_init', 'feedin_ts_init', 'dsm_ts', 'temp_ts_init']
+
+    path = tempfile.mkdtemp(prefix='windnode_abw_')
+    spec = {'path': path,
+            'data': {},
+            'timeseries': {}}
+
+    for name, df in data.items():
+        if name in ts_names:
+            file = os.path.join(path, f'{name}.npy')
+            np.save(file, df.to_numpy(dtype='float64'))
+            spec['timeseries'][name] = {'file': file,
+                                        'index': df.index,
+                                        'columns': df.columns}
+        else:
+            spec['data'][name] = df
+
+    logger.info(f'Shared timeseries {list(spec["timeseries"].keys())} '
+                f'in {path}')
+
+    return spec
+
+
+def attach_db_data(spec):
+    """Create data dict from shared data
+
+    Timeseries DataFrames are created on top of read-only memory maps (no
+    copy), all other data is copied as it is modified during creation of
+    :class:`~.model.Region`.
+
+    Parameters
+    ----------
+    spec : :obj:`dict`
+        Spec of shared data as returned by :func:`share_db_data`
+
+    Returns
+    -------
+    :obj:`dict`
+        Imported data (same structure as returned by :func:`import_db_data`)
+    """
+    data = {name: df.copy() for name, df in spec['data'].items()}
+
+    for name, ts in spec['timeseries'].items():
+        data[name] = pd.DataFrame(np.load(ts['file'], mmap_mode='r'),
+                                  index=ts['index'],
+                                  columns=ts['columns'],
+                                  copy=False)
+
+    return data
+
+
+def release_shared_db_data(spec):
+    """Remove files of shared data
+
+    Parameters
+    ----------
+    spec : :obj:`dict`
+        Spec of shared data as returned by :func:`share_db_data`
+    """
+    shutil.rmtree(spec['path'], ignore_errors=True)
+
+
 def reformat_timeseries(ts):
     """Reformat timeseries
 
+    The rows are sorted by municipality and timestamp once and the value
+    columns are reshaped directly to a (time x technology x municipality)
+    block. The timeseries of all municipalities must be complete (same
+    number of timesteps), missing values are set to 0.
+
     Parameters
     ----------
     ts : :pandas:`pandas.DataFrame`
-        Normalized timeseries with
+        Normalized timeseries with column 'ags' and one column per
+        technology, ordered by timestamp (optional column 'timestamp' is used
+        for sorting if present)
 
     Returns
     -------
     :pandas:`pandas.DataFrame`
         Normalized timeseries with technology & mun MultiIndex on columns
     """
+    value_cols = [col for col in ts.columns if col not in ['ags', 'timestamp']]
 
-    return ts.pivot(index=ts.index, columns='ags') \
-        .apply(lambda _: pd.Series(_.dropna().values)) \
-        .fillna(0)
+    # stable sort by mun -> order of timesteps is preserved
+    if 'timestamp' in ts.columns:
+        order = np.lexsort((ts['timestamp'].to_numpy(),
+                            ts['ags'].to_numpy()))
+    else:
+        order = np.argsort(ts['ags'].to_numpy(), kind='stable')
+
+    ags, counts = np.unique(ts['ags'].to_numpy(), return_counts=True)
+    if len(counts) > 0 and (counts != counts[0]).any():
+        msg = f'Timeseries are incomplete, number of timesteps differs ' \
+              f'between municipalities: ' \
+              f'{dict(zip(ags[counts != counts.max()], counts[counts != counts.max()]))}'
+        logger.error(msg)
+        raise ValueError(msg)
+    timesteps = counts[0] if len(counts) > 0 else 0
+
+    # (mun x time x tech) -> (time x tech x mun)
+    values = np.nan_to_num(
+        ts[value_cols].to_numpy(dtype='float64')[order]
+    ).reshape(len(ags), timesteps, len(value_cols)).transpose(1, 2, 0)
+
+    return pd.DataFrame(
+        values.reshape(timesteps, len(value_cols) * len(ags)),
+        columns=pd.MultiIndex.from_product([value_cols, ags],
+                                           names=[None, 'ags'])
+    )
 
 
 def oemof_nodes_from_excel(filename, header_lines=0):
@@ -620,10 +1566,12 @@ def load_scenario_cfg(scn_name=None):
         return convert2numeric(dict(ConfigObj(path)))
 
 
-def export_results(results, cfg, solver_meta, infeasible):
-    """Export results to CSV file, meta infos to JSON file
+def export_results(results, cfg, solver_meta, infeasible,
+                   ts_aggregation=None):
+    """Export results to files, meta infos to JSON file
 
-    A new directory is created
+    A new directory is created. The file format is set by the run config
+    (see `results_format` in :func:`write_results`).
 
     Parameters
     ----------
@@ -635,6 +1583,15 @@ def export_results(results, cfg, solver_meta, infeasible):
         Meta infos from optimization
     infeasible : :obj:`bool`
         Model was infeasible
+    ts_aggregation : :obj:`dict`
+        Meta infos of typical periods if model was built on aggregated
+        timeseries, see
+        :meth:`~.model.region.aggregation.TypicalPeriods.meta`
+
+    Returns
+    -------
+    :obj:`str`
+        Results directory
     """
     scenario_id = cfg['scn_data']['general']['id']
     meta = {
@@ -643,6 +1600,8 @@ def export_results(results, cfg, solver_meta, infeasible):
         'memory_used_wo_solver': f'{str(log_memory_usage())} MB',
         'solver': solver_meta
     }
+    if ts_aggregation is not None:
+        meta['ts_aggregation'] = ts_aggregation
 
     base_path = os.path.join(config.get_data_root_dir(),
                              config.get('user_dirs',
@@ -660,15 +1619,524 @@ def export_results(results, cfg, solver_meta, infeasible):
             'params_stat': results['params_stat']
         }
 
-    for name, df in results.items():
-        df.to_csv(os.path.join(results_path, f'{name}.csv'))
+    for name, data in results.items():
+        write_results(data=data,
+                      path=results_path,
+                      name=name,
+                      results_format=cfg.get('results_format', 'csv'),
+                      float32=cfg.get('results_float32', False),
+                      compression=cfg.get('results_compression', 'snappy'))
 
     with open(os.path.join(results_path, 'meta.json'), 'w', encoding='utf-8') as file:
         json.dump(meta, file, default=lambda _: '', ensure_ascii=False, indent=2)
 
+    return results_path
 
-def load_results(timestamp, scenario):
-    """Load results from CSV and JSON
+
+def write_results(data, path, name, results_format='parquet', float32=False,
+                  compression='snappy'):
+    """Write single results DataFrame or Series to file
+
+    Formats:
+
+    * 'parquet': One column per node pair, the node pair (e.g. (from, to)
+      of a flow) is stored in the field's metadata (key `labels`) and is
+      restored by :func:`read_results_parquet`. The index is stored in an
+      extra column. Series are stored as a single row.
+    * 'csv' (legacy): node pair as two-row header
+
+    Parameters
+    ----------
+    data : :pandas:`pandas.DataFrame` or :pandas:`pandas.Series`
+        Results with node pairs as columns (DataFrame) or index (Series)
+    path : :obj:`str`
+        Results directory
+    name : :obj:`str`
+        Name of results, e.g. 'flows'. Used as file name.
+    results_format : :obj:`str`
+        File format, one of 'parquet', 'csv'
+    float32 : :obj:`bool`
+        Downcast float columns to float32 (parquet only)
+    compression : :obj:`str`
+        Compression, e.g. 'snappy', 'gzip', 'zstd' or None (parquet only)
+    """
+    if results_format == 'csv':
+        data.to_csv(os.path.join(path, f'{name}.csv'))
+    elif results_format == 'parquet':
+        pq.write_table(_results_to_table(data, float32=float32),
+                       os.path.join(path, f'{name}.parquet'),
+                       compression=compression)
+    else:
+        msg = f'Unknown results format: {results_format}'
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+def _results_to_table(data, float32=False):
+    """Convert results DataFrame or Series to Arrow table, see
+    :func:`write_results`
+
+    Mixed-type columns (e.g. flow params) are converted to str as in the
+    CSV format.
+    """
+    series = isinstance(data, pd.Series)
+    if series:
+        name = data.name
+        data = data.to_frame(name=0 if name is None else name).T
+
+    index = data.index
+    if not isinstance(index, pd.DatetimeIndex):
+        index = index.astype(str)
+    arrays = [pa.array(index)]
+    fields = [pa.field('index', arrays[0].type)]
+
+    for labels, col in data.items():
+        if not isinstance(labels, tuple):
+            labels = (labels,)
+        labels = [str(_) for _ in labels]
+        if float32 and col.dtype == np.float64:
+            col = col.astype(np.float32)
+        metadata = {'labels': json.dumps(labels, ensure_ascii=False)}
+        try:
+            array = pa.array(col, from_pandas=True)
+        except (pa.ArrowException, TypeError, ValueError):
+            array = pa.array(col.where(col.isna(), col.astype(str)),
+                             type=pa.string(), from_pandas=True)
+            metadata['infer'] = 'true'
+        fields.append(pa.field(' -> '.join(labels), array.type,
+                               metadata=metadata))
+        arrays.append(array)
+
+    schema_metadata = {'series': json.dumps(series)}
+    if series:
+        schema_metadata['name'] = json.dumps(name)
+
+    return pa.Table.from_arrays(arrays,
+                                schema=pa.schema(fields,
+                                                 metadata=schema_metadata))
+
+
+class ResultsWriter:
+    """Write results DataFrame to parquet file in column groups
+
+    Column groups (e.g. flows of some nodes) are written to temporary Arrow
+    files as they are extracted (see :func:`~.analysis.tools.iter_model_flows`),
+    hence the entire results are never held in memory. On :meth:`close`, the
+    parquet file (same format as :func:`write_results`, columns sorted by
+    node pair) is assembled from the memory-mapped column groups in row
+    groups of `row_group_size` rows. If no column group has been written,
+    results without columns are written (as :func:`write_results` does for an
+    empty DataFrame).
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Results directory
+    name : :obj:`str`
+        Name of results, e.g. 'flows'. Used as file name.
+    float32 : :obj:`bool`
+        Downcast float columns to float32
+    compression : :obj:`str`
+        Compression, e.g. 'snappy', 'gzip', 'zstd' or None
+    row_group_size : :obj:`int`
+        Number of rows per row group
+
+    Examples
+    --------
+    >>> writer = ResultsWriter(path, 'flows')
+    >>> for flows in iter_model_flows(om):
+    ...     writer.write(flows)
+    >>> writer.close()
+    """
+    def __init__(self, path, name, float32=False, compression='snappy',
+                 row_group_size=744):
+        self.path = path
+        self.name = name
+        self.float32 = float32
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._parts = []
+
+    def write(self, data):
+        """Write column group
+
+        Parameters
+        ----------
+        data : :pandas:`pandas.DataFrame`
+            Results with node pairs as columns, same index in all column
+            groups
+        """
+        table = _results_to_table(data, float32=self.float32)
+        file = os.path.join(self.path,
+                            f'.{self.name}.{len(self._parts)}.arrow')
+        with pa.OSFile(file, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        self._parts.append(file)
+
+    def close(self):
+        """Assemble parquet file from column groups and remove temporary
+        files"""
+        try:
+            tables = [pa.ipc.open_file(pa.memory_map(file)).read_all()
+                      for file in self._parts]
+            if not tables:
+                tables = [_results_to_table(pd.DataFrame(),
+                                            float32=self.float32)]
+            if len({table.num_rows for table in tables}) > 1:
+                msg = f'Column groups of {self.name} differ in number of ' \
+                      f'rows, index must be the same in all groups'
+                logger.error(msg)
+                raise ValueError(msg)
+
+            columns = sorted(
+                ((json.loads(field.metadata[b'labels']), field,
+                  table.column(n))
+                 for table in tables
+                 for n, field in enumerate(table.schema)
+                 if field.name != 'index'),
+                key=lambda column: column[0])
+            index = tables[0].column('index')
+            schema = pa.schema(
+                [tables[0].schema.field('index')] +
+                [field for _, field, _ in columns],
+                metadata=tables[0].schema.metadata)
+
+            with pq.ParquetWriter(os.path.join(self.path,
+                                               f'{self.name}.parquet'),
+                                  schema,
+                                  compression=self.compression) as writer:
+                # empty index: write single empty row group
+                for start in range(0, max(len(index), 1),
+                                   self.row_group_size):
+                    writer.write_table(pa.Table.from_arrays(
+                        [index.slice(start, self.row_group_size)] +
+                        [column.slice(start, self.row_group_size)
+                         for _, _, column in columns],
+                        schema=schema))
+            del tables, columns, index
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Remove temporary files"""
+        for file in self._parts:
+            os.remove(file)
+        self._parts = []
+
+
+def read_results_parquet(file, columns=None, memory_map=False):
+    """Read results from parquet file written by :func:`write_results`
+
+    Parameters
+    ----------
+    file : :obj:`str`
+        Path to parquet file
+    columns : :obj:`list` of :obj:`tuple`
+        Node pairs to be read, all if None. Only the requested columns are
+        read from file.
+    memory_map : :obj:`bool`
+        Memory-map file instead of reading it into memory
+
+    Returns
+    -------
+    :pandas:`pandas.DataFrame` or :pandas:`pandas.Series`
+        Results with node pairs as columns (DataFrame) or index (Series),
+        time index (if any) as str as in the CSV format
+    """
+    schema = pq.read_schema(file, memory_map=memory_map)
+    fields = _results_parquet_fields(schema)
+
+    if columns is not None:
+        columns = {tuple(str(_) for _ in col) for col in columns}
+        fields = {name: field for name, field in fields.items()
+                  if field[0] in columns}
+
+    data = pq.read_table(file,
+                         columns=['index'] + list(fields),
+                         memory_map=memory_map).to_pandas()
+    data = data.set_index('index')
+    data.index.name = None
+    for name, (_, infer) in fields.items():
+        if infer:
+            # restore dtypes of mixed-type columns as in the CSV format
+            data[name] = pd.to_numeric(
+                data[name].where(data[name].notna(), np.nan),
+                errors='ignore')
+    data.columns = pd.MultiIndex.from_tuples(
+        [labels for labels, _ in fields.values()]) if fields \
+        else pd.MultiIndex.from_tuples([], names=[None, None])
+    if isinstance(data.index, pd.DatetimeIndex):
+        data.index = data.index.astype(str)
+
+    if json.loads(schema.metadata[b'series']):
+        data = data.iloc[0].rename(json.loads(schema.metadata[b'name']))
+        if data.dtype == object:
+            # values of different types: restore dtype of entire Series as
+            # in the CSV format
+            data = pd.to_numeric(
+                data.astype(str).where(data.notna(), np.nan),
+                errors='ignore')
+
+    return data
+
+
+def _results_parquet_fields(schema):
+    """Get node pair fields of results parquet file (see
+    :func:`write_results`)
+
+    Returns
+    -------
+    :obj:`dict`
+        Node pair (:obj:`tuple`) and flag if dtypes are to be inferred
+        (:obj:`bool`, mixed-type or empty fields) per field name
+    """
+    return {field.name: (tuple(json.loads(field.metadata[b'labels'])),
+                         b'infer' in field.metadata
+                         or field.type == pa.null())
+            for field in schema
+            if b'labels' in (field.metadata or {})}
+
+
+def export_stage_profile(cfg, stages, memory=None):
+    """Export stage profile (timing and memory usage) to JSON file next to
+    meta infos of results
+
+    If memory samples are given, they are exported to CSV file and the peak
+    memory usage (total and per stage, incl. child processes such as the
+    solver) is added to the meta infos.
+
+    Parameters
+    ----------
+    cfg : :obj:`dict`
+        Run and scenario config
+    stages : :obj:`list` of :obj:`dict`
+        Recorded stages, see :class:`~.tools.logger.StageProfiler`
+    memory : :pandas:`pandas.DataFrame`
+        Memory samples, see :attr:`~.tools.logger.MemorySampler.samples`
+    """
+    results_path = os.path.join(config.get_data_root_dir(),
+                                config.get('user_dirs',
+                                           'results_dir'),
+                                cfg['run_timestamp'],
+                                cfg['scn_data']['general']['id'])
+    os.makedirs(results_path, exist_ok=True)
+
+    with open(os.path.join(results_path, 'profile.json'), 'w',
+              encoding='utf-8') as file:
+        json.dump({'scenario': cfg['scenario'],
+                   'stages': stages},
+                  file, ensure_ascii=False, indent=2)
+
+    if memory is not None:
+        memory.to_csv(os.path.join(results_path, 'memory.csv'))
+
+        # add peaks to meta infos
+        meta_file = os.path.join(results_path, 'meta.json')
+        if os.path.isfile(meta_file):
+            with open(meta_file, encoding='utf-8') as file:
+                meta = json.load(file)
+            meta['memory_peak_incl_solver'] = \
+                f'{int(memory.sum(axis=1).max())} MB'
+            meta['memory_peak_stages'] = {
+                stage['stage']: f'{stage["rss_peak_total"]} MB'
+                for stage in stages if 'rss_peak_total' in stage}
+            with open(meta_file, 'w', encoding='utf-8') as file:
+                json.dump(meta, file, ensure_ascii=False, indent=2)
+
+
+def run_manifest_path(run_timestamp):
+    """Get path of run manifest (progress of scenarios in run)
+
+    The manifest is a hidden file in the run's results directory so that it
+    is not considered as scenario, e.g. by :func:`~.analysis.analysis`.
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+
+    Returns
+    -------
+    :obj:`str`
+        Path to manifest file
+    """
+    return os.path.join(config.get_data_root_dir(),
+                        config.get('user_dirs',
+                                   'results_dir'),
+                        run_timestamp,
+                        '.manifest.json')
+
+
+def load_run_manifest(run_timestamp):
+    """Load run manifest
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+
+    Returns
+    -------
+    :obj:`dict`
+        Manifest with run config ('config') and status per scenario
+        ('scenarios'), None if not existent
+    """
+    file = run_manifest_path(run_timestamp)
+    if not os.path.isfile(file):
+        return None
+    with open(file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_run_config(run_timestamp):
+    """Load config of run
+
+    The config is taken from the run manifest. For runs created before the
+    manifest was introduced, the config is taken from the meta infos of a
+    scenario's results (without scenario-specific keys).
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+
+    Returns
+    -------
+    :obj:`dict`
+        Run config, None if not found
+    """
+    manifest = load_run_manifest(run_timestamp)
+    if manifest is not None and manifest.get('config'):
+        return manifest['config']
+
+    run_path = os.path.join(config.get_data_root_dir(),
+                            config.get('user_dirs',
+                                       'results_dir'),
+                            run_timestamp)
+    for scn_id in sorted(os.listdir(run_path)):
+        meta = load_results_meta(timestamp=run_timestamp, scenario=scn_id)
+        if meta is not None and meta.get('config'):
+            return {key: value for key, value in meta['config'].items()
+                    if key not in ['scenario', 'scn_data']}
+
+    return None
+
+
+def update_run_manifest(run_timestamp, scenarios, status, cfg=None):
+    """Set status of scenarios in run manifest, create manifest if not
+    existent
+
+    The manifest is written atomically (temp. file + rename), so it is never
+    left in a corrupt state if the run is interrupted.
+
+    Status of scenarios and transitions (see `run_scenario.py`):
+
+    * 'pending': Scenario is to be run, set for all scenarios at start of
+      (resumed) run. Transitions to 'solved', 'done' or 'infeasible'.
+    * 'solved': Model is solved and raw results are exported but the
+      analysis is pending (analysis in separate process) or failed.
+      Transitions to 'done' when the analysis succeeds.
+    * 'done': Results are analyzed (or analysis is disabled). Final.
+    * 'infeasible': Model is infeasible, only input params and meta info are
+      exported. Final.
+
+    When a run is resumed, scenarios with status 'done' or 'infeasible' and
+    complete results are skipped, scenarios with status 'solved' and
+    complete results are analyzed only. All other scenarios (incl. those with
+    incomplete results) are cleared and set to 'pending'. The run config
+    stored in the manifest is used for the resumed run (see
+    :func:`load_run_config`).
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+    scenarios : :obj:`list` of :obj:`str`
+        Scenarios
+    status : :obj:`str`
+        Status, one of 'pending', 'solved', 'done', 'infeasible'
+    cfg : :obj:`dict`
+        Run config, stored at creation of manifest
+    """
+    manifest = load_run_manifest(run_timestamp) or \
+        {'config': cfg, 'scenarios': {}}
+    for scn in scenarios:
+        manifest['scenarios'][scn] = {
+            'status': status,
+            'updated': time.strftime('%Y-%m-%d_%H%M%S')
+        }
+
+    file = run_manifest_path(run_timestamp)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    file_tmp = f'{file}.{os.getpid()}.tmp'
+    with open(file_tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, default=lambda _: '', ensure_ascii=False,
+                  indent=2)
+    os.replace(file_tmp, file)
+
+
+def validate_results(run_timestamp, scn_id):
+    """Check if results of scenario are complete
+
+    Meta infos must be readable and all results files written by
+    :func:`export_results` must exist.
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+    scn_id : :obj:`str`
+        Scenario id
+
+    Returns
+    -------
+    :obj:`bool`
+        True if results are complete
+    """
+    results_path = os.path.join(config.get_data_root_dir(),
+                                config.get('user_dirs',
+                                           'results_dir'),
+                                run_timestamp,
+                                scn_id)
+    try:
+        with open(os.path.join(results_path, 'meta.json'),
+                  encoding='utf-8') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return False
+
+    files = ['params_flows', 'params_stat']
+    if not meta.get('infeasible', False):
+        files += ['flows', 'vars_stat', 'invest']
+    ext = meta.get('config', {}).get('results_format', 'csv')
+
+    return all(os.path.isfile(os.path.join(results_path, f'{file}.{ext}'))
+               for file in files)
+
+
+def clear_results(run_timestamp, scn_id):
+    """Delete (partial) results of scenario
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+    scn_id : :obj:`str`
+        Scenario id
+    """
+    results_path = os.path.join(config.get_data_root_dir(),
+                                config.get('user_dirs',
+                                           'results_dir'),
+                                run_timestamp,
+                                scn_id)
+    if os.path.isdir(results_path):
+        logger.info(f'Deleting partial results in {results_path}')
+        shutil.rmtree(results_path)
+
+
+def load_results_meta(timestamp, scenario):
+    """Load meta infos of results from JSON
 
     Parameters
     ----------
@@ -677,6 +2145,38 @@ def load_results(timestamp, scenario):
     scenario : :obj:`str`
         Scenario id, e.g. "sq"
 
+    Returns
+    -------
+    :obj:`dict`
+        Meta infos incl. config, None if not found or malformed
+    """
+    meta_file = os.path.join(config.get_data_root_dir(),
+                             config.get('user_dirs',
+                                        'results_dir'),
+                             timestamp,
+                             scenario,
+                             'meta.json')
+    try:
+        with open(meta_file, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def load_results(timestamp, scenario, lazy=False):
+    """Load results from CSV or parquet files (see :func:`write_results`)
+    and JSON
+
+    Parameters
+    ----------
+    timestamp : :obj:`str`
+        Timestamp of results, format: yymmdd_HHMMSS
+    scenario : :obj:`str`
+        Scenario id, e.g. "sq"
+    lazy : :obj:`bool`
+        Return lazy handle (see :class:`LazyResults`) which loads results
+        on access
+
     Returns
     -------
     :obj:`dict`
@@ -703,6 +2203,12 @@ def load_results(timestamp, scenario):
 
     logger.info(f'Loading raw results...')
 
+    if lazy:
+        try:
+            return LazyResults(timestamp=timestamp, scenario=scenario)
+        except FileNotFoundError:
+            return None
+
     # DataFrames
     df_files = ['flows', 'vars_stat', 'params_flows']
     # Series
@@ -710,18 +2216,25 @@ def load_results(timestamp, scenario):
 
     results = {}
     try:
-        for file in df_files:
-            results[file] = pd.read_csv(os.path.join(results_path, f'{file}.csv'),
-                                        index_col=0,
-                                        header=[0, 1])
-        for file in se_files:
-            results[file] = pd.read_csv(os.path.join(results_path, f'{file}.csv'),
-                                        index_col=[0, 1],
-                                        header=0,
-                                        squeeze=True)
-
         with open(os.path.join(results_path, 'meta.json')) as file:
-            results['meta'] = json.load(file)
+            meta = json.load(file)
+
+        if meta['config'].get('results_format', 'csv') == 'parquet':
+            for file in df_files + se_files:
+                results[file] = read_results_parquet(
+                    os.path.join(results_path, f'{file}.parquet'))
+        else:
+            for file in df_files:
+                results[file] = pd.read_csv(os.path.join(results_path, f'{file}.csv'),
+                                            index_col=0,
+                                            header=[0, 1])
+            for file in se_files:
+                results[file] = pd.read_csv(os.path.join(results_path, f'{file}.csv'),
+                                            index_col=[0, 1],
+                                            header=0,
+                                            squeeze=True)
+
+        results['meta'] = meta
 
     except FileNotFoundError:
         return None
@@ -729,10 +2242,251 @@ def load_results(timestamp, scenario):
     return results
 
 
-def export_processed_results(run_id, scn_id, results, region):
-    """Export processed results of analysis of a single scenario to pickle file
-    in directory ~/.windnode_abw/results/<run_timestamp>/<scenario>/processed/
-    which is created if not existent.
+class LazyResults(Mapping):
+    """Lazy handle of raw results of a single scenario
+
+    On creation, only the meta infos and the column index (node pairs) of
+    the results files are read. Results are loaded on access, either
+    entirely (e.g. `results['flows']`, same format as
+    :func:`load_results`) or only the columns matching a node pattern
+    (see :meth:`select`). Parquet files are memory-mapped, column-selective
+    reads are only possible for the parquet format (see
+    :func:`write_results`), legacy CSV files are read entirely.
+
+    As it behaves like the dict returned by :func:`load_results`, it can be
+    passed to functions expecting raw results.
+
+    Parameters
+    ----------
+    timestamp : :obj:`str`
+        Timestamp of results, format: yymmdd_HHMMSS
+    scenario : :obj:`str`
+        Scenario id, e.g. "sq"
+
+    Examples
+    --------
+    >>> results = LazyResults('2020-08-05_024335', 'ISE2050')
+    >>> results.columns('flows')
+    >>> results.select('flows', pattern_from='gen_el_15001000')
+    """
+    # DataFrames
+    df_files = ['flows', 'vars_stat', 'params_flows']
+    # Series
+    se_files = ['params_stat', 'invest']
+
+    def __init__(self, timestamp, scenario):
+        self._path = os.path.join(config.get_data_root_dir(),
+                                  config.get('user_dirs',
+                                             'results_dir'),
+                                  timestamp,
+                                  scenario)
+        with open(os.path.join(self._path, 'meta.json')) as file:
+            self._meta = json.load(file)
+        self._format = self._meta['config'].get('results_format', 'csv')
+
+        self._columns = {}
+        for name in self.df_files + self.se_files:
+            file = self._file(name)
+            if not os.path.isfile(file):
+                continue
+            if self._format == 'parquet':
+                self._columns[name] = pd.MultiIndex.from_tuples(
+                    [labels for labels, _ in _results_parquet_fields(
+                        pq.read_schema(file)).values()])
+            else:
+                self._columns[name] = None
+        self._data = {}
+
+    def _file(self, name):
+        return os.path.join(self._path, f'{name}.{self._format}')
+
+    def _read(self, name, columns=None):
+        if self._format == 'parquet':
+            return read_results_parquet(self._file(name),
+                                        columns=columns,
+                                        memory_map=True)
+        elif name in self.df_files:
+            data = pd.read_csv(self._file(name),
+                               index_col=0,
+                               header=[0, 1])
+        else:
+            data = pd.read_csv(self._file(name),
+                               index_col=[0, 1],
+                               header=0,
+                               squeeze=True)
+        if columns is not None:
+            # Series are stored with node pairs as index
+            data = data.loc[:, columns] if name in self.df_files \
+                else data.loc[columns]
+        return data
+
+    @property
+    def meta(self):
+        """Meta infos"""
+        return self._meta
+
+    def columns(self, name):
+        """Get node pairs of results (columns of DataFrames, index of
+        Series)
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Name of results, e.g. 'flows'
+
+        Returns
+        -------
+        :pandas:`pandas.MultiIndex`
+            Node pairs
+        """
+        if self._columns[name] is None:
+            # legacy CSV: read header only
+            if name in self.df_files:
+                self._columns[name] = pd.read_csv(self._file(name),
+                                                  index_col=0,
+                                                  header=[0, 1],
+                                                  nrows=0).columns
+            else:
+                self._columns[name] = self[name].index
+        return self._columns[name]
+
+    def select(self, name, pattern_from=None, pattern_to=None):
+        """Load node pairs (columns) of results matching patterns
+
+        The patterns are matched from the beginning of the node name (see
+        :pandas:`pandas.Series.str.match`) as in
+        :func:`~.analysis.tools.extract_flows_timexagsxtech`.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Name of results, e.g. 'flows'
+        pattern_from : :obj:`str`
+            RegEx pattern matching first node (e.g. source of flow), all if
+            None
+        pattern_to : :obj:`str`
+            RegEx pattern matching second node (e.g. target of flow or
+            variable), all if None
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame` or :pandas:`pandas.Series`
+            Results
+        """
+        columns = self.columns(name)
+        mask = np.ones(len(columns), dtype=bool)
+        if pattern_from is not None:
+            mask &= columns.get_level_values(0).str.match(pattern_from)
+        if pattern_to is not None:
+            mask &= columns.get_level_values(1).str.match(pattern_to)
+        columns = columns[mask]
+
+        if name in self._data:
+            data = self._data[name]
+            return data.loc[:, columns] if name in self.df_files \
+                else data.loc[columns]
+        return self._read(name, columns=list(columns))
+
+    def __getitem__(self, name):
+        if name == 'meta':
+            return self._meta
+        if name not in self._columns:
+            raise KeyError(name)
+        if name not in self._data:
+            self._data[name] = self._read(name)
+        return self._data[name]
+
+    def __iter__(self):
+        return iter(list(self._columns) + ['meta'])
+
+    def __len__(self):
+        return len(self._columns) + 1
+
+
+def results_fingerprint(run_timestamp, scn_id, version=''):
+    """Get fingerprint of raw results of scenario
+
+    The fingerprint is made of the stats (size and modification time) of the
+    raw results files written by :func:`export_results`, the run and
+    scenario config from the meta infos and the `version` of the analysis.
+    Hence, processed results are invalidated if one of them changes (see
+    :func:`load_processed_results`).
+
+    Parameters
+    ----------
+    run_timestamp : :obj:`str`
+        Run timestamp
+    scn_id : :obj:`str`
+        Scenario id
+    version : :obj:`str`
+        Version stamp of analysis
+
+    Returns
+    -------
+    :obj:`str`
+        Fingerprint, None if meta infos are not found
+    """
+    meta = load_results_meta(timestamp=run_timestamp, scenario=scn_id)
+    if meta is None:
+        return None
+
+    results_path = os.path.join(config.get_data_root_dir(),
+                                config.get('user_dirs',
+                                           'results_dir'),
+                                run_timestamp,
+                                scn_id)
+    ext = meta['config'].get('results_format', 'csv')
+    stats = []
+    for file in sorted(glob(os.path.join(results_path, f'*.{ext}'))):
+        stat = os.stat(file)
+        stats.append(f'{os.path.basename(file)}:{stat.st_size}:'
+                     f'{stat.st_mtime_ns}')
+
+    return hashlib.sha1(
+        '|'.join([*stats,
+                  json.dumps(meta['config'], sort_keys=True, default=str),
+                  str(version)]
+                 ).encode('utf-8')
+    ).hexdigest()
+
+
+def processed_results_path(run_id, scn_id):
+    """Get path of processed results of scenario
+
+    Parameters
+    ----------
+    run_id : :obj:`str`
+        Run id
+    scn_id : :obj:`str`
+        Scenario id
+
+    Returns
+    -------
+    :obj:`str`
+        Path ~/.windnode_abw/results/<run_timestamp>/<scenario>/processed/
+    """
+    return os.path.join(config.get_data_root_dir(),
+                        config.get('user_dirs',
+                                   'results_dir'),
+                        run_id,
+                        scn_id,
+                        'processed'
+                        )
+
+
+def export_processed_results(run_id, scn_id, results, region,
+                             fingerprint=None):
+    """Export processed results of analysis of a single scenario to directory
+    ~/.windnode_abw/results/<run_timestamp>/<scenario>/processed/
+    which is (re)created.
+
+    Each table (DataFrame or Series) is stored in a separate parquet file,
+    hence single tables can be loaded quickly (see
+    :func:`load_processed_results`). Objects which cannot be stored in
+    parquet (e.g. mixed types) are pickled. Raw results are not stored
+    again, the region is stored as reference (config) only. The tables,
+    the region and the fingerprint are listed in `processed.json` which is
+    written last.
 
     Parameters
     ----------
@@ -744,38 +2498,109 @@ def export_processed_results(run_id, scn_id, results, region):
         Results from analysis
     region : :class:`~.model.Region`
         Region object belonging to results
+    fingerprint : :obj:`str`
+        Fingerprint of raw results, see :func:`results_fingerprint`
     """
-    results_path = os.path.join(config.get_data_root_dir(),
-                                config.get('user_dirs',
-                                           'results_dir'),
-                                run_id,
-                                scn_id,
-                                'processed'
-                                )
-
-    # if dir does not exist, create it
-    if not os.path.isdir(results_path):
-        os.mkdir(results_path)
+    results_path = processed_results_path(run_id, scn_id)
 
     logger.info(f'Exporting results to {results_path} ...')
 
-    # create dict to be pickled
-    results_dict = {'region': region,
-                    'results': results}
-
-    results_file = os.path.join(results_path,
-                                f'{run_id}_{scn_id}.pickle')
-
-    # dump!
     try:
-        pickle.dump(results_dict, open(results_file, 'wb'))
+        # remove outdated results
+        if os.path.isdir(results_path):
+            shutil.rmtree(results_path)
+        os.makedirs(results_path)
+
+        processed = {'fingerprint': fingerprint,
+                     'region': {'cfg': region.cfg},
+                     'results': {}}
+        for group, data in results.items():
+            # raw results are referenced by results files
+            if group == 'results_raw':
+                continue
+            tables = data.items() if isinstance(data, dict) \
+                else [(None, data)]
+            processed['results'][group] = {
+                'dict': isinstance(data, dict),
+                'tables': [
+                    _write_processed_table(table,
+                                           results_path,
+                                           f'{group}__{n:03d}',
+                                           name=name)
+                    for n, (name, table) in enumerate(tables)
+                ]
+            }
+
+        with open(os.path.join(results_path, 'processed.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(processed, file, default=str, ensure_ascii=False,
+                      indent=2)
     except Exception as ex:
         logger.warning(f'Could not export processed results! Details:')
         logger.warning(ex)
 
 
-def load_processed_results(run_id, scn_id):
-    """Load processed results of analysis from pickle file
+def _write_processed_table(data, path, file_name, name=None):
+    """Write single table of processed results to parquet file (pickle as
+    fallback)
+
+    Returns
+    -------
+    :obj:`dict`
+        Table entry in `processed.json`: name, file and type
+    """
+    entry = {'name': name}
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        try:
+            if isinstance(data, pd.Series):
+                # name is restored from JSON
+                if not isinstance(data.name, (str, int, float, type(None))):
+                    raise TypeError
+                table = pa.Table.from_pandas(data.to_frame('values'))
+                entry['series_name'] = data.name
+            else:
+                table = pa.Table.from_pandas(data)
+            entry['file'] = f'{file_name}.parquet'
+            entry['type'] = type(data).__name__
+            pq.write_table(table, os.path.join(path, entry['file']))
+            return entry
+        except (pa.ArrowException, TypeError, ValueError):
+            logger.debug(f'Table {name} cannot be stored in parquet, '
+                         f'pickle is used.')
+
+    entry['file'] = f'{file_name}.pickle'
+    entry['type'] = 'pickle'
+    with open(os.path.join(path, entry['file']), 'wb') as file:
+        pickle.dump(data, file)
+
+    return entry
+
+
+def _read_processed_table(path, entry, filters=None):
+    """Read single table of processed results, see
+    :func:`_write_processed_table`
+
+    `filters` are passed to :func:`pyarrow.parquet.read_table` (not applied
+    to pickled tables).
+    """
+    file = os.path.join(path, entry['file'])
+    if entry['type'] == 'pickle':
+        with open(file, 'rb') as f:
+            return pickle.load(f)
+
+    data = pq.read_table(file, memory_map=True, filters=filters).to_pandas()
+    if entry['type'] == 'Series':
+        return data['values'].rename(entry['series_name'])
+    return data
+
+
+def load_processed_results(run_id, scn_id, fingerprint=None, groups=None,
+                           tables=None):
+    """Load processed results of analysis
+
+    Single groups (e.g. 'highlevel_results') or tables (e.g.
+    'Stromerzeugung nach Gemeinde' of 'results_axlxt') can be selected.
+    Raw results are loaded lazily (see :class:`LazyResults`).
 
     Parameters
     ----------
@@ -783,38 +2608,289 @@ def load_processed_results(run_id, scn_id):
         Run id
     scn_id : :obj:`str`
         Scenario id
+    fingerprint : :obj:`str`
+        Fingerprint of raw results (see :func:`results_fingerprint`), if it
+        does not match the fingerprint of the processed results, they are
+        outdated and not loaded. Not checked if None.
+    groups : :obj:`list` of :obj:`str`
+        Groups of results to be loaded, e.g. ['highlevel_results'], all if
+        None
+    tables : :obj:`list` of :obj:`str`
+        Tables to be loaded from groups holding multiple tables, e.g.
+        ['Stromerzeugung nach Gemeinde'], all if None
 
     Returns
     -------
-    :class:`~.model.Region`
-        Region object
+    :obj:`dict`
+        Region reference: config ('cfg') to import region with
     :obj:`dict` of :obj:`dict`
         Result dict
     """
-    results_path = os.path.join(config.get_data_root_dir(),
-                                config.get('user_dirs',
-                                           'results_dir'),
-                                run_id,
-                                scn_id,
-                                'processed'
-                                )
+    results_path = processed_results_path(run_id, scn_id)
 
-    # check if dir exists
-    if not os.path.isdir(results_path):
+    try:
+        with open(os.path.join(results_path, 'processed.json'),
+                  encoding='utf-8') as file:
+            processed = json.load(file)
+    except (OSError, ValueError):
         logger.info(f'Loading processed results: '
-                    f'Directory {results_path} not found, skipping...')
+                    f'No results found in {results_path}, skipping...')
         return None, None
 
-    results_file = os.path.join(results_path,
-                                f'{run_id}_{scn_id}.pickle')
+    if fingerprint is not None and processed['fingerprint'] != fingerprint:
+        logger.info(f'Loading processed results: '
+                    f'Results in {results_path} are outdated, skipping...')
+        return None, None
 
     # load!
     logger.info(f'Loading processed results from {results_path} ...')
     try:
-        results_dict = pickle.load(open(results_file, 'rb'))
+        results = {}
+        if groups is None or 'results_raw' in groups:
+            results['results_raw'] = load_results(timestamp=run_id,
+                                                  scenario=scn_id,
+                                                  lazy=True)
+        for group, data in processed['results'].items():
+            if groups is not None and group not in groups:
+                continue
+            if data['dict']:
+                results[group] = {
+                    entry['name']: _read_processed_table(results_path, entry)
+                    for entry in data['tables']
+                    if tables is None or entry['name'] in tables
+                }
+            else:
+                results[group] = _read_processed_table(results_path,
+                                                       data['tables'][0])
     except Exception as ex:
         logger.warning(f'Could not load processed results! Details:')
         logger.warning(ex)
         return None, None
 
-    return results_dict['region'], results_dict['results']
+    return processed['region'], results
+
+
+def result_cube_path(run_id):
+    """Get path of result cube of run (see :func:`export_result_cube`)
+
+    The cube is stored in a hidden directory in the run's results directory
+    so that it is not considered as scenario, e.g. by
+    :func:`~.analysis.analysis`.
+
+    Parameters
+    ----------
+    run_id : :obj:`str`
+        Run id
+
+    Returns
+    -------
+    :obj:`str`
+        Path ~/.windnode_abw/results/<run_timestamp>/.cube/
+    """
+    return os.path.join(config.get_data_root_dir(),
+                        config.get('user_dirs',
+                                   'results_dir'),
+                        run_id,
+                        '.cube'
+                        )
+
+
+def export_result_cube(run_id, results_scns, fingerprints=None,
+                       groups=RESULT_CUBE_GROUPS):
+    """Export processed results of multiple scenarios stacked along scenario
+    dimension (cube) to directory ~/.windnode_abw/results/<run_timestamp>/.cube/
+    which is (re)created.
+
+    Each table is stacked across all scenarios holding it (new first index
+    level 'scenario') and stored in a separate parquet file (see
+    :func:`_write_processed_table`), the tables are listed in `cube.json`.
+
+    Parameters
+    ----------
+    run_id : :obj:`str`
+        Run id
+    results_scns : :obj:`dict` of :obj:`dict`
+        Processed results per scenario id, e.g. as returned by
+        :func:`~.analysis.analysis`
+    fingerprints : :obj:`dict` of :obj:`str`
+        Fingerprint of raw results per scenario id, see
+        :func:`results_fingerprint`
+    groups : :obj:`list` of :obj:`str`
+        Groups of processed results to be stacked
+    """
+    cube_path = result_cube_path(run_id)
+    scenarios = list(results_scns)
+
+    logger.info(f'Exporting result cube of {len(scenarios)} scenarios to '
+                f'{cube_path} ...')
+
+    if os.path.isdir(cube_path):
+        shutil.rmtree(cube_path)
+    os.makedirs(cube_path)
+
+    cube = {'scenarios': scenarios,
+            'fingerprints': fingerprints,
+            'tables': []}
+    for group in groups:
+        data_scns = {scn: results_scns[scn][group]
+                     for scn in scenarios if group in results_scns[scn]}
+        if all(isinstance(data, dict) for data in data_scns.values()):
+            names = list(dict.fromkeys(name
+                                       for data in data_scns.values()
+                                       for name in data))
+            tables = [(name, {scn: data[name]
+                              for scn, data in data_scns.items()
+                              if name in data})
+                      for name in names]
+        else:
+            tables = [(None, data_scns)]
+
+        for n, (name, table_scns) in enumerate(tables):
+            if all(isinstance(data, (pd.DataFrame, pd.Series))
+                   for data in table_scns.values()):
+                table = pd.concat(table_scns, names=['scenario'])
+            else:
+                table = pd.Series(table_scns).rename_axis('scenario')
+            entry = _write_processed_table(table,
+                                           cube_path,
+                                           f'{group}__{n:03d}',
+                                           name=name)
+            entry['group'] = group
+            cube['tables'].append(entry)
+
+    with open(os.path.join(cube_path, 'cube.json'), 'w',
+              encoding='utf-8') as file:
+        json.dump(cube, file, default=str, ensure_ascii=False, indent=2)
+
+
+def load_result_cube(run_id, fingerprints=None):
+    """Load result cube of run, see :class:`ResultCube`
+
+    Parameters
+    ----------
+    run_id : :obj:`str`
+        Run id
+    fingerprints : :obj:`dict` of :obj:`str`
+        Fingerprint of raw results per scenario id (see
+        :func:`results_fingerprint`), if they do not match the fingerprints
+        of the cube, it is outdated and not loaded. Not checked if None.
+
+    Returns
+    -------
+    :class:`ResultCube`
+        Result cube, None if not found or outdated
+    """
+    try:
+        cube = ResultCube(run_id)
+    except (OSError, ValueError):
+        logger.info(f'Loading result cube: No cube found for run {run_id}, '
+                    f'skipping...')
+        return None
+
+    if fingerprints is not None and cube.fingerprints != fingerprints:
+        logger.info(f'Loading result cube: Cube of run {run_id} is outdated, '
+                    f'skipping...')
+        return None
+
+    return cube
+
+
+class ResultCube(Mapping):
+    """Processed results of multiple scenarios stacked along scenario
+    dimension (see :func:`export_result_cube`)
+
+    Tables are read from files on first access and cached. Tables of groups
+    holding multiple tables (e.g. 'results_axlxt') are accessed by group and
+    name, all others by group.
+
+    Parameters
+    ----------
+    run_id : :obj:`str`
+        Run id
+
+    Examples
+    --------
+    >>> cube = load_result_cube('2020-08-05_024335')
+    >>> cube['highlevel_results'].unstack('scenario')
+    >>> cube['results_axlxt', 'Total costs electricity supply'].sum(
+    ...     axis=1).unstack('scenario')
+    >>> cube.select('results_t', 'LCOE', scenarios=['NEP', 'ISE'])
+    """
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self._path = result_cube_path(run_id)
+        with open(os.path.join(self._path, 'cube.json'),
+                  encoding='utf-8') as file:
+            cube = json.load(file)
+
+        self.scenarios = cube['scenarios']
+        self.fingerprints = cube['fingerprints']
+        self._entries = dict(
+            ((entry['group'], entry['name']), entry)
+            for entry in cube['tables'])
+        self._data = {}
+
+    def tables(self, group):
+        """Get names of tables in group
+
+        Parameters
+        ----------
+        group : :obj:`str`
+            Group of results, e.g. 'results_axlxt'
+
+        Returns
+        -------
+        :obj:`list` of :obj:`str`
+            Table names
+        """
+        return [name for (group_, name) in self._entries
+                if group_ == group and name is not None]
+
+    def select(self, group, name=None, scenarios=None):
+        """Load table of selected scenarios
+
+        Parameters
+        ----------
+        group : :obj:`str`
+            Group of results, e.g. 'results_axlxt'
+        name : :obj:`str`
+            Table name, e.g. 'Total costs electricity supply', None for
+            groups holding single table (e.g. 'highlevel_results')
+        scenarios : :obj:`list` of :obj:`str`
+            Scenarios, all if None
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame` or :pandas:`pandas.Series`
+            Table with scenario as first index level
+        """
+        key = (group, name)
+        if key not in self._entries:
+            raise KeyError(key)
+        if scenarios is None:
+            return self[key]
+
+        data = self._data.get(key)
+        if data is None:
+            data = _read_processed_table(
+                self._path,
+                self._entries[key],
+                filters=[('scenario', 'in', list(scenarios))])
+        return data[data.index.get_level_values('scenario').isin(scenarios)]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, None)
+        if key not in self._entries:
+            raise KeyError(key)
+        if key not in self._data:
+            self._data[key] = _read_processed_table(self._path,
+                                                    self._entries[key])
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(group if name is None else (group, name)
+                    for group, name in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
@@ -35,6 +35,7 @@ from oemof.outputlib import views
 from oemof.graph import create_nx_graph
 
 from windnode_abw.model.region.tools import calc_dsm_cap_up, calc_dsm_cap_down
+from windnode_abw.tools.data_io import ResultCube
 
 import logging
 
@@ -940,7 +941,12 @@ def plot_storage_ratios(storage_ratios, region, title):
 
 
 def plot_key_scenario_results(results_scns, scenarios, cmap_name='WindNODE', scenario_order=None):
+    """Plot key results of scenarios
 
+    `results_scns` may be a dict of processed results per scenario (see
+    :func:`~.analysis.analysis`) or a result cube (see
+    :func:`~.analysis.result_cube`).
+    """
     if cmap_name == 'WindNODE':
         cmap_dot_plot = n_colors((0, 200, 200), (255, 100, 0), len(scenarios))
         cmap_dot_plot = [unconvert_from_RGB_255(i) for i in cmap_dot_plot]
@@ -985,12 +991,21 @@ def plot_key_scenario_results(results_scns, scenarios, cmap_name='WindNODE', sce
         #####################################
         # get and process highlevel_results #
         #####################################
-        data_hl = pd.DataFrame(
-            ({f'{name} [{unit}]': results_scns[scn]['highlevel_results'][(name, unit)]
-              for name, unit in params['highlevel_results']}
-             for scn in scenarios),
-            index=scenarios
-        )
+        if isinstance(results_scns, ResultCube):
+            highlevel_results = results_scns.select(
+                'highlevel_results', scenarios=scenarios).unstack('scenario')
+            data_hl = pd.DataFrame(
+                {f'{name} [{unit}]': highlevel_results.loc[(name, unit)]
+                 for name, unit in params['highlevel_results']},
+                index=scenarios
+            )
+        else:
+            data_hl = pd.DataFrame(
+                ({f'{name} [{unit}]': results_scns[scn]['highlevel_results'][(name, unit)]
+                  for name, unit in params['highlevel_results']}
+                 for scn in scenarios),
+                index=scenarios
+            )
 
         if no == 1:
             data_hl['Total Costs [bnEUR]'] = (data_hl['Total costs electricity supply [EUR]'] +
@@ -1024,12 +1039,20 @@ def plot_key_scenario_results(results_scns, scenarios, cmap_name='WindNODE', sce
         #################################
         # get and process results_axlxt #
         #################################
-        data_axlxt = pd.DataFrame(
-            ({f'{name} [{unit}]': results_scns[scn]['results_axlxt'][name][col].sum(axis=0)
-              for name, col, unit in params['results_axlxt']}
-             for scn in scenarios),
-            index=scenarios
-        )
+        if isinstance(results_scns, ResultCube):
+            data_axlxt = pd.DataFrame(
+                {f'{name} [{unit}]': results_scns.select(
+                    'results_axlxt', name, scenarios=scenarios)[col].sum(level='scenario')
+                 for name, col, unit in params['results_axlxt']},
+                index=scenarios
+            )
+        else:
+            data_axlxt = pd.DataFrame(
+                ({f'{name} [{unit}]': results_scns[scn]['results_axlxt'][name][col].sum(axis=0)
+                  for name, col, unit in params['results_axlxt']}
+                 for scn in scenarios),
+                index=scenarios
+            )
         if no == 1:
             data = data_hl
         if no == 2:
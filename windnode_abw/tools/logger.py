@@ -1,7 +1,17 @@
 import os
+import sys
+import time
 import logging
 import logging.config
 import psutil
+import threading
+import pandas as pd
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
 
 from windnode_abw.tools import config
 
@@ -74,3 +84,260 @@ def log_memory_usage():
     logger.info(f'[Memory used (w/o solver): {mem} MB]')
 
     return mem
+
+
+def get_peak_memory_usage():
+    """Get peak memory usage (high-water mark of RSS) of process
+
+    Returns
+    -------
+    :obj:`int`
+        Memory in MB, None if not supported by OS
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kB on Linux
+    return round(peak / 1024**2) if sys.platform == 'darwin' \
+        else round(peak / 1024)
+
+
+def get_total_memory_usage(process=None):
+    """Get memory usage (RSS) of process and all its child processes (e.g.
+    solver)
+
+    Parameters
+    ----------
+    process : :obj:`psutil.Process`
+        Process, defaults to current process
+
+    Returns
+    -------
+    :obj:`float`
+        Memory of process in MB
+    :obj:`float`
+        Memory of all child processes in MB
+    """
+    if process is None:
+        process = psutil.Process(os.getpid())
+    mem = process.memory_info().rss
+    mem_children = 0
+    for child in process.children(recursive=True):
+        try:
+            mem_children += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # child has terminated meanwhile
+            pass
+
+    return mem / 1024**2, mem_children / 1024**2
+
+
+class MemorySampler:
+    """Sample memory usage of current process and all its child processes
+    (e.g. solver) in a background thread
+
+    Attributes
+    ----------
+    _interval : :obj:`float`
+        Sampling interval in seconds
+    _samples : :obj:`list` of :obj:`tuple`
+        Samples (time in seconds since start, memory of process in MB,
+        memory of child processes in MB)
+    """
+    def __init__(self, interval=1):
+        self._interval = interval
+        self._samples = []
+        self._time_start = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling"""
+        self._samples = []
+        self._stop_event.clear()
+        self._time_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self):
+        """Return True if sampler is running"""
+        return self._thread is not None
+
+    def _sample(self):
+        process = psutil.Process(os.getpid())
+        while True:
+            self.sample(process)
+            if self._stop_event.wait(self._interval):
+                break
+
+    def sample(self, process=None):
+        """Take sample
+
+        Parameters
+        ----------
+        process : :obj:`psutil.Process`
+            Process, defaults to current process
+
+        Returns
+        -------
+        :obj:`float`
+            Total memory of process and child processes in MB
+        """
+        mem, mem_children = get_total_memory_usage(process)
+        self._samples.append((round(time.perf_counter() - self._time_start, 3),
+                              round(mem),
+                              round(mem_children)))
+        return mem + mem_children
+
+    def time(self):
+        """Return time in seconds since start of sampling"""
+        return time.perf_counter() - self._time_start
+
+    def peak(self, since=0):
+        """Return peak of total memory usage (process and child processes)
+
+        Parameters
+        ----------
+        since : :obj:`float`
+            Consider samples taken after this time (in seconds since start of
+            sampling) only
+
+        Returns
+        -------
+        :obj:`int`
+            Memory in MB, None if no samples are available
+        """
+        mems = [mem + mem_children
+                for t, mem, mem_children in self._samples
+                if t >= since]
+        return max(mems) if mems else None
+
+    @property
+    def samples(self):
+        """Return memory samples as DataFrame
+
+        Returns
+        -------
+        :pandas:`pandas.DataFrame`
+            Memory of process and child processes in MB (columns) per time in
+            seconds since start of sampling (index)
+        """
+        return pd.DataFrame(
+            self._samples,
+            columns=['time', 'memory', 'memory_children']).set_index('time')
+
+
+class StageProfiler:
+    """Record wall time, CPU time and memory usage of run stages
+
+    Stages may be nested, the name of a nested stage is prefixed with the
+    names of its parent stages, e.g. 'create_oemof_model/create_el_model'.
+    Memory values are given in MB, `rss_peak` is the high-water mark of the
+    process' RSS at the end of the stage (w/o solver). If a
+    :class:`MemorySampler` is attached, `rss_peak_total` holds the peak of
+    the process' and all child processes' RSS (incl. solver) during the
+    stage.
+
+    Attributes
+    ----------
+    _stages : :obj:`list` of :obj:`dict`
+        Recorded stages in order of completion
+    _stack : :obj:`list` of :obj:`str`
+        Names of currently active stages
+    _sampler : :class:`MemorySampler`
+        Memory sampler, optional
+    """
+    def __init__(self):
+        self._stages = []
+        self._stack = []
+        self._sampler = None
+
+    @property
+    def sampler(self):
+        """Return memory sampler"""
+        return self._sampler
+
+    @sampler.setter
+    def sampler(self, sampler):
+        self._sampler = sampler
+
+    def reset(self):
+        """Delete recorded stages"""
+        self._stages = []
+        self._stack = []
+
+    @property
+    def stages(self):
+        """Return recorded stages"""
+        return self._stages
+
+    @contextmanager
+    def stage(self, name):
+        """Record stage, use as context manager or decorator
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Name of stage
+        """
+        self._stack.append(name)
+        stage = '/'.join(self._stack)
+        process = psutil.Process(os.getpid())
+        rss_start = process.memory_info().rss / 1024**2
+        sampler = self._sampler if self._sampler is not None and \
+            self._sampler.running else None
+        sampler_start = sampler.time() if sampler is not None else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            rss_end = process.memory_info().rss / 1024**2
+            record = {
+                'stage': stage,
+                'wall_time': round(time.perf_counter() - wall_start, 3),
+                'cpu_time': round(time.process_time() - cpu_start, 3),
+                'rss_start': round(rss_start),
+                'rss_end': round(rss_end),
+                'rss_delta': round(rss_end - rss_start),
+                'rss_peak': get_peak_memory_usage()
+            }
+            if sampler is not None:
+                # include current usage for stages shorter than interval
+                mem_total = sampler.sample()
+                record['rss_peak_total'] = round(
+                    max(sampler.peak(since=sampler_start), mem_total))
+            self._stages.append(record)
+            self._stack.pop()
+            logging.getLogger('windnode_abw').debug(
+                f'[Stage {stage}: {record["wall_time"]} s wall, '
+                f'{record["cpu_time"]} s CPU, '
+                f'{record["rss_delta"]:+d} MB RSS]')
+
+
+# profiler of current process
+profiler = StageProfiler()
+
+
+def profile_stage(name):
+    """Record stage using profiler of current process, see
+    :meth:`StageProfiler.stage`
+
+    Examples
+    --------
+    >>> with profile_stage('solve'):
+    ...     om.solve()
+
+    >>> @profile_stage('create_el_model')
+    ... def create_el_model(region=None, datetime_index=None):
+    ...     pass
+    """
+    return profiler.stage(name)
@@ -0,0 +1,372 @@
+import os
+import json
+import queue
+import multiprocessing
+import psutil
+import pandas as pd
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import logging
+logger = logging.getLogger('windnode_abw')
+
+from windnode_abw.tools import config
+from windnode_abw.tools.data_io import load_scenario_cfg
+from windnode_abw.analysis import analysis
+
+# rough estimates per model size unit (municipality x timestep x complexity),
+# only used if no report of an earlier run is available
+MEMORY_BASE = 500
+MEMORY_PER_UNIT = 0.01
+TIME_PER_UNIT = 0.015
+
+# additional complexity of flexibility options and storages (relative to
+# base model = 1)
+FLEXOPT_COMPLEXITY = {
+    ('flexopt', 'flex_bat_large'): 0.1,
+    ('flexopt', 'flex_bat_small'): 0.1,
+    ('flexopt', 'flex_dec_pth'): 0.2,
+    ('flexopt', 'flex_cen_pth'): 0.1,
+    ('storage', 'th_dec_pth_storage'): 0.2,
+    ('storage', 'th_cen_storage'): 0.1,
+    ('flexopt', 'dsm'): 1.0
+}
+
+
+def load_run_report(scn_id, date_from, date_to, freq, ts_aggregation=None):
+    """Load memory and time needs of scenario from latest earlier run with
+    same timerange (and timeseries aggregation)
+
+    Reports (meta infos and stage profile) are searched in all runs in
+    ~/.windnode_abw/results/.
+
+    Parameters
+    ----------
+    scn_id : :obj:`str`
+        Scenario id
+    date_from : :obj:`str`
+        Start of simulation timerange
+    date_to : :obj:`str`
+        End of simulation timerange
+    freq : :obj:`str`
+        Frequency of simulation timerange
+    ts_aggregation : :obj:`dict`
+        Timeseries aggregation (typical periods) params, None if model is
+        built on full timerange
+
+    Returns
+    -------
+    :obj:`dict`
+        Peak memory incl. solver in MB ('memory') and wall time in seconds
+        ('time'), None if no report is found
+    """
+    results_path = os.path.join(config.get_data_root_dir(),
+                                config.get('user_dirs',
+                                           'results_dir'))
+
+    # run timestamps are sortable, start with latest run
+    for meta_file in sorted(glob(os.path.join(results_path, '*', scn_id,
+                                              'meta.json')),
+                            reverse=True):
+        profile_file = os.path.join(os.path.dirname(meta_file),
+                                    'profile.json')
+        if not os.path.isfile(profile_file):
+            continue
+        try:
+            with open(meta_file, encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(profile_file, encoding='utf-8') as file:
+                profile = json.load(file)
+        except (OSError, ValueError):
+            continue
+
+        cfg = meta.get('config', {})
+        if [cfg.get('date_from'), cfg.get('date_to'), cfg.get('freq'),
+            cfg.get('ts_aggregation')] != \
+                [date_from, date_to, freq, ts_aggregation] or \
+                'memory_peak_incl_solver' not in meta:
+            continue
+
+        return {
+            'memory': int(meta['memory_peak_incl_solver'].split()[0]),
+            # use top-level stages only
+            'time': sum(stage['wall_time']
+                        for stage in profile['stages']
+                        if '/' not in stage['stage'])
+        }
+
+    return None
+
+
+def estimate_scenario_resources(cfg, n_muns):
+    """Estimate memory and time needs of scenario
+
+    If an earlier run of the scenario with the same timerange is found (see
+    :func:`load_run_report`), its peak memory and wall time are used.
+    Otherwise, the needs are estimated from the model size: number of
+    municipalities x number of timesteps x complexity (flexibility options
+    and storages enabled in scenario, see `FLEXOPT_COMPLEXITY`). If the
+    model is built on typical periods, their timesteps are used.
+
+    Parameters
+    ----------
+    cfg : :obj:`dict`
+        Run config incl. scenario
+    n_muns : :obj:`int`
+        Number of municipalities
+
+    Returns
+    -------
+    :obj:`dict`
+        Memory in MB ('memory'), time in seconds ('time') and source of
+        estimate ('source': 'report' or 'model_size')
+    """
+    scn_data = load_scenario_cfg(cfg['scenario'])
+
+    report = load_run_report(scn_id=scn_data['general']['id'],
+                             date_from=cfg['date_from'],
+                             date_to=cfg['date_to'],
+                             freq=cfg['freq'],
+                             ts_aggregation=cfg.get('ts_aggregation'))
+    if report is not None:
+        return {**report, 'source': 'report'}
+
+    n_timesteps = len(pd.date_range(start=cfg['date_from'],
+                                    end=cfg['date_to'],
+                                    freq=cfg['freq']))
+    # model is built on typical periods (incl. peak period)
+    ts_aggregation = cfg.get('ts_aggregation')
+    if ts_aggregation:
+        n_timesteps = min(n_timesteps,
+                          (ts_aggregation['periods'] + 1) *
+                          ts_aggregation.get('period_length', 24))
+
+    complexity = 1
+    for (section, flexopt), value in FLEXOPT_COMPLEXITY.items():
+        params = scn_data.get(section, {}).get(flexopt, {})
+        if flexopt == 'dsm':
+            enabled = params.get('params', {}).get('hh_share', 0) > 0
+        else:
+            enabled = params.get('enabled', {}).get('enabled', 0) == 1
+        if enabled:
+            complexity += value
+
+    units = n_muns * n_timesteps * complexity
+
+    return {'memory': MEMORY_BASE + MEMORY_PER_UNIT * units,
+            'time': TIME_PER_UNIT * units,
+            'source': 'model_size'}
+
+
+def run_scheduled(func, cfgs, estimates, proc_count, memory_budget=None,
+                  initializer=None, initargs=(), callback=None):
+    """Run scenarios in multiple processes with respect to a memory budget
+
+    The scenarios are started in order of their estimated time (longest
+    processing time first). A scenario is only started if the sum of the
+    estimated memory of all running scenarios fits the budget, otherwise
+    no further scenarios are started until enough memory is released. If a
+    single scenario exceeds the budget, it is run alone.
+
+    Parameters
+    ----------
+    func : callable
+        Function to be called with cfg, e.g.
+        :func:`~.run_scenario.run_scenario`
+    cfgs : :obj:`list` of :obj:`dict`
+        Configs of scenarios
+    estimates : :obj:`list` of :obj:`dict`
+        Estimated needs of scenarios (same order as `cfgs`), see
+        :func:`estimate_scenario_resources`
+    proc_count : :obj:`int`
+        Max. number of processes
+    memory_budget : :obj:`float`
+        Memory budget in MB, defaults to 90 % of available memory
+    initializer : callable
+        Function to be called at start of each process
+    initargs : :obj:`tuple`
+        Args passed to `initializer`
+    callback : callable
+        Function to be called in main process when a scenario has finished,
+        args: cfg and return value of `func`
+
+    Returns
+    -------
+    :obj:`list`
+        Return values of `func` (same order as `cfgs`)
+    """
+    if memory_budget is None:
+        memory_budget = 0.9 * psutil.virtual_memory().available / 1024**2
+
+    pending = sorted(range(len(cfgs)),
+                     key=lambda n: estimates[n]['time'],
+                     reverse=True)
+    logger.info(f'Scheduling {len(cfgs)} scenarios in {proc_count} processes '
+                f'with memory budget of {round(memory_budget)} MB, '
+                f'order: {[cfgs[n]["scenario"] for n in pending]}')
+
+    results = [None] * len(cfgs)
+    running = {}
+    with ProcessPoolExecutor(max_workers=proc_count,
+                             initializer=initializer,
+                             initargs=initargs) as executor:
+        while pending or running:
+            # start scenarios (in LPT order) while memory fits
+            memory_used = sum(memory for _, memory in running.values())
+            for n in list(pending):
+                if len(running) >= proc_count:
+                    break
+                memory = estimates[n]['memory']
+                # hold capacity for next scenario to keep LPT order
+                if memory_used + memory > memory_budget and running:
+                    break
+                if memory > memory_budget:
+                    logger.warning(f'Estimated memory of scenario '
+                                   f'{cfgs[n]["scenario"]} ({round(memory)} '
+                                   f'MB) exceeds budget, running it alone.')
+                logger.info(f'Starting scenario {cfgs[n]["scenario"]} '
+                            f'(estimated: {round(memory)} MB, '
+                            f'{round(estimates[n]["time"])} s)...')
+                running[executor.submit(func, cfgs[n])] = (n, memory)
+                memory_used += memory
+                pending.remove(n)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                n, _ = running.pop(future)
+                results[n] = future.result()
+                if callback is not None:
+                    callback(cfgs[n], results[n])
+
+    return results
+
+
+class AnalysisWorker(multiprocessing.Process):
+    """Worker process analyzing solved scenarios
+
+    Scenarios (tuple of run timestamp, scenario and scenario id) are taken
+    from the task queue until None is received. For each scenario, a tuple
+    of scenario and error message (None if successful) is put to the result
+    queue.
+
+    Parameters
+    ----------
+    tasks : :obj:`multiprocessing.Queue`
+        Task queue
+    results : :obj:`multiprocessing.Queue`
+        Result queue
+    """
+    def __init__(self, tasks, results):
+        super().__init__()
+        self._tasks = tasks
+        self._results = results
+
+    def run(self):
+        for run_timestamp, scenario, scn_id in iter(self._tasks.get, None):
+            try:
+                _, results_scns = analysis(run_timestamp=run_timestamp,
+                                           scenarios=scn_id)
+                # scenarios not found are skipped by analysis
+                error = None if scn_id in results_scns else \
+                    'Results not found or malformed, see log'
+            except Exception as ex:
+                logger.exception(f'Analysis of scenario {scenario} failed!')
+                error = str(ex)
+            self._results.put((scenario, error))
+
+
+class AnalysisPipeline:
+    """Analyze scenarios in worker processes while further scenarios are
+    solved
+
+    Solved scenarios are passed to the analysis workers (see
+    :class:`AnalysisWorker`) via a queue, hence solving and analysis
+    overlap.
+
+    Parameters
+    ----------
+    worker_count : :obj:`int`
+        Number of analysis workers
+    callback : callable
+        Function to be called in main process when the analysis of a
+        scenario has finished, args: scenario and error message (None if
+        successful)
+
+    Examples
+    --------
+    >>> pipeline = AnalysisPipeline(worker_count=2)
+    >>> pipeline.start()
+    >>> pipeline.put(run_timestamp, scenario, scn_id)
+    >>> errors = pipeline.join()
+    """
+    def __init__(self, worker_count=1, callback=None):
+        self._tasks = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._workers = [AnalysisWorker(self._tasks, self._results)
+                         for _ in range(worker_count)]
+        self._callback = callback
+        self._pending = 0
+        self._errors = {}
+
+    def start(self):
+        """Start analysis workers"""
+        for worker in self._workers:
+            worker.start()
+        logger.info(f'Started {len(self._workers)} analysis workers.')
+
+    def put(self, run_timestamp, scenario, scn_id):
+        """Add solved scenario to be analyzed
+
+        Parameters
+        ----------
+        run_timestamp : :obj:`str`
+            Run timestamp
+        scenario : :obj:`str`
+            Scenario
+        scn_id : :obj:`str`
+            Scenario id
+        """
+        self._tasks.put((run_timestamp, scenario, scn_id))
+        self._pending += 1
+
+    def poll(self, timeout=None):
+        """Process results of finished analyses
+
+        Parameters
+        ----------
+        timeout : :obj:`float`
+            Time in seconds to wait for a result, do not wait if None
+        """
+        while self._pending > 0:
+            try:
+                scenario, error = self._results.get(
+                    block=timeout is not None, timeout=timeout)
+            except queue.Empty:
+                return
+            self._pending -= 1
+            if error is not None:
+                self._errors[scenario] = error
+            if self._callback is not None:
+                self._callback(scenario, error)
+
+    def join(self):
+        """Wait for all analyses to finish and stop workers
+
+        Returns
+        -------
+        :obj:`dict`
+            Error message per failed scenario
+        """
+        for _ in self._workers:
+            self._tasks.put(None)
+        while self._pending > 0:
+            self.poll(timeout=5)
+            if self._pending > 0 and \
+                    not any(worker.is_alive() for worker in self._workers):
+                logger.error(f'All analysis workers died, '
+                             f'{self._pending} analyses not finished.')
+                break
+        for worker in self._workers:
+            worker.join()
+
+        return self._errors